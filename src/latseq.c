@@ -35,6 +35,59 @@ uint64_t get_cpu_freq_cycles(void)
   return (l_rdtsc() - ts);
 }
 
+static int write_latseq_sync(uint64_t rdtsc, struct timespec * ts)
+{
+#ifdef LATSEQ_BINARY
+  latseq_record_t r;
+  memset(&r, 0, sizeof(r));
+  r.ts = rdtsc;
+  r.type = LATSEQ_RECORD_SYNC;
+  r.data_id[0] = (uint32_t)ts->tv_sec;
+  r.data_id[1] = (uint32_t)ts->tv_nsec;
+  return (fwrite(&r, sizeof(r), 1, g_latseq.outstream) == 1) ? (int)sizeof(r) : -1;
+#else
+  return fprintf(g_latseq.outstream, "%ld S rdtsc--gettimeofday %ld.%09ld\n", rdtsc, ts->tv_sec, ts->tv_nsec);
+#endif
+}
+
+#ifdef LATSEQ_BINARY
+static int get_latseq_string_id(const char * str)
+{
+  latseq_strings_t * t = &g_latseq.strings;
+  size_t h = ((uintptr_t)str >> 3) % (2 * LATSEQ_MAX_STRINGS);
+  //points and formats are string literals, known by their address
+  while (t->key[h] != NULL) {
+    if (t->key[h] == str) {
+      return t->id[h];
+    }
+    h = (h + 1) % (2 * LATSEQ_MAX_STRINGS);
+  }
+  if (t->nb_str >= LATSEQ_MAX_STRINGS) {
+    return -1;
+  }
+  //new string, write it by pieces before the first entry which uses it
+  uint16_t id = t->nb_str++;
+  t->key[h] = str;
+  t->id[h] = id;
+  latseq_record_t r;
+  size_t len = strlen(str);
+  size_t off = 0;
+  do {
+    memset(&r, 0, sizeof(r));
+    r.type = LATSEQ_RECORD_STRING;
+    r.point = id;
+    r.format = (uint16_t)off;
+    r.len = (uint8_t)((len - off) < LATSEQ_STRING_PIECE ? (len - off) : LATSEQ_STRING_PIECE);
+    memcpy(r.data_id, str + off, r.len);
+    if (fwrite(&r, sizeof(r), 1, g_latseq.outstream) != 1) {
+      return -1;
+    }
+    off += r.len;
+  } while (off < len);
+  return id;
+}
+#endif
+
 /*--- MAIN THREAD FUNCTIONS --------------------------------------------------*/
 
 int init_latseq(const char * appname, uint64_t cpufreq)
@@ -58,21 +111,37 @@ int init_latseq(const char * appname, uint64_t cpufreq)
   g_latseq.filelog_name = (char *)malloc(LATSEQ_MAX_STR_SIZE);
   sprintf(g_latseq.filelog_name, "%s.%s.lseq", appname, time_string);
   //open logfile
+#ifdef LATSEQ_BINARY
+  g_latseq.outstream = fopen(g_latseq.filelog_name, "wb");
+#else
   g_latseq.outstream = fopen(g_latseq.filelog_name, "w");
+#endif
   if (g_latseq.outstream == NULL) {
     g_latseq.is_running = 0;
     printf("[LATSEQ] Error at opening log file\n");
     return -1;
   }
   //write header
+#ifdef LATSEQ_BINARY
+  latseq_record_t hdr;
+  memset(&hdr, 0, sizeof(hdr));
+  memcpy(&hdr.ts, LATSEQ_BINARY_MAGIC, sizeof(hdr.ts));
+  hdr.type = LATSEQ_RECORD_HEADER;
+  hdr.len = NB_DATA_IDENTIFIERS;
+  hdr.point = sizeof(latseq_record_t);
+  hdr.format = LATSEQ_BINARY_VERSION;
+  size_t ret = fwrite(&hdr, sizeof(hdr), 1, g_latseq.outstream);
+  memset(&g_latseq.strings, 0, sizeof(g_latseq.strings));
+#else
   char hdr[] = "# LatSeq packet fingerprints\n# By Alexandre Ferrieux and Flavien Ronteix Jacquet\n# timestamp\tU/D\tsrc--dest\tlen:ctxtId:localId\n";
   size_t ret = fwrite(hdr, sizeof(char), sizeof(hdr) - 1, g_latseq.outstream);
+#endif
   if (ret < 0) {
     printf("[LATSEQ] Error at opening log file\n");
     g_latseq.is_running = 0;
     return -1;
   }
-  fprintf(g_latseq.outstream, "%ld S rdtsc--gettimeofday %ld.%09ld\n", g_latseq.rdtsc_zero, ts.tv_sec, ts.tv_nsec);
+  write_latseq_sync(g_latseq.rdtsc_zero, &ts);
   fflush(g_latseq.outstream);
   
   // init registry
@@ -142,7 +211,11 @@ int init_thread_for_latseq(void)
   //Check if space left in registry
   if (reg->nb_th >= MAX_NB_THREAD) {
     g_latseq.is_running = 0;
+#ifdef LATSEQ_BINARY
+    fprintf(stderr, "[LATSEQ] Max instrumented thread MAX_NB_THREAD reached\n");
+#else
     fprintf(g_latseq.outstream, "Max instrumented thread MAX_NB_THREAD reached\n");
+#endif
     return -1;
   }
   reg->tls[reg->nb_th] = &tls_latseq;
@@ -166,6 +239,26 @@ static int write_latseq_entry(void)
   //reference to element to write
   latseq_element_t * e = &th->log_buffer[(*i_read_head)%RING_BUFFER_SIZE];
 
+#ifdef LATSEQ_BINARY
+  //Write a fixed size record, the format is applied by the analysis tools
+  latseq_record_t r;
+  int point_id = get_latseq_string_id(e->point);
+  int format_id = get_latseq_string_id(e->format);
+  if (point_id < 0 || format_id < 0) {
+    g_latseq.is_running = 0;
+    fclose(g_latseq.outstream);
+    fprintf(stderr, "[LATSEQ] more than %d points and formats in the binary log file\n", LATSEQ_MAX_STRINGS);
+    exit(EXIT_FAILURE);
+  }
+  memset(&r, 0, sizeof(r));
+  r.ts = e->ts;
+  r.type = LATSEQ_RECORD_ENTRY;
+  r.len = (uint8_t)e->len_id;
+  r.point = (uint16_t)point_id;
+  r.format = (uint16_t)format_id;
+  memcpy(r.data_id, e->data_id, sizeof(uint32_t) * e->len_id);
+  int ret = (fwrite(&r, sizeof(r), 1, g_latseq.outstream) == 1) ? (int)sizeof(r) : -1;
+#else
   char * tmps;
   //Convert latseq_element to a string
   tmps = calloc(LATSEQ_MAX_STR_SIZE, sizeof(char));
@@ -190,6 +283,8 @@ static int write_latseq_entry(void)
     e->ts,
     e->point,
     tmps);
+  free(tmps);
+#endif
 
   if (ret < 0) {
     g_latseq.is_running = 0;
@@ -197,12 +292,11 @@ static int write_latseq_entry(void)
     fprintf(stderr, "[LATSEQ] output log file cannot be written\n");
     exit(EXIT_FAILURE);
   }
-#ifdef LATSEQ_DEBUG
+#if defined(LATSEQ_DEBUG) && !defined(LATSEQ_BINARY)
   fprintf(g_latseq.outstream, "# debug %ld.%06ld : log an entry (len %d) for %s\n", etv.tv_sec, etv.tv_usec, ret, e->point);
   fprintf(g_latseq.outstream, "# info %ld.%06ld : buffer occupancy (%d / %d) for thread which embedded %s\n",etv.tv_sec, etv.tv_usec, OCCUPANCY((*(&th->i_write_head)%RING_BUFFER_SIZE), ((*i_read_head)%RING_BUFFER_SIZE)), RING_BUFFER_SIZE, e->point);
 #endif
 
-  free(tmps);
   // cleanup buffer element
   e->ts = 0;
   memset(e->data_id, 0, (sizeof(uint32_t) * e->len_id));
@@ -242,7 +336,11 @@ void latseq_log_to_file(void)
 
     //If max occupancy reached for a local buffer
     if (reg->tls[reg->read_ith_thread]->i_write_head < reg->i_read_heads[reg->read_ith_thread]) {
+#ifdef LATSEQ_BINARY
+      fprintf(stderr, "[LATSEQ] ring buffer of thread (%d) reach max occupancy of %d\n", reg->read_ith_thread, RING_BUFFER_SIZE);
+#else
       fprintf(g_latseq.outstream, "# Error\tring buffer of thread (%d) reach max occupancy of %d\n", reg->read_ith_thread, RING_BUFFER_SIZE);
+#endif
     }
 
     items_to_read = CHUNK_SIZE_ITEMS;
@@ -278,7 +376,7 @@ void fflush_latseq_periodically(void)
     sleep(1);
     fflush(g_latseq.outstream);
     clock_gettime(CLOCK_REALTIME, &ts);
-    fprintf(g_latseq.outstream, "%ld S rdtsc--gettimeofday %ld.%09ld\n", l_rdtsc(), ts.tv_sec, ts.tv_nsec);
+    write_latseq_sync(l_rdtsc(), &ts);
   }
   pthread_exit(NULL);
 }
@@ -46,6 +46,10 @@
 #define LATSEQ_MAX_STR_SIZE 128 // Length for filelog_name AND latseq fingerprint string size
 #define CHUNK_SIZE_ITEMS    16  // Size of chunk of ring buffer to read at data collector. 1 correspoding to full RR, RING_BUFFER_SIZE read all buffer by passage
 #define MAX_NB_THREAD       32  // Maximum number of instrumented threads expected
+#define LATSEQ_BINARY_MAGIC "LSEQBIN1" // First 8 bytes of a binary log file, written when compiled with -DLATSEQ_BINARY
+#define LATSEQ_BINARY_VERSION 1
+#define LATSEQ_MAX_STRINGS  1024 // Maximum number of distinct points and formats in a binary log file
+#define LATSEQ_STRING_PIECE (NB_DATA_IDENTIFIERS * sizeof(uint32_t)) // Bytes of string in a string record
 
 /*--- MACRO ------------------------------------------------------------------*/
 #define LATSEQ_P3(p, f, i1) do {log_measure1(p, f, (uint32_t)i1); } while(0)
@@ -73,6 +77,32 @@ typedef struct latseq_element_t {
   uint32_t            data_id[NB_DATA_IDENTIFIERS]; // values for the data identifier. What is the best type ?
 } latseq_element_t;
 
+// Type of a record of a binary log file
+typedef enum latseq_record_type_t {
+  LATSEQ_RECORD_HEADER = 0, // first record of the file
+  LATSEQ_RECORD_SYNC = 1,   // rdtsc--gettimeofday synchronisation
+  LATSEQ_RECORD_STRING = 2, // piece of a point or a format string, written before its first use
+  LATSEQ_RECORD_ENTRY = 3   // a fingerprint
+} latseq_record_type_t;
+
+// A record of a binary log file, all records have the same size
+typedef struct latseq_record_t {
+  uint64_t            ts; // rdtsc of the entry or of the synchronisation, LATSEQ_BINARY_MAGIC for the header
+  uint8_t             type; // latseq_record_type_t
+  uint8_t             len; // Number data identifiers of an entry, number of bytes of a string piece, NB_DATA_IDENTIFIERS for the header
+  uint16_t            point; // string id of the point of an entry, string id of a string piece, sizeof(latseq_record_t) for the header
+  uint16_t            format; // string id of the format of an entry, offset of a string piece, LATSEQ_BINARY_VERSION for the header
+  uint16_t            reserved;
+  uint32_t            data_id[NB_DATA_IDENTIFIERS]; // data identifiers of an entry, (sec, nsec) of a synchronisation, bytes of a string piece
+} latseq_record_t;
+
+// Ids of the point and format strings already written in a binary log file
+typedef struct latseq_strings_t {
+  const char *        key[2 * LATSEQ_MAX_STRINGS]; // open addressing table on the address of strings
+  uint16_t            id[2 * LATSEQ_MAX_STRINGS];
+  uint16_t            nb_str;
+} latseq_strings_t;
+
 // Statistics structures for latseq
 typedef struct latseq_stats_t {
   uint32_t        entry_counter;
@@ -104,6 +134,9 @@ typedef struct latseq_t {
   uint64_t            cpu_freq; //cpu frequency
   latseq_registry_t   local_log_buffers; //Register of thread-specific buffers
   latseq_stats_t      stats; // stats of latseq instance
+#ifdef LATSEQ_BINARY
+  latseq_strings_t    strings; // string table of the binary log file
+#endif
 } latseq_t;
 
 /*--- EXTERNS ----------------------------------------------------------------*/
@@ -0,0 +1,315 @@
+#!/usr/bin/python3
+
+#################################################################################
+# Software Name : LatSeq
+# Version: 1.0
+# SPDX-FileCopyrightText: Copyright (c) 2020-2021 Orange Labs
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# This software is distributed under the BSD 3-clause,
+# the text of which is available at https://opensource.org/licenses/BSD-3-Clause
+# or see the "license.txt" file for more details.
+#
+# Author: Flavien Ronteix--Jacquet
+# Software description: LatSeq check of the parallel paths of latseq_logs
+#################################################################################
+
+"""Check that latseq_logs gives the same result with a pool of processes as in one process
+
+Each log file is copied to a temporary directory for each run, then no cache is shared between runs.
+The state parsed with --jobs N is compared to the serial parse, as the -i and -j outputs.
+The journeys rebuilt by time shards (--split time) are compared to the serial rebuild,
+also with a cut forced inside a journey, whose shard has to be rebuilt again.
+Values of identifiers are kept as they are written, with leading zeros or larger than int64
+
+Example:
+    ./check_journeys.py ../data/*.lseq
+    make check-journeys
+"""
+
+import sys
+import os
+import re
+import json
+import argparse
+import shutil
+import subprocess
+import tempfile
+import logging
+import numpy
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools')
+sys.path.insert(0, TOOLS_DIR)
+import latseq_logs
+
+#
+# GLOBALS
+#
+JOBS = [2, 4, 7]  # numbers of processes compared to the serial path
+PARSE_TS_UNITS = ['us', 'decimal']  # representations of timestamps of the parse check
+PARSE_STAGES = ['infos', 'inputs', 'points', 'paths']  # stages built by the parse of the log file
+OUTPUTS = ['-i', '-j']  # outputs of latseq_logs.py compared to the serial path
+# prefixes given to the values of identifiers of the values check, e.g. rnti054614, fm99999999999999999999182
+VALUES_PREFIXES = ['0', '99999999999999999999']
+MATCH_IDS = re.compile(r"(?:^|(?<=[.:]))([a-zA-Z]+)([0-9]+)")  # identifiers of a fingerprint, as latseq_logs.MATCH_IDS
+
+#
+# UTILS
+#
+def new_log(tmpP: str, logP: str, tagP: str) -> str:
+    """Copy of the log file in its own directory, without cache"""
+    path = os.path.join(tmpP, tagP)
+    os.makedirs(path, exist_ok=True)
+    return shutil.copy(logP, path)
+
+def run_tool(logP: str, argsP: list) -> bytes:
+    """stdout of latseq_logs.py, run in the directory of the log file, then the file of the journeys is its name"""
+    return subprocess.run(
+        [sys.executable, os.path.join(os.path.abspath(TOOLS_DIR), 'latseq_logs.py'), '-l', os.path.basename(logP)] + argsP,
+        cwd=os.path.dirname(logP), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+
+def prefix_values(idsP: str, prefixP: str) -> str:
+    """Identifiers with prefixP before each value, but the empty rnti"""
+    return MATCH_IDS.sub(lambda m: m.group(0) if m.group(0) == 'rnti65535' else f"{m.group(1)}{prefixP}{m.group(2)}", idsP)
+
+def prefix_log(tmpP: str, logP: str, tagP: str, prefixP: str) -> str:
+    """Copy of the log file, with prefixP before the values of the identifiers of the fingerprints"""
+    path = os.path.join(tmpP, tagP)
+    os.makedirs(path, exist_ok=True)
+    path = os.path.join(path, os.path.basename(logP))
+    with open(logP, 'r') as fin, open(path, 'w') as fout:
+        for l in fin:
+            tmp = l.rstrip('\n').split(' ')
+            if len(tmp) > 3 and tmp[1] in ('D', 'U'):
+                tmp[3] = prefix_values(tmp[3], prefixP)
+            fout.write(' '.join(tmp) + '\n')
+    return path
+
+def prefix_input(lineP: str, prefixP: str) -> str:
+    """Line of -i with prefixP before the values of the identifiers, e.g. (len18) seg glob:local"""
+    tmp = lineP.split(' ')
+    tmp[2] = f"({prefix_values(tmp[2][1:-1], prefixP)})"
+    seg, sep, ids = tmp[3].partition(':')  # ':' after the segment without global identifiers
+    tmp[3] = f"{seg}{sep}{prefix_values(ids, prefixP)}"
+    # multiple values of a local identifier are printed as a list, e.g. psn['0', '12']
+    return re.sub(r"'([0-9]+)'", f"'{prefixP}\\1'", ' '.join(tmp[:4] + [prefix_values(t, prefixP) for t in tmp[4:]]))
+
+def prefix_journey(journeyP: dict, prefixP: str) -> dict:
+    """Journey of -j with prefixP before the values of the identifiers, but its uid"""
+    for name in ('glob', 'set_ids', 'properties'):
+        for k, v in journeyP.get(name, {}).items():
+            if k != 'uid':
+                journeyP[name][k] = [prefixP + e for e in v] if isinstance(v, list) else prefixP + v
+    return journeyP
+
+def equal(aP, bP) -> bool:
+    """Deep comparison of parsed states, with numpy arrays"""
+    if isinstance(aP, numpy.ndarray) or isinstance(bP, numpy.ndarray):
+        return numpy.array_equal(aP, bP)
+    if isinstance(aP, dict) and isinstance(bP, dict):
+        return list(aP.keys()) == list(bP.keys()) and all(equal(aP[k], bP[k]) for k in aP)
+    if isinstance(aP, (list, tuple)) and isinstance(bP, (list, tuple)):
+        return len(aP) == len(bP) and all(equal(a, b) for a, b in zip(aP, bP))
+    return aP == bP
+
+def inputs_state(inputsP: latseq_logs.latseq_inputs) -> dict:
+    """Columns of the fingerprints, with the values kept for local identifiers"""
+    state = dict(inputsP.get_columns())
+    state['local_overrides'] = inputsP.local_overrides
+    return state
+
+def parsed_state(lseqP: latseq_logs.latseq_log) -> dict:
+    """Attributes of the stages of the parse, by name"""
+    state = {}
+    for stage in PARSE_STAGES:
+        for attr in latseq_logs.STAGES[stage]:
+            state[attr] = getattr(lseqP, attr)
+    state['inputs'] = inputs_state(state['inputs'])
+    return state
+
+def diff_states(aP: dict, bP: dict) -> list:
+    """Names of the attributes not equal in two states"""
+    return [k for k in aP if not equal(aP[k], bP.get(k))]
+
+def journeys_state(lseqP: latseq_logs.latseq_log) -> dict:
+    """Journeys, out_journeys, durations and values kept for local identifiers, after the rebuild"""
+    lseqP.rebuild_packets_journey_recursively()
+    journeys = [lseqP.journeys[k] for k in lseqP.journeys]
+    for j in journeys:  # the file is the one of the copy
+        j.pop('file', None)
+    return {
+        'journeys': journeys,
+        'out_journeys': lseqP.out_journeys,
+        'durations': {p: lseqP.points[p].get('duration') for p in lseqP.points},
+        'local_overrides': lseqP.inputs.local_overrides}
+
+class records_handler(logging.Handler):
+    """Keep the messages logged, to know which path a rebuild took"""
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(record.getMessage())
+
+#
+# CHECKS
+#
+def check_parse(tmpP: str, logP: str, jobsP: int) -> list:
+    """Compare the state parsed with jobsP processes to the serial parse
+
+    Returns:
+        :obj:`list` of str: the differences, empty if the parses are equal
+    """
+    res = []
+    for ts_unit in PARSE_TS_UNITS:
+        serial = latseq_logs.latseq_log(new_log(tmpP, logP, f"parse.{ts_unit}.1"), ts_unit, 1)
+        parallel = latseq_logs.latseq_log(new_log(tmpP, logP, f"parse.{ts_unit}.{jobsP}"), ts_unit, jobsP)
+        res.extend(f"parse --ts {ts_unit} : {a}" for a in diff_states(parsed_state(serial), parsed_state(parallel)))
+    return res
+
+def check_outputs(tmpP: str, logP: str, jobsP: int, argsP: list = None) -> list:
+    """Compare the outputs of latseq_logs.py with jobsP processes to the serial ones
+
+    Args:
+        argsP (:obj:`list` of str): more arguments of the run with jobsP processes, e.g. ['--split', 'time']
+
+    Returns:
+        :obj:`list` of str: the differences, empty if the outputs are equal
+    """
+    res = []
+    for o in OUTPUTS:
+        serial = run_tool(new_log(tmpP, logP, f"out{o}.1"), [o])
+        parallel = run_tool(new_log(tmpP, logP, f"out{o}.{jobsP}"), [o, '--jobs', str(jobsP)] + (argsP or []))
+        if serial != parallel:
+            res.append(f"output {o} {' '.join(argsP or [])}")
+    return res
+
+def check_values(tmpP: str, logP: str, jobsP: int) -> list:
+    """Compare the outputs of the log file with prefixes before the values of its identifiers, see `VALUES_PREFIXES`,
+    to the outputs of the log file with the same prefixes, serially and with jobsP processes,
+    and query the journeys stored by -s by a prefixed global identifier
+
+    Returns:
+        :obj:`list` of str: the differences, empty if the values are kept as they are written
+    """
+    res = []
+    inputs = run_tool(new_log(tmpP, logP, "values"), ['-i']).decode().splitlines()
+    journeys = run_tool(new_log(tmpP, logP, "values"), ['-j']).decode().splitlines()
+    for n, prefix in enumerate(VALUES_PREFIXES):
+        expected = [prefix_input(l, prefix) for l in inputs]
+        expected_j = [prefix_journey(json.loads(j), prefix) for j in journeys]
+        try:
+            for jobs in (1, jobsP):
+                log = prefix_log(tmpP, logP, f"values.{n}.{jobs}", prefix)
+                if run_tool(log, ['-i', '--jobs', str(jobs)]).decode().splitlines() != expected:
+                    res.append(f"values {prefix} --jobs {jobs} : output -i")
+                if [json.loads(j) for j in run_tool(log, ['-j', '--jobs', str(jobs)]).decode().splitlines()] != expected_j:
+                    res.append(f"values {prefix} --jobs {jobs} : output -j")
+            globs = [j for j in expected_j if j['glob']]
+            if globs:
+                name, value = next(iter(globs[0]['glob'].items()))
+                run_tool(log, ['-s', os.path.join(tmpP, f"values.{n}.db")])
+                found = run_tool(log, ['-q', '-s', os.path.join(tmpP, f"values.{n}.db"), '--id', f"{name}={value}"])
+                if [json.loads(j) for j in found.decode().splitlines()] != [j for j in expected_j if j['glob'].get(name) == value]:
+                    res.append(f"values {prefix} : query --id {name}={value}")
+        except subprocess.CalledProcessError as e:
+            res.append(f"values {prefix} : latseq_logs.py {' '.join(e.cmd[2:])} failed")
+    return res
+
+def check_shards(tmpP: str, logP: str, jobsP: int) -> list:
+    """Compare the journeys rebuilt by jobsP time shards to the serial rebuild, and the -j outputs
+
+    Returns:
+        :obj:`list` of str: the differences, empty if the rebuilds are equal
+    """
+    serial = journeys_state(latseq_logs.latseq_log(new_log(tmpP, logP, "shards.1")))
+    parallel = journeys_state(latseq_logs.latseq_log(new_log(tmpP, logP, f"shards.{jobsP}"), jobsP=jobsP, splitP='time'))
+    res = [f"split time : {a}" for a in diff_states(serial, parallel)]
+    res.extend(check_outputs(tmpP, logP, jobsP, ['--split', 'time']))
+    return res
+
+def check_forced_cut(tmpP: str, logP: str, jobsP: int) -> list:
+    """Compare the serial rebuild to the one of 2 time shards cut on a fingerprint narrowed by a journey
+    of the first shard, which has to rebuild the second shard again, see `latseq_log._rebuild_shards`
+
+    Returns:
+        :obj:`list` of str: the differences, empty if the rebuilds are equal
+    """
+    lseq = latseq_logs.latseq_log(new_log(tmpP, logP, "cut.1"))
+    serial = journeys_state(lseq)
+    roots = {}  # input measure of the journey of each fingerprint
+    for k in lseq.journeys:
+        rows = lseq.journeys.get_set(k)
+        for r in rows:
+            roots.setdefault(r, rows[0])
+    narrowed = [r for r in sorted(lseq.inputs.local_overrides) if roots.get(r, r) < r]
+    if not narrowed:
+        return []  # no journey narrows a fingerprint after its input measure
+    cut = narrowed[0]
+    lseq = latseq_logs.latseq_log(new_log(tmpP, logP, f"cut.{jobsP}"), jobsP=jobsP, splitP='time')
+    ts = lseq.inputs.ts
+    overlap = latseq_logs.duration_to_ts(
+        latseq_logs.DURATION_TO_SEARCH_PKT + latseq_logs.DURATION_TO_SEARCH_FORKS, lseq.inputs.ts_unit)
+    in_pointers = lseq._get_in_pointers()
+    before, after = in_pointers[in_pointers < cut], in_pointers[in_pointers >= cut]
+    end = max(cut, int(numpy.searchsorted(ts, ts[before[-1]] + overlap, side='left')))
+    shards = [(numpy.arange(0, end, dtype=numpy.int64), before.tolist())]
+    if len(after):
+        shards.append((numpy.arange(cut, len(ts), dtype=numpy.int64), after.tolist()))
+    lseq._shard_inputs = lambda nbP: shards
+    handler = records_handler()
+    logger = logging.getLogger()
+    levels = [(logger, logger.level)] + [(h, h.level) for h in logger.handlers]
+    for h in logger.handlers:  # the messages are only kept, not printed
+        h.setLevel(max(h.level, logging.WARNING))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        parallel = journeys_state(lseq)
+    finally:
+        logger.removeHandler(handler)
+        for o, level in levels:
+            o.setLevel(level)
+    res = [f"cut at {cut} : {a}" for a in diff_states(serial, parallel)]
+    if len(shards) > 1 and not any('rebuilt again' in m for m in handler.messages):
+        res.append(f"cut at {cut} : shard not rebuilt again")
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("./check_journeys.py",
+    description="LatSeq check of the parallel paths of latseq_logs")
+    parser.add_argument(
+        "logs",
+        type=str,
+        nargs='+',
+        help="Log files, e.g. data/*.lseq"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        dest="jobs",
+        nargs='+',
+        default=JOBS,
+        help=f"Numbers of processes compared to the serial path. by default, {JOBS}"
+    )
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    nb_failures = 0
+    for log in args.logs:
+        for jobs in args.jobs:
+            checks = [
+                ('parse', check_parse),
+                ('outputs', check_outputs),
+                ('values', check_values),
+                ('shards', check_shards),
+                ('forced cut', check_forced_cut)]
+            for name, check in checks:
+                with tempfile.TemporaryDirectory() as tmp:
+                    failures = check(tmp, log, jobs)
+                print(f"{os.path.basename(log)} --jobs {jobs} {name} : {'FAIL' if failures else 'OK'}")
+                for f in failures:
+                    print(f"\t{f}")
+                nb_failures += len(failures)
+    exit(1 if nb_failures else 0)
@@ -38,14 +38,27 @@ TODO
 
 import sys
 import os
+import errno
 import argparse
 import re
 import datetime
 import operator
+import bisect
+import heapq
+import itertools
 import statistics
 import numpy
-from copy import deepcopy
+import array
+import mmap
+import contextlib
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pickle
+import hashlib
+import shutil
+import sqlite3
 import simplejson as json
 import decimal
 from tqdm import tqdm
@@ -67,12 +80,23 @@ import rdtsctots
 DURATION_TO_SEARCH_PKT = decimal.Decimal(0.1)
 # 4ms treshold to find segmentation
 DURATION_TO_SEARCH_FORKS = decimal.Decimal(0.1)
+# Adaptive search windows by point, learnt from the latency observed on the segments, see `latseq_log.learn_windows`
+WINDOW_QUANTILE = 0.999  # quantile of the latency to a point kept in its search window
+DURATION_WINDOW_MARGIN = decimal.Decimal(0.0005)  # 500us : added to the quantile for the search window of a point
+WINDOW_MIN_SAMPLES = 100  # latencies to a point needed to learn its search window, the fixed one otherwise
+WINDOW_SAMPLE = 1 << 14  # fingerprints rebuilt with the fixed windows by the first pass of `latseq_log.learn_windows`
 # TODO: limit time to search concatenation: or use the properties like size ?
 # DURATION_TO_SEARCH_CONCA = 0.005  # 5ms to find concatenation
+DURATION_TO_REORDER = decimal.Decimal(1)  # 1s : maximum delay of a fingerprint in the log file for a rebuild as a stream
+MAX_PATHS = 1 << 16  # paths kept by direction, the next ones are not enumerated
 DURATION_TO_SEARCH_RETX = decimal.Decimal(0.01)  # 10ms : Set according to drx-RetransmissionTimerDL RRC config (3GPP-TS38.321) for MAC and max_seq_num for RLC (3GPP-TS38.322)
 
 # decimal.getcontext().prec = 6  # fix precision to 6 (precision of timestamp, then do not be more precise). BE CAREFUL : precision is different to fix place after point
 
+# Timestamp representations : Decimal of seconds or integer number of 1e-N seconds
+TS_UNITS = {'decimal': 0, 'us': 6, 'ns': 9}
+TS_UNIT = 'us'  # the collector writes timestamps with 6 digits
+
 S_TO_MS = 1000
 KWS_BUFFER = ['tx', 'rx', 'retx']  # buffer keywords
 KWS_NO_CONCATENATION = ['pdcp.in']  # TODO
@@ -81,6 +105,29 @@ KWS_OUT_D = ['phy.out.proc']
 KWS_IN_U = ['phy.in.proc']
 KWS_OUT_U = ['gtp.out']
 VERBOSITY = False  # Verbosity for rebuild phase False by default
+SPLITS = ['context', 'time']  # how journeys are rebuilt by a pool of processes, by global context (rnti) or by time shards
+STREAM_BLOCK_SIZE = 1 << 14  # fingerprints read at a time by a rebuild as a stream
+LOG_CHUNK_SIZE = 1 << 20  # 1MiB blocks read at a time from the log file
+DECOMPRESS_QUEUE_SIZE = 8  # blocks decompressed ahead of the parsing of a compressed log file
+BINARY_MAGIC = b"LSEQBIN1"  # first bytes of a log file written by a collector compiled with -DLATSEQ_BINARY
+BINARY_VERSION = 1
+BINARY_HEADER, BINARY_SYNC, BINARY_STRING, BINARY_ENTRY = range(4)  # types of records, latseq_record_type_t
+OUTPUT_BLOCK_SIZE = 1 << 12  # lines formatted and written at a time, see `write_lines_to_stdout`
+DB_BATCH_SIZE = 1 << 16  # rows inserted at a time into the SQLite store, see `latseq_db`
+CACHE_VERSION = 3  # version of the stages of the cache, the stages of another version are rebuilt
+# attributes of latseq_log by stage of the analysis, in the order of the analysis.
+# A stage is loaded from the cache or built on first access to one of its attributes, see `latseq_log.__getattr__`
+STAGES = {
+    'infos': ['infos', 'syncs'],
+    'inputs': ['inputs', 'nb_raw_inputs', 'dataids', 'edges', 'timestamps'],
+    'points': ['points', 'pointsInD', 'pointsOutD', 'pointsInU', 'pointsOutU'],
+    'paths': ['paths'],
+    'journeys': ['journeys'],
+    'out_journeys': ['out_journeys']}
+MATCH_C_CONVERSIONS = re.compile(r"%[-+ #0]*[0-9]*(?:\.[0-9]+)?(?:hh|h|ll|l|j|z|t)?([a-zA-Z%])")
+MATCH_C_SLOT = re.compile(r"^([a-zA-Z]+)%(?:hh|h|ll|l|j|z|t)?([diu])$")  # an identifier printed from a data identifier
+# patterns dataid to detect in a dotted list, id1.id2x.3 gives [('id', '1'), ('id', '2')]
+MATCH_IDS = re.compile(r"(?:^|(?<=\.))([a-zA-Z]+)([0-9]+)")
 #
 # UTILS
 #
@@ -99,6 +146,68 @@ def dstamp_to_epoch(dstamptime: str) -> decimal.Decimal:
     ).timestamp())
 
 
+def str_to_ts(tsP: str, unitP: str = TS_UNIT):
+    """Convert a timestamp string of the log to its `unitP` representation
+
+    Digits beyond the precision of `unitP` are truncated
+    """
+    if unitP == 'decimal':
+        return decimal.Decimal(tsP)
+    digits = TS_UNITS[unitP]
+    sec, _, frac = tsP.partition('.')
+    return int(sec + frac[:digits].ljust(digits, '0'))
+
+
+def ts_to_decimal(tsP, unitP: str = TS_UNIT) -> decimal.Decimal:
+    """Convert a timestamp or a duration in `unitP` to a Decimal of seconds"""
+    if unitP == 'decimal':
+        return tsP
+    return decimal.Decimal(tsP).scaleb(-TS_UNITS[unitP])
+
+
+def ts_to_decimal_strs(tsP: list, unitP: str = TS_UNIT) -> list:
+    """str of `ts_to_decimal` for a list of timestamps, without a Decimal for a time of day"""
+    if unitP == 'decimal':
+        return [str(t) for t in tsP]
+    digits = TS_UNITS[unitP]
+    one = 10 ** digits  # from 1s, the str of the Decimal is "seconds.digits"
+    return [f"{t // one}.{t % one:0{digits}d}" if t >= one else str(ts_to_decimal(t, unitP)) for t in tsP]
+
+
+def ns_to_ts(nsP: int, unitP: str = TS_UNIT):
+    """Convert a time of day in ns to `unitP`
+
+    Rounded to the us, the precision of converted rdtsc logs, except for 'ns'
+    """
+    if unitP == 'ns':
+        return nsP
+    us = (nsP + 500) // 1000
+    if unitP == 'decimal':
+        return decimal.Decimal(us).scaleb(-6)
+    return us
+
+
+def duration_to_ts(durationP: decimal.Decimal, unitP: str = TS_UNIT):
+    """Convert a Decimal duration in seconds to `unitP`
+
+    Rounded up, so `ts < ts0 + duration` keeps the same timestamps as with Decimal
+    """
+    if unitP == 'decimal':
+        return durationP
+    return int(durationP.scaleb(TS_UNITS[unitP]).to_integral_value(rounding=decimal.ROUND_CEILING))
+
+
+def journey_ts_to_decimal(journeyP: dict, unitP: str = TS_UNIT) -> dict:
+    """Copy of a journey with its timestamps in `unitP` converted to Decimal of seconds"""
+    if unitP == 'decimal':
+        return journeyP
+    tmp_j = dict(journeyP)
+    tmp_j['ts_in'] = ts_to_decimal(tmp_j['ts_in'], unitP)
+    tmp_j['ts_out'] = ts_to_decimal(tmp_j['ts_out'], unitP)
+    tmp_j['set'] = [(s[0], ts_to_decimal(s[1], unitP), s[2]) for s in tmp_j['set']]
+    return tmp_j
+
+
 def path_to_str(pathP: list) -> str:
     """Use to get a string representing a path from a list"""
     if len(pathP) < 1:
@@ -116,35 +225,1037 @@ def dict_ids_to_str(idsP: dict) -> str:
 def make_immutable_list(listP: list) -> tuple:
     return tuple(listP)
 
-def write_string_to_stdout(sstream: str):
+def local_ids_to_dict(idsP: list) -> dict:
+    """Dict of a list of local ids (name, value), multiple values for the same id become a list"""
+    res = dict(idsP)
+    if len(res) == len(idsP):  # no multiple value, the general case
+        return res
+    res = {}
+    for did in idsP:
+        if did[0] not in res:
+            res[did[0]] = did[1]
+        elif isinstance(res[did[0]], list):
+            res[did[0]].append(did[1])
+        else:  # the id goes at the end with its list of values
+            tmpl = [res[did[0]], did[1]]
+            del res[did[0]]
+            res[did[0]] = tmpl
+    return res
+
+def pack_strings(stringsP: list) -> tuple:
+    """Pack strings in two numpy arrays, the i-th string is bytes [offsets[i], offsets[i+1]) in utf-8
+
+    Returns:
+        tuple: (offsets, bytes), see `unpack_strings`
+    """
+    data = [e.encode() for e in stringsP]
+    offsets = numpy.zeros(len(data) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(e) for e in data], out=offsets[1:])
+    return offsets, numpy.frombuffer(b''.join(data), dtype=numpy.uint8)
+
+def unpack_strings(offsetsP, bytesP) -> list:
+    """List of the strings packed by `pack_strings`"""
+    data = bytesP.tobytes()
+    offsets = offsetsP.tolist()
+    return [data[b:e].decode() for b, e in zip(offsets, offsets[1:])]
+
+def binary_record_dtype(nb_idsP: int) -> numpy.dtype:
+    """numpy type of a record of a binary log file, see latseq_record_t of latseq.h
+
+    Args:
+        nb_idsP (int): number of data identifiers of a record, NB_DATA_IDENTIFIERS of the collector
+    """
+    return numpy.dtype([
+        ('ts', '<u8'),
+        ('type', 'u1'),
+        ('len', 'u1'),
+        ('point', '<u2'),
+        ('format', '<u2'),
+        ('reserved', '<u2'),
+        ('data_id', '<u4', (nb_idsP,))])
+
+
+def c_format_to_python(formatP: str) -> tuple:
+    """Translate a printf format of the collector to a format for the % operator
+
+    Args:
+        formatP (str): format given to LATSEQ_P
+
+    Returns:
+        tuple: (format for the % operator, list of True for each signed conversion, False otherwise)
+
+    Raises:
+        ValueError: conversion which does not print a data identifier
+    """
+    signed = list()
+    for c in MATCH_C_CONVERSIONS.findall(formatP):
+        if c == '%':
+            continue
+        if c not in 'diouxX':
+            raise ValueError(f"%{c} conversion in {formatP}")
+        signed.append(c in 'di')
+    return MATCH_C_CONVERSIONS.sub(lambda m: m.group(0)[:-1].rstrip('hljzt') + m.group(1), formatP), signed
+
+def write_lines_to_stdout(linesP) -> bool:
+    """Write lines to stdout by blocks of `OUTPUT_BLOCK_SIZE`, each block joined in one write
+
+    A broken pipe stops the output, the reader is gone (e.g. `| head`), and stdout is redirected
+    to /dev/null for the flush at the exit of python.
+    An error of `linesP` is raised once the lines before it are written
+
+    Args:
+        linesP (iterable of str): lines without their end of line
+
+    Returns:
+        bool: False if the pipe is broken
+    """
+    lines = iter(linesP)
+    error = None
     try:
-        sys.stdout.write(sstream + '\n')
+        while error is None:
+            block = []
+            try:
+                for l in itertools.islice(lines, OUTPUT_BLOCK_SIZE):
+                    block.append(l)
+            except Exception as e:
+                error = e
+            if not block:
+                break
+            block.append('')  # end of the last line
+            sys.stdout.write('\n'.join(block))
+        sys.stdout.flush()
     except IOError as e:
         if e.errno == errno.EPIPE:  # Ignore broken pipe Error
-            logging.warning("write_string_to_stdout() : Broken pipe error")
-            return
-        else:
-            logging.error(f"write_string_to_stdout() : {e}")
-            exit()
+            logging.warning("write_lines_to_stdout() : Broken pipe error")
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return False
+        logging.error(f"write_lines_to_stdout() : {e}")
+        exit()
+    if error is not None:
+        raise error
+    return True
+
+def write_string_to_stdout(sstream: str) -> bool:
+    return write_lines_to_stdout((sstream,))
 
 #
 # CLASSES
 #
+class latseq_symbols:
+    """Table of interned names
+
+    Each name gets a small integer code, the first one being 0.
+    Analysis works on the codes, names are decoded for the output
+
+    Attributes:
+
+        names (:obj:`list` of str): name of each code
+        codes (:obj:`dict`): code of each name
+    """
+    def __init__(self):
+        self.names = list()
+        self.codes = dict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, nameP: str) -> bool:
+        return nameP in self.codes
+
+    def encode(self, nameP: str) -> int:
+        """Get the code of `nameP`, a new code is given to an unknown name"""
+        code = self.codes.get(nameP)
+        if code is None:
+            code = len(self.names)
+            self.codes[nameP] = code
+            self.names.append(nameP)
+        return code
+
+    def decode(self, codeP: int) -> str:
+        """Get the name of `codeP`"""
+        return self.names[codeP]
+
+
+class latseq_paths:
+    """Automaton of the paths of a log file, to find the path of a journey hop by hop
+
+    A state is the set of paths still possible for a journey, with the index of the next point on each of them.
+    A journey keeps a state id and each hop is a lookup in `next`, instead of a dict of candidate paths by journey.
+    A state with one path is final, the path of the journey is found
+
+    Args:
+
+        pathsP (:obj:`list` of :obj:`list`): paths by direction, see `latseq_log.paths`
+        pointsP (:obj:`latseq_symbols`): names of the points
+
+    Attributes:
+
+        paths (:obj:`list` of :obj:`list`): paths by direction, as `pathsP`
+        points (:obj:`latseq_symbols`): names of the points
+        candidates (:obj:`list` of :obj:`dict`): possible paths of each state, path id : index of the next point
+        found (:obj:`list`): the path id of each final state, None otherwise
+        next (:obj:`list` of :obj:`dict`): transitions of each state, code of the src point : state
+        start (:obj:`list` of int): first state of each direction, before the input point
+        in_path (:obj:`dict`): name of a point in a path, by (direction, path id, code of the point), see `point_in_path`
+    """
+    def __init__(self, pathsP: list, pointsP: latseq_symbols):
+        self.paths = pathsP
+        self.points = pointsP
+        self.candidates = [{}]  # state 0 : no path possible
+        self.found = [None]
+        self.next = [{}]
+        self.start = []
+        self.in_path = {}
+        states = {}
+        for d, paths_dir in enumerate(pathsP):
+            paths_codes = [tuple(pointsP.encode(n) for n in path) for path in paths_dir]
+            self.start.append(self._add_state({path: 0 for path in range(len(paths_codes))}))
+            todo = [self.start[-1]]
+            while todo:
+                s = todo.pop()
+                moves = {}
+                for path, idx in self.candidates[s].items():
+                    if idx < len(paths_codes[path]):
+                        moves.setdefault(paths_codes[path][idx], {})[path] = idx + 1 if len(paths_codes[path]) > 1 else idx
+                for code, candidates in moves.items():
+                    key = (d, tuple(candidates.items()))
+                    if key not in states:
+                        states[key] = self._add_state(candidates)
+                        if len(candidates) == 1:  # a single path left, the path id is found
+                            self.found[states[key]] = next(iter(candidates))
+                        else:
+                            todo.append(states[key])
+                    self.next[s][code] = states[key]
+
+    def _add_state(self, candidatesP: dict) -> int:
+        self.candidates.append(candidatesP)
+        self.found.append(None)
+        self.next.append({})
+        return len(self.candidates) - 1
+
+    def get_path(self, stateP: int):
+        """Get the path of a journey in `stateP`, the dict of its candidate paths if not found yet"""
+        if self.found[stateP] is not None:
+            return self.found[stateP]
+        return dict(self.candidates[stateP])
+
+    def point_in_path(self, dirP: int, pathP: int, codeP: int) -> str:
+        """Get the name of the point `codeP` in the path, or of its closest parent point (e.g. rlc.tx for rlc.tx.am)
+
+        Returns:
+            str: the name of the point itself if neither it nor its parents are in the path
+        """
+        key = (dirP, pathP, codeP)
+        if key not in self.in_path:
+            name = self.points.decode(codeP)
+            point_s = name
+            while point_s not in self.paths[dirP][pathP]:
+                point_s = '.'.join(point_s.split('.')[:-1])
+                if not point_s:  # TODO: error to categorize correctly the path
+                    point_s = name
+                    break
+            self.in_path[key] = point_s
+        return self.in_path[key]
+
+
+class latseq_inputs:
+    """Columnar store of the cleaned fingerprints of a log file
+
+    Fingerprints are appended while the log file is read, then `freeze` sorts them by timestamp
+    and turns the columns into numpy arrays.
+    `inputs[i]` still returns the former tuple of the i-th fingerprint, built on demand
+
+    Args:
+
+        ts_unitP (str): representation of timestamps, one of `TS_UNITS`
+        rdtscP (bool): timestamps are appended in cycles of the CPU, until `convert_rdtsc`
+
+    Attributes:
+
+        ts_unit (str): unit of the `ts` column, 'ns' for Decimal timestamps
+        rdtsc (bool): True while the `ts` column is in cycles of the CPU
+        ts (:obj:`numpy.ndarray` of int64): timestamps
+        ts_decimal (:obj:`list` of Decimal): exact timestamps if ts_unitP is 'decimal', None otherwise
+        dir (:obj:`numpy.ndarray` of uint8): 0 for Downlink, 1 for Uplink
+        src (:obj:`numpy.ndarray` of int16): src point, code in `points`
+        dst (:obj:`numpy.ndarray` of int16): dst point, code in `points`
+        points (:obj:`latseq_symbols`): names of the points
+        ids (:obj:`latseq_symbols`): names of the identifiers
+        values (:obj:`latseq_symbols`): values of the identifiers, as they are written, e.g. '054614'
+        properties (tuple): packed properties, (offsets, keys, values)
+            properties[0] (:obj:`numpy.ndarray` of int64): properties of the i-th fingerprint are in [offsets[i], offsets[i+1])
+            properties[1] (:obj:`numpy.ndarray` of int16): identifier, code in `ids`
+            properties[2] (:obj:`numpy.ndarray` of int64): value of the identifier, code in `values`
+        glob_ids (tuple): packed global identifiers, as `properties`
+        local_ids (tuple): packed local identifiers, as `properties`, in the order of the fingerprint
+        local_overrides (:obj:`dict`): the value kept for a local identifier with multiple values, by codes
+    """
+    def __init__(self, ts_unitP: str = TS_UNIT, rdtscP: bool = False):
+        self.ts_unit = 'ns' if ts_unitP == 'decimal' else ts_unitP
+        self.rdtsc = rdtscP
+        self.ts_decimal = list() if ts_unitP == 'decimal' and not rdtscP else None
+        self.ts = array.array('q')
+        self.dir = array.array('B')
+        self.src = array.array('h')
+        self.dst = array.array('h')
+        self.points = latseq_symbols()
+        self.ids = latseq_symbols()
+        self.values = latseq_symbols()
+        self.properties = (array.array('q', [0]), array.array('h'), array.array('q'))
+        self.glob_ids = (array.array('q', [0]), array.array('h'), array.array('q'))
+        self.local_ids = (array.array('q', [0]), array.array('h'), array.array('q'))
+        self.local_overrides = dict()
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __getitem__(self, i: int) -> tuple:
+        """Get the i-th fingerprint as a tuple
+            [0] : Timestamp
+            [1] : Direction
+            [2] : Src point
+            [3] : Dst point
+            [4] : Properties
+            [5] : Global identifiers
+            [6] : Local identifiers
+        """
+        return (
+            self.get_ts(i),
+            int(self.dir[i]),
+            self.points.decode(self.src[i]),
+            self.points.decode(self.dst[i]),
+            self.decode_ids(self.get_properties(i)),
+            self.decode_ids(self.get_glob_ids(i)),
+            self.decode_ids(self.get_local_ids(i)))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _get_pairs(self, columnP: tuple, i: int) -> list:
+        offsets, keys, values = columnP
+        o_begin, o_end = offsets[i], offsets[i + 1]
+        return list(zip(keys[o_begin:o_end].tolist(), values[o_begin:o_end].tolist()))
+
+    def _gather_pairs(self, columnP: tuple, itemsP) -> tuple:
+        """Get the pairs of some items of a packed column at once
+
+        Args:
+            columnP (tuple): packed column, (offsets, keys, values)
+            itemsP (:obj:`numpy.ndarray` of int64): indices of the items
+
+        Returns:
+            tuple: (offsets, items, keys, values, twice), pairs of itemsP[n] are in [offsets[n], offsets[n+1]) of keys and values,
+                items the n of each pair, twice the n with a key given more than once
+        """
+        offsets, keys, values = columnP
+        begins = offsets[itemsP]
+        lengths = offsets[itemsP + 1] - begins
+        new_offsets = numpy.zeros(len(itemsP) + 1, dtype=numpy.int64)
+        numpy.cumsum(lengths, out=new_offsets[1:])
+        gather = numpy.repeat(begins - new_offsets[:-1], lengths) + numpy.arange(new_offsets[-1])
+        items = numpy.repeat(numpy.arange(len(itemsP), dtype=numpy.int64), lengths)
+        k = keys[gather]
+        nb_ids = max(len(self.ids), 1)
+        codes = numpy.sort(items * nb_ids + k)
+        twice = set((codes[1:][codes[1:] == codes[:-1]] // nb_ids).tolist())
+        return new_offsets.tolist(), items, k, values[gather], twice
+
+    def _append_ids(self, columnP: tuple, idsP: list):
+        offsets, keys, values = columnP
+        for k, v in idsP:
+            keys.append(self.ids.encode(k))
+            values.append(self.values.encode(v))
+        offsets.append(len(keys))
+
+    def get_ts(self, i: int):
+        """Get the timestamp of the i-th fingerprint, as it is returned in `inputs[i][0]`"""
+        return self.ts_decimal[i] if self.ts_decimal is not None else int(self.ts[i])
+
+    def get_properties(self, i: int) -> dict:
+        """Get the properties of the i-th fingerprint, by codes"""
+        return dict(self._get_pairs(self.properties, i))
+
+    def get_glob_ids(self, i: int) -> dict:
+        """Get the global identifiers of the i-th fingerprint, by codes"""
+        return dict(self._get_pairs(self.glob_ids, i))
+
+    def get_local_ids(self, i: int) -> dict:
+        """Get the local identifiers of the i-th fingerprint, by codes"""
+        lids = local_ids_to_dict(self._get_pairs(self.local_ids, i))
+        if i in self.local_overrides:
+            lids.update(self.local_overrides[i])
+        return lids
+
+    def decode_ids(self, idsP: dict) -> dict:
+        """Decode a dictionnary of identifiers by codes into names and values as strings"""
+        return {
+            self.ids.decode(k): [self.values.decode(e) for e in v] if isinstance(v, list) else self.values.decode(v)
+            for k, v in idsP.items()}
+
+    def append(self, tsP, dirP: int, srcP: str, dstP: str, propertiesP: list, globP: list, localP: list):
+        """Append a fingerprint, identifiers are lists of (name, value)
+        """
+        if self.ts_decimal is not None:
+            self.ts_decimal.append(tsP)
+            tsP = int(tsP.scaleb(TS_UNITS[self.ts_unit]))
+        self.ts.append(tsP)
+        self.dir.append(dirP)
+        self.src.append(self.points.encode(srcP))
+        self.dst.append(self.points.encode(dstP))
+        self._append_ids(self.properties, propertiesP)
+        self._append_ids(self.glob_ids, globP)
+        self._append_ids(self.local_ids, localP)
+
+    def _sort(self, ts, dirs, src, dst, packed: list, keyP=None):
+        """Set the columns sorted by timestamp, keeping the given order for a same timestamp
+
+        The stable sort of numpy is a timsort on int64, it merges the already sorted runs.
+        With `keyP`, a same timestamp is sorted by `keyP` instead
+        """
+        order = numpy.argsort(ts, kind='stable') if keyP is None else numpy.lexsort((keyP, ts))
+        self._gather(order, ts, dirs, src, dst, packed)
+
+    def _gather(self, order, ts, dirs, src, dst, packed: list):
+        """Set the columns to the rows of the given columns in `order`"""
+        self.ts = ts[order]
+        self.dir = dirs[order]
+        self.src = src[order]
+        self.dst = dst[order]
+        if self.ts_decimal is not None:
+            self.ts_decimal = [self.ts_decimal[o] for o in order.tolist()]
+
+        def _sort_packed(columnP: tuple) -> tuple:
+            offsets, keys, values = columnP
+            lengths = numpy.diff(offsets)[order]
+            new_offsets = numpy.zeros(len(order) + 1, dtype=numpy.int64)
+            numpy.cumsum(lengths, out=new_offsets[1:])
+            gather = numpy.repeat(offsets[:-1][order] - new_offsets[:-1], lengths) + numpy.arange(new_offsets[-1])
+            return (new_offsets, keys[gather], values[gather])
+        self.properties, self.glob_ids, self.local_ids = [_sort_packed(c) for c in packed]
+
+    def freeze(self):
+        """Sort fingerprints by timestamp, keeping the order of the log file for a same timestamp,
+        and turn columns into numpy arrays
+        """
+        self._sort(
+            numpy.array(self.ts, dtype=numpy.int64),
+            numpy.array(self.dir, dtype=numpy.uint8),
+            numpy.array(self.src, dtype=numpy.int16),
+            numpy.array(self.dst, dtype=numpy.int16),
+            [(
+                numpy.array(c[0], dtype=numpy.int64),
+                numpy.array(c[1], dtype=numpy.int16),
+                numpy.array(c[2], dtype=numpy.int64)) for c in (self.properties, self.glob_ids, self.local_ids)])
+
+    def load_columns(self, tsP, dirP, srcP, dstP, packedP: list, keyP):
+        """Fill an empty store with columns in any order
+
+        Args:
+            tsP, dirP, srcP, dstP (:obj:`numpy.ndarray`): columns, with codes of this store for points
+            packedP (list): packed properties, global and local identifiers, with codes of this store for identifiers
+            keyP (:obj:`numpy.ndarray`): position in the log file, to sort a same timestamp
+        """
+        self._sort(tsP, dirP, srcP, dstP, packedP, keyP)
+
+    def merge(self, runsP: list):
+        """Fill an empty store with frozen stores, each one sorted by timestamp
+
+        For a same timestamp, fingerprints are kept in the order of `runsP`.
+        Codes of points, identifiers and values are translated to the codes of this store
+
+        Args:
+            runsP (:obj:`list` of :obj:`latseq_inputs`): frozen stores of consecutive parts of a log file
+        """
+        points_maps = [numpy.array([self.points.encode(n) for n in r.points.names], dtype=numpy.int16) for r in runsP]
+        ids_maps = [numpy.array([self.ids.encode(n) for n in r.ids.names], dtype=numpy.int16) for r in runsP]
+        values_maps = [numpy.array([self.values.encode(n) for n in r.values.names], dtype=numpy.int64) for r in runsP]
+        if self.ts_decimal is not None:
+            for r in runsP:
+                self.ts_decimal.extend(r.ts_decimal)
+
+        def _merge_packed(columnsP: list) -> tuple:
+            bases = numpy.cumsum([0] + [len(c[1]) for c in columnsP])
+            return (
+                numpy.concatenate([c[0][:-1] + b for c, b in zip(columnsP, bases)] + [bases[-1:]]).astype(numpy.int64),
+                numpy.concatenate([m[c[1]] for c, m in zip(columnsP, ids_maps)]).astype(numpy.int16),
+                numpy.concatenate([m[c[2]] for c, m in zip(columnsP, values_maps)]).astype(numpy.int64))
+        self._sort(
+            numpy.concatenate([r.ts for r in runsP]).astype(numpy.int64),
+            numpy.concatenate([r.dir for r in runsP]).astype(numpy.uint8),
+            numpy.concatenate([m[r.src] for r, m in zip(runsP, points_maps)]).astype(numpy.int16),
+            numpy.concatenate([m[r.dst] for r, m in zip(runsP, points_maps)]).astype(numpy.int16),
+            [_merge_packed([getattr(r, c) for r in runsP]) for c in ('properties', 'glob_ids', 'local_ids')])
+
+    def take(self, rowsP) -> 'latseq_inputs':
+        """Get a frozen store of some fingerprints, with the codes of this store
+
+        Args:
+            rowsP (:obj:`numpy.ndarray` of int64): sorted indices of the fingerprints to take
+
+        Returns:
+            :obj:`latseq_inputs`: the store of the fingerprints, the i-th one is rowsP[i] in this store
+        """
+        part = latseq_inputs.__new__(latseq_inputs)
+        part.ts_unit = self.ts_unit
+        part.rdtsc = self.rdtsc
+        part.ts_decimal = self.ts_decimal
+        part.points = self.points
+        part.ids = self.ids
+        part.values = self.values
+        part._gather(rowsP, self.ts, self.dir, self.src, self.dst, [self.properties, self.glob_ids, self.local_ids])
+        part.local_overrides = dict()
+        for r, ids in self.local_overrides.items():
+            i = int(numpy.searchsorted(rowsP, r))
+            if i < len(rowsP) and rowsP[i] == r:
+                part.local_overrides[i] = dict(ids)
+        return part
+
+    def convert_rdtsc(self, to_nsP, decimalP: bool = False):
+        """Convert the `ts` column from cycles of the CPU to `ts_unit`
+
+        Args:
+            to_nsP (function): converts a numpy array of cycles to times of day in ns
+            decimalP (bool): fill `ts_decimal` too, with the us precision of converted rdtsc logs
+        """
+        ns = to_nsP(self.ts)
+        if decimalP:
+            us = ns_to_ts(ns, 'us')
+            self.ts_decimal = [decimal.Decimal(u).scaleb(-6) for u in us.tolist()]
+            self.ts = us * 1000
+        else:
+            self.ts = ns_to_ts(ns, self.ts_unit)
+        self.rdtsc = False
+
+    def index(self, inputP: tuple) -> int:
+        """Index of the first fingerprint equal to `inputP`
+
+        Raises:
+            ValueError: `inputP` is not in the store
+        """
+        ts = inputP[0] if self.ts_decimal is None else int(inputP[0].scaleb(TS_UNITS[self.ts_unit]))
+        i = int(numpy.searchsorted(self.ts, ts, side='left'))
+        while i < len(self) and self.ts[i] == ts:
+            if self[i] == inputP:
+                return i
+            i += 1
+        raise ValueError(f"{inputP} is not in inputs")
+
+    def get_timestamps(self) -> list:
+        """Get the list of timestamps, as they are returned in `inputs[i][0]`"""
+        if self.ts_decimal is not None:
+            return list(self.ts_decimal)
+        return self.ts.tolist()
+
+    def set_local_id(self, i: int, idP: int, valueP: int):
+        """Keep only the value code `valueP` for the local identifier code `idP` of the i-th fingerprint"""
+        if i not in self.local_overrides:
+            self.local_overrides[i] = {}
+        self.local_overrides[i][idP] = valueP
+
+    def window(self, beginP: int, tsP: int) -> int:
+        """Index of the first fingerprint from `beginP` whose timestamp is not below `tsP`"""
+        return beginP + int(numpy.searchsorted(self.ts[beginP:], tsP, side='left'))
+
+    def get_columns(self) -> dict:
+        """Get the columns of a frozen store by name, names of points, identifiers and values are packed strings.
+        `local_overrides` are not in the columns, see `set_columns`
+        """
+        columns = {'ts': self.ts, 'dir': self.dir, 'src': self.src, 'dst': self.dst}
+        for name in ('properties', 'glob_ids', 'local_ids'):
+            for i, c in enumerate(getattr(self, name)):
+                columns[f"{name}.{i}"] = c
+        columns['points.0'], columns['points.1'] = pack_strings(self.points.names)
+        columns['ids.0'], columns['ids.1'] = pack_strings(self.ids.names)
+        columns['values.0'], columns['values.1'] = pack_strings(self.values.names)
+        if self.ts_decimal is not None:
+            columns['ts_decimal.0'], columns['ts_decimal.1'] = pack_strings([str(t) for t in self.ts_decimal])
+        return columns
+
+    def set_columns(self, columnsP: dict):
+        """Fill an empty store with the columns of `get_columns`"""
+        self.rdtsc = False
+        self.ts, self.dir, self.src, self.dst = [columnsP[c] for c in ('ts', 'dir', 'src', 'dst')]
+        for name in ('properties', 'glob_ids', 'local_ids'):
+            setattr(self, name, tuple(columnsP[f"{name}.{i}"] for i in range(3)))
+        for name in ('points', 'ids', 'values'):
+            for n in unpack_strings(columnsP[f"{name}.0"], columnsP[f"{name}.1"]):
+                getattr(self, name).encode(n)
+        if 'ts_decimal.0' in columnsP:
+            self.ts_decimal = [decimal.Decimal(t) for t in unpack_strings(columnsP['ts_decimal.0'], columnsP['ts_decimal.1'])]
+        else:
+            self.ts_decimal = None
+
+
+class latseq_journeys:
+    """Columnar store of the journeys rebuilt from the fingerprints of a `latseq_inputs`
+
+    Journeys are appended while they are rebuilt, then `freeze` turns the columns into numpy arrays.
+    `journeys[k]` still returns the former dict of the k-th journey, built on demand:
+    timestamps and segments of its measures are the ones of `inputs`, its uid is k
+
+    Args:
+
+        inputsP (:obj:`latseq_inputs`): fingerprints of the journeys
+
+    Attributes:
+
+        inputs (:obj:`latseq_inputs`): fingerprints of the journeys
+        file (str): log file of the journeys, None until it is given
+        dir (:obj:`numpy.ndarray` of uint8): 0 for Downlink, 1 for Uplink
+        completed (:obj:`numpy.ndarray` of bool): True if the journey is complete, from an in to an out point
+        path (:obj:`numpy.ndarray` of int64): path id according to `latseq_log.paths`, -1 if it is not found
+        candidates (:obj:`dict`): possible paths of a journey whose path is not found, path id : index of the next point,
+            None without paths
+        properties (:obj:`numpy.ndarray` of int64): index in `inputs` of the measure giving its properties to the journey
+        sets (tuple): packed measures, (offsets, rows)
+            sets[0] (:obj:`numpy.ndarray` of int64): measures of the k-th journey are in [offsets[k], offsets[k+1])
+            sets[1] (:obj:`numpy.ndarray` of int64): index of the measure in `inputs`
+        glob (tuple): packed global identifiers, as `latseq_inputs.glob_ids`
+        set_ids (tuple): packed local identifiers matched by the journey, but its uid, as `latseq_inputs.local_ids`
+    """
+    def __init__(self, inputsP: latseq_inputs):
+        self.inputs = inputsP
+        self.file = None
+        self.dir = array.array('B')
+        self.completed = array.array('B')
+        self.path = array.array('q')
+        self.candidates = dict()
+        self.properties = array.array('q')
+        self.sets = (array.array('q', [0]), array.array('q'))
+        self.glob = (array.array('q', [0]), array.array('h'), array.array('q'))
+        self.set_ids = (array.array('q', [0]), array.array('h'), array.array('q'))
+
+    def __len__(self) -> int:
+        return len(self.dir)
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __getitem__(self, k: int) -> dict:
+        """Get the k-th journey as a dict, see `latseq_log.journeys`"""
+        rows = self.get_set(k)
+        points = self.inputs.points
+        res = {
+            'dir': int(self.dir[k]),
+            'glob': self.inputs.decode_ids(self.get_glob_ids(k)),
+            'ts_in': self.inputs.get_ts(rows[0]),
+            'set': [
+                (i, self.inputs.get_ts(i), f"{points.decode(self.inputs.src[i])}--{points.decode(self.inputs.dst[i])}")
+                for i in rows],
+            'set_ids': {'uid': str(k)}}
+        res['set_ids'].update(self.inputs.decode_ids(local_ids_to_dict(self.inputs._get_pairs(self.set_ids, k))))
+        if self.path[k] >= 0:
+            res['path'] = int(self.path[k])
+        elif self.candidates.get(k) is not None:
+            res['path'] = dict(self.candidates[k])
+        res['completed'] = bool(self.completed[k])
+        if res['completed']:
+            res['ts_out'] = self.inputs.get_ts(rows[-1])
+            res['properties'] = self.inputs.decode_ids(self.inputs.get_properties(int(self.properties[k])))
+        res['uid'] = str(k)
+        if self.file is not None:
+            res['file'] = self.file
+        return res
+
+    def values(self):
+        for k in self:
+            yield self[k]
+
+    def items(self):
+        for k in self:
+            yield k, self[k]
+
+    def append(self, journeyP: dict, rowsP: list):
+        """Append a journey, a dict of `latseq_log._rebuild_journeys` by codes
+
+        Args:
+            journeyP (:obj:`dict`): the journey, 'path' is its path id or the dict of its candidate paths
+            rowsP (:obj:`list` of int): index in `inputs` of its measures
+        """
+        self.dir.append(journeyP['dir'])
+        self.completed.append(journeyP['completed'])
+        if isinstance(journeyP.get('path'), int):
+            self.path.append(journeyP['path'])
+        else:
+            self.candidates[len(self.path)] = journeyP.get('path')
+            self.path.append(-1)
+        self.properties.append(journeyP.get('properties', rowsP[-1]))
+        self.sets[1].extend(rowsP)
+        self.sets[0].append(len(self.sets[1]))
+        for column, ids in ((self.glob, journeyP['glob']), (self.set_ids, journeyP['set_ids'])):
+            offsets, keys, values = column
+            for k, v in ids.items():
+                for e in (v if isinstance(v, list) else (v,)):  # multiple values as in `latseq_inputs.local_ids`
+                    keys.append(k)
+                    values.append(e)
+            offsets.append(len(keys))
+
+    def freeze(self):
+        """Turn columns into numpy arrays"""
+        self.dir = numpy.array(self.dir, dtype=numpy.uint8)
+        self.completed = numpy.array(self.completed, dtype=bool)
+        self.path = numpy.array(self.path, dtype=numpy.int64)
+        self.properties = numpy.array(self.properties, dtype=numpy.int64)
+        self.sets = (numpy.array(self.sets[0], dtype=numpy.int64), numpy.array(self.sets[1], dtype=numpy.int64))
+        self.glob, self.set_ids = [(
+            numpy.array(c[0], dtype=numpy.int64),
+            numpy.array(c[1], dtype=numpy.int16),
+            numpy.array(c[2], dtype=numpy.int64)) for c in (self.glob, self.set_ids)]
+        return self
+
+    def merge(self, runsP: list):
+        """Fill an empty store with the journeys of frozen stores, sorted by their input measure
+
+        For a same input measure, journeys are kept in the order of `runsP` then in their order in the store.
+        Stores have the codes of `inputs`
+
+        Args:
+            runsP (:obj:`list` of tuple): (store, ids of the journeys to take, None for all of them,
+                index in `inputs` of the fingerprints of the store, None if it is `inputs`)
+        """
+        runs = []
+        for store, ks, rows in runsP:
+            ks = numpy.arange(len(store), dtype=numpy.int64) if ks is None else numpy.asarray(ks, dtype=numpy.int64)
+            set_rows = store.sets[1] if rows is None else rows[store.sets[1]]
+            runs.append((store, ks, set_rows))
+
+        def _gather_packed(columnsP: list) -> tuple:
+            offsets = [c[0][ks] for c, (_, ks, _) in zip(columnsP, runs)]
+            lengths = numpy.concatenate([c[0][ks + 1] - o for c, o, (_, ks, _) in zip(columnsP, offsets, runs)]).astype(numpy.int64)
+            bases = numpy.cumsum([0] + [len(c[1]) for c in columnsP])
+            begins = numpy.concatenate([o + b for o, b in zip(offsets, bases)]).astype(numpy.int64)[order]
+            lengths = lengths[order]
+            new_offsets = numpy.zeros(len(order) + 1, dtype=numpy.int64)
+            numpy.cumsum(lengths, out=new_offsets[1:])
+            gather = numpy.repeat(begins - new_offsets[:-1], lengths) + numpy.arange(new_offsets[-1])
+            return (new_offsets,) + tuple(numpy.concatenate([c[i] for c in columnsP])[gather] for i in range(1, len(columnsP[0])))
+        firsts = numpy.concatenate([set_rows[store.sets[0][ks]] for store, ks, set_rows in runs]).astype(numpy.int64)
+        order = numpy.argsort(firsts, kind='stable')
+        self.dir = numpy.concatenate([store.dir[ks] for store, ks, _ in runs]).astype(numpy.uint8)[order]
+        self.completed = numpy.concatenate([store.completed[ks] for store, ks, _ in runs]).astype(bool)[order]
+        self.path = numpy.concatenate([store.path[ks] for store, ks, _ in runs]).astype(numpy.int64)[order]
+        self.properties = numpy.concatenate([
+            store.properties[ks] if rows is None else rows[store.properties[ks]]
+            for (store, ks, _), (_, _, rows) in zip(runs, runsP)]).astype(numpy.int64)[order]
+        position = numpy.empty(len(order), dtype=numpy.int64)
+        position[order] = numpy.arange(len(order))
+        self.candidates = {}
+        base = 0
+        for store, ks, _ in runs:
+            for i, k in enumerate(ks.tolist()):
+                if k in store.candidates:
+                    self.candidates[int(position[base + i])] = store.candidates[k]
+            base += len(ks)
+        self.sets = _gather_packed([(store.sets[0], set_rows) for store, _, set_rows in runs])
+        self.glob = _gather_packed([store.glob for store, _, _ in runs])
+        self.set_ids = _gather_packed([store.set_ids for store, _, _ in runs])
+        return self
+
+    def get_set(self, k: int) -> list:
+        """Get the index in `inputs` of the measures of the k-th journey"""
+        return self.sets[1][self.sets[0][k]:self.sets[0][k + 1]].tolist()
+
+    def get_glob_ids(self, k: int) -> dict:
+        """Get the global identifiers of the k-th journey, by codes"""
+        return dict(self.inputs._get_pairs(self.glob, k))
+
+    def get_columns(self) -> dict:
+        """Get the columns of a frozen store by name, without `candidates` and `file`, see `set_columns`"""
+        columns = {'dir': self.dir, 'completed': self.completed, 'path': self.path, 'properties': self.properties}
+        for name in ('sets', 'glob', 'set_ids'):
+            for i, c in enumerate(getattr(self, name)):
+                columns[f"{name}.{i}"] = c
+        return columns
+
+    def set_columns(self, columnsP: dict):
+        """Fill an empty store with the columns of `get_columns`"""
+        self.dir, self.completed, self.path, self.properties = [columnsP[c] for c in ('dir', 'completed', 'path', 'properties')]
+        self.sets = (columnsP['sets.0'], columnsP['sets.1'])
+        self.glob = tuple(columnsP[f"glob.{i}"] for i in range(3))
+        self.set_ids = tuple(columnsP[f"set_ids.{i}"] for i in range(3))
+
+
+class latseq_cache:
+    """Cache of the stages of the analysis of a log file, in a directory next to it
+
+    A stage, see `STAGES`, is saved in the directory `<stage>.<key>`, a .npy file by column
+    read as a memory map, and a pickle file of its small attributes. Its key is a hash of the content of the log file,
+    of the parameters of the stage and of the key of the previous stage: a stage whose log file or parameters changed
+    is not found, and is rebuilt. Only the last key of a stage is kept
+
+    Args:
+
+        logpathP (str): path to the log file
+
+    Attributes:
+
+        logpath (str): path to the log file
+        path (str): the cache directory, the log file with .cache instead of .lseq
+        digest (str): hash of the content of the log file, computed at the first `key`
+    """
+    def __init__(self, logpathP: str):
+        self.logpath = logpathP
+        self.path = re.sub(r"\.lseq$", "", rdtsctots.strip_compression(logpathP)) + ".cache"
+        self.digest = None
+
+    def key(self, stageP: str, paramsP: tuple) -> str:
+        """Get the key of a stage from its parameters"""
+        if self.digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            with open(self.logpath, 'rb') as f:
+                for chunk in iter(lambda: f.read(LOG_CHUNK_SIZE), b''):
+                    h.update(chunk)
+            self.digest = h.hexdigest()
+        return hashlib.blake2b(f"{self.digest} {stageP} {paramsP!r}".encode(), digest_size=16).hexdigest()
+
+    def has(self, stageP: str, keyP: str) -> bool:
+        return os.path.isdir(os.path.join(self.path, f"{stageP}.{keyP}"))
+
+    def load(self, stageP: str, keyP: str) -> tuple:
+        """Load a stage
+
+        Returns:
+            tuple: (:obj:`dict` of the columns by name, small attributes)
+        """
+        stage_path = os.path.join(self.path, f"{stageP}.{keyP}")
+        columns = {
+            f[:-len('.npy')]: numpy.load(os.path.join(stage_path, f), mmap_mode='c').view(numpy.ndarray)
+            for f in os.listdir(stage_path) if f.endswith('.npy')}
+        with open(os.path.join(stage_path, 'meta.pkl'), 'rb') as fin:
+            meta = pickle.load(fin)
+        return columns, meta
+
+    def save(self, stageP: str, keyP: str, columnsP: dict, metaP):
+        """Save a stage, in place of the former one
+
+        Args:
+            columnsP (:obj:`dict`): numpy arrays by name
+            metaP: small attributes, pickled
+        """
+        tmp_path = os.path.join(self.path, f"{stageP}.{keyP}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, c in columnsP.items():
+            numpy.save(os.path.join(tmp_path, f"{name}.npy"), numpy.asarray(c))
+        with open(os.path.join(tmp_path, 'meta.pkl'), 'wb') as fout:
+            pickle.dump(metaP, fout, pickle.HIGHEST_PROTOCOL)
+        for f in os.listdir(self.path):  # a stage has one key
+            if f.startswith(f"{stageP}.") and not f.endswith('.tmp'):
+                shutil.rmtree(os.path.join(self.path, f), ignore_errors=True)
+        os.rename(tmp_path, os.path.join(self.path, f"{stageP}.{keyP}"))
+
+    def clear(self):
+        """Remove all the stages"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class latseq_db:
+    """SQLite store of the analysis of a log file, to query journeys without the log file
+
+    The completed journeys, their measures, the fingerprints and the information lines are written by `store`
+    with bulk inserts in one transaction, then indexed.
+    Timestamps are integers in the unit of the 'ts_unit' of the table meta, 'ns' for Decimal timestamps.
+        meta (key, value): 'ts_unit', 'logpath'
+        segments (id, src, dst): the segments of the fingerprints
+        fingerprints (id, ts, dir, segment, line): the fingerprints, id is their index in `latseq_log.inputs`,
+            line the one of `latseq_log.yield_clean_inputs`
+        journeys (uid, dir, path, ts_in, ts_out, json): the completed journeys, json the one of `latseq_log.yield_journeys_json`
+        journey_ids (journey, name, value): the global identifiers of the journeys
+        hops (journey, hop, input, ts, segment): the measures of the journeys, input is the id of the fingerprint
+        infos (ts, point, name, value): the information lines, as `latseq_log.yield_out_metadata`
+
+    Args:
+
+        pathP (str): path to the database file
+
+    Attributes:
+
+        path (str): path to the database file
+    """
+    SCHEMA = [
+        "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)",
+        "CREATE TABLE segments (id INTEGER PRIMARY KEY, src TEXT, dst TEXT)",
+        "CREATE TABLE fingerprints (id INTEGER PRIMARY KEY, ts INTEGER, dir INTEGER, segment INTEGER, line TEXT)",
+        "CREATE TABLE journeys (uid INTEGER PRIMARY KEY, dir INTEGER, path INTEGER, ts_in INTEGER, ts_out INTEGER, json TEXT)",
+        "CREATE TABLE journey_ids (journey INTEGER, name TEXT, value TEXT)",
+        "CREATE TABLE hops (journey INTEGER, hop INTEGER, input INTEGER, ts INTEGER, segment INTEGER, PRIMARY KEY (journey, hop)) WITHOUT ROWID",
+        "CREATE TABLE infos (ts INTEGER, point TEXT, name TEXT, value TEXT)"]
+    INDEXES = [  # created once the tables are filled
+        "CREATE INDEX fingerprints_ts ON fingerprints (ts)",
+        "CREATE INDEX journeys_ts_in ON journeys (ts_in)",
+        "CREATE INDEX journey_ids_value ON journey_ids (name, value, journey)",
+        "CREATE INDEX hops_segment ON hops (segment, journey)",
+        "CREATE INDEX hops_ts ON hops (ts)",
+        "CREATE INDEX infos_ts ON infos (ts)",
+        "CREATE INDEX infos_point ON infos (point, ts)"]
+
+    def __init__(self, pathP: str):
+        self.path = pathP
+
+    def store(self, lseqP: 'latseq_log'):
+        """Write the analysis of a log file to a new database, in place of the former one
+
+        Args:
+            lseqP (:obj:`latseq_log`): the analysis, its journeys are rebuilt if they are not yet
+
+        Raises:
+            sqlite3.Error: Error at writing the database
+        """
+        def _batches(rowsP):
+            """Insert the rows by `DB_BATCH_SIZE`, the generators are not copied to a list"""
+            while True:
+                batch = list(itertools.islice(rowsP, DB_BATCH_SIZE))
+                if not batch:
+                    return
+                yield batch
+
+        def _journeys_rows():
+            for k, j in zip(numpy.flatnonzero(completed).tolist(), lseqP.yield_journeys_json()):
+                for code, value in journeys.get_glob_ids(k).items():
+                    ids.append((k, inputs.ids.decode(code), inputs.values.decode(value)))
+                yield (k, dirs[k], paths[k], ts_list[rows_list[offsets_list[k]]], ts_list[rows_list[offsets_list[k + 1] - 1]], j)
+
+        def _infos_rows():
+            for i in lseqP.infos:
+                tmp_ts = int(i[0].scaleb(TS_UNITS[inputs.ts_unit])) if lseqP.ts_unit == 'decimal' else i[0]
+                for name, value in i[2].items():
+                    yield (tmp_ts, '.'.join(i[1]), name, value)
+
+        inputs = lseqP.inputs
+        journeys = lseqP.journeys  # rebuilt at the first access
+        offsets, rows = [numpy.asarray(c, dtype=numpy.int64) for c in journeys.sets]
+        ts = numpy.asarray(inputs.ts, dtype=numpy.int64)
+        completed = numpy.asarray(journeys.completed, dtype=bool)
+        nb_points = len(inputs.points)
+        # segments by pair of points
+        pairs, segments = numpy.unique(
+            numpy.asarray(inputs.src, dtype=numpy.int64) * nb_points + numpy.asarray(inputs.dst, dtype=numpy.int64),
+            return_inverse=True)
+        hops = numpy.flatnonzero(numpy.repeat(completed, numpy.diff(offsets)))  # measures of the completed journeys
+        hop_journeys = numpy.repeat(numpy.arange(len(journeys), dtype=numpy.int64), numpy.diff(offsets))[hops]
+        paths = numpy.asarray(journeys.path, dtype=numpy.int64).tolist()
+        dirs = numpy.asarray(journeys.dir).tolist()
+        ts_list = ts.tolist()
+        rows_list = rows.tolist()
+        offsets_list = offsets.tolist()
+        tmp_path = f"{self.path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        con = sqlite3.connect(tmp_path)
+        try:
+            con.execute("PRAGMA journal_mode = OFF")  # a new file, replaced only once it is complete
+            con.execute("PRAGMA synchronous = OFF")
+            with con:  # one transaction
+                for statement in latseq_db.SCHEMA:
+                    con.execute(statement)
+                con.executemany("INSERT INTO meta VALUES (?, ?)", [('ts_unit', inputs.ts_unit), ('logpath', lseqP.logpath)])
+                con.executemany("INSERT INTO segments VALUES (?, ?, ?)", [
+                    (s, inputs.points.decode(p // nb_points), inputs.points.decode(p % nb_points)) for s, p in enumerate(pairs.tolist())])
+                fingerprints = zip(
+                    itertools.count(), ts_list, numpy.asarray(inputs.dir).tolist(), segments.tolist(), lseqP.yield_clean_inputs())
+                for batch in _batches(fingerprints):
+                    con.executemany("INSERT INTO fingerprints VALUES (?, ?, ?, ?, ?)", batch)
+                ids = list()
+                for batch in _batches(_journeys_rows()):
+                    con.executemany("INSERT INTO journeys VALUES (?, ?, ?, ?, ?, ?)", batch)
+                con.executemany("INSERT INTO journey_ids VALUES (?, ?, ?)", ids)
+                hops_rows = zip(
+                    hop_journeys.tolist(),
+                    (hops - offsets[hop_journeys]).tolist(),
+                    rows[hops].tolist(),
+                    ts[rows[hops]].tolist(),
+                    segments[rows[hops]].tolist())
+                for batch in _batches(hops_rows):
+                    con.executemany("INSERT INTO hops VALUES (?, ?, ?, ?, ?)", batch)
+                for batch in _batches(_infos_rows()):
+                    con.executemany("INSERT INTO infos VALUES (?, ?, ?, ?)", batch)
+                for statement in latseq_db.INDEXES:
+                    con.execute(statement)
+        finally:
+            con.close()
+        os.replace(tmp_path, self.path)
+
+    def query(self, idsP: dict = None, beginP: str = None, endP: str = None, pointP: str = None):
+        """Yield the completed journeys matching all the filters, by uid
+
+        Args:
+            idsP (:obj:`dict`): values of global identifiers by name, e.g. {'rnti': '58106'}
+            beginP (str): the journeys beginning from this time of day in seconds
+            endP (str): the journeys beginning until this time of day in seconds
+            pointP (str): the journeys through a point, or a segment 'src--dst'
+
+        Yields:
+            str: the json of a journey, as `latseq_log.yield_journeys`
+
+        Raises:
+            IOError: no database at `path`
+        """
+        if not os.path.exists(self.path):
+            raise IOError(f"{self.path} not found, first store the journeys with --sqlite")
+        con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            unit = con.execute("SELECT value FROM meta WHERE key = 'ts_unit'").fetchone()[0]
+            where = list()
+            params = list()
+            if beginP is not None:
+                where.append("ts_in >= ?")
+                params.append(str_to_ts(beginP, unit))
+            if endP is not None:
+                where.append("ts_in <= ?")
+                params.append(str_to_ts(endP, unit))
+            for name, value in (idsP or {}).items():
+                where.append("uid IN (SELECT journey FROM journey_ids WHERE name = ? AND value = ?)")
+                params.extend([name, value])
+            if pointP is not None:
+                src, _, dst = pointP.partition('--')
+                if dst:
+                    segments = "SELECT id FROM segments WHERE src = ? AND dst = ?"
+                    params.extend([src, dst])
+                else:
+                    segments = "SELECT id FROM segments WHERE src = ? OR dst = ?"
+                    params.extend([src, src])
+                where.append(f"uid IN (SELECT journey FROM hops WHERE segment IN ({segments}))")
+            statement = "SELECT json FROM journeys"
+            if where:
+                statement += " WHERE " + " AND ".join(where)
+            for (j,) in con.execute(statement + " ORDER BY uid", params):
+                yield j
+        finally:
+            con.close()
+
+
 class latseq_log:
     """class for log processing associated to a log file
 
     Args:
 
         logpathP (str): path to the log file
+        ts_unitP (str): representation of timestamps, one of `TS_UNITS`
+        jobsP (int): number of processes to parse the log file and to rebuild the journeys
+        splitP (str): how journeys are rebuilt by the processes, one of `SPLITS`
 
     Attributes:
 
         logpath (str): path to the log file
+        ts_unit (str): 'decimal' for Decimal timestamps, 'us' or 'ns' for integer timestamps
+        jobs (int): number of processes to parse the log file and to rebuild the journeys, 1 to do it in this process
+        split (str): 'context' to rebuild journeys by global context, 'time' by time shards, with more than one `jobs`
+        windows (:obj:`dict`): adaptive search window in seconds of the next hop by point, see `learn_windows`,
+            None to search the next hop of every journey in `DURATION_TO_SEARCH_PKT`
+        cache (:obj:`latseq_cache`): stages of the analysis, an attribute of a stage is loaded from it when it is missing
+        timings (:obj:`dict`): seconds spent to load or to build each stage, without the stages it depends on
+        building (:obj:`list` of str): the stages being built, with the stages they depend on
+        compressed (bool): the log file is compressed, one of `rdtsctots.COMPRESSIONS`
+        binary (bool): the log file is made of the fixed size records of a collector compiled with -DLATSEQ_BINARY
+        rdtsc (bool): the log file has raw rdtsc timestamps, converted while it is parsed
         initialized (bool): become true when __init__ is successfully done
-        raw_inputs (:obj:`list` of :obj:`str`): list of lines from logpath file
-        raw_infos (:obj:`list` of :obj:`str`): list of lines from logpath
-        inputs (:obj:`list` of :obj:`list`): list of lines after a first pass
-            of processing from raw_inputs
+
+    The attributes below are computed on first access by the stages of `STAGES`, with the stages they depend on
+        syncs (:obj:`list` of tuple): (cycles, time of day) of the synchronisation lines of a raw rdtsc log file
+        nb_raw_inputs (int): number of fingerprints read from logpath file
+        inputs (:obj:`latseq_inputs`): columnar store of lines after a first pass
+            of processing from logpath file, read by blocks
                 inputs[i][0] : Timestamp
                 inputs[i][1] : Direction
                 inputs[i][2] : Src point
@@ -158,6 +1269,7 @@ class latseq_log:
                 infos[i][2] : Properties
                 infos[i][3] : Context identifiers
         dataids (:obj:`list` of :obj:`str`): list of dataids found in the logs
+        edges (:obj:`dict`): first occurrence and count of each (src point, dst point, direction)
         points (:obj:`dict` of :obj:`list`): list of points
             points[i] (:obj:`dict`): a point
                 points[i]['dir'] (:obj:`list` of int): list of direction where this point can be found
@@ -173,21 +1285,21 @@ class latseq_log:
                 list[0][i] : ordered list of points' name
             list[1] is a list of all UpLink paths possibles
         timestamps (:obj:`list` of float): list of timestamps in the logs
-        journeys (:obj:`dict`): the dictionnary containing journeys
-            journeys[i] (:obj:`dict`): a journey
+        journeys (:obj:`latseq_journeys`): the journeys
+            journeys[i] (:obj:`dict`): a journey, built on demand
                 journeys[i]['dir'] (int): 0 if a Downlink journey, 1 otherwise
                 journeys[i]['glob'] (:obj:`dict`): the globals context ids to match necessary
                 journeys[i]['completed'] (bool): True if the journey is compete, e.g. journey from an in to an out point
                 journeys[i]['ts_in'] (float): timestamp at which the journey begins
                 journeys[i]['ts_out'] (float): timestamp at which the journey ends if `completed`
-                journeys[i]['next_points'] (:obj:`list`): the next points' identifier expected
+                journeys[i]['properties'] (:obj:`dict`): properties of its last measure if `completed`
                 journeys[i]['set'] (:obj:`list` of :obj:`tuple`): list of measures 
                     journeys[i]['set'][s][0] (int): corresponding id in `input`
                     journeys[i]['set'][s][1] (float): timestamp
                     journeys[i]['set'][s][2] (string): segment
                 journeys[i]['set_ids'] (:obj:`list`): the last measurement point identifier added
                 journeys[i]['path'] (int): the path id according to self.paths
-        out_journeys (:obj:`list`): the list of measurements like `raw_inputs` but ordered, filtered and with unique identifier (uid) by journey
+        out_journeys (:obj:`list`): the list of measurements like `inputs` but ordered, filtered and with unique identifier (uid) by journey
             out_journeys[o] : a log line of out_journeys = a log line from input (if input is present in a journey)
                 out_journeys[o][0] (Decimal): timestamp
                 out_journeys[o][1] (char): direction, U/D
@@ -195,114 +1307,764 @@ class latseq_log:
                 out_journeys[o][3] (str): properties
                 out_journeys[o][4] (str): data identifier with journey id(s) associated to this measurement
     """
-    def __init__(self, logpathP: str):
+    def __init__(self, logpathP: str, ts_unitP: str = TS_UNIT, jobsP: int = 1, splitP: str = SPLITS[0]):
         self.logpath = logpathP
+        self.ts_unit = ts_unitP
+        self.jobs = jobsP
+        self.split = splitP
+        self.windows = None
         self.initialized = False
         # Open and Read the logpath file
         if not self.logpath:
             raise AssertionError("Error, no logpath provided")
         try:
-            self.raw_inputs = list()
-            self.raw_infos = list()
-            self._read_log()
+            self.compressed = rdtsctots.get_compression(self.logpath) is not None
+            self.binary = self._is_binary_log()
+            self.rdtsc = self.binary or self._is_rdtsc_log()
         except FileNotFoundError:
             raise FileNotFoundError(f"Error, {logpathP} not found")
         except IOError:
             raise IOError(f"Error at Reading {logpathP}")
+        # The stages are loaded from the cache of a former analysis of the same file, or built, when they are used
+        self.cache = latseq_cache(self.logpath)
+        self.timings = dict()
+        self.building = list()
+        # Returns
+        self.initialized = True
+        return
+
+    def __getattr__(self, nameP: str):
+        """Get the missing attribute of a stage, loaded from `cache` or built, see `STAGES`
+
+        A part of a latseq_log, not initialized, has only the attributes it is given
+        """
+        for stage, names in STAGES.items():
+            if nameP in names:
+                if self.__dict__.get('initialized'):
+                    self._get_stage(stage)
+                    if nameP in self.__dict__:
+                        return self.__dict__[nameP]
+                break
+        raise AttributeError(f"'latseq_log' object has no attribute '{nameP}'")
+
+    def _get_stage(self, stageP: str):
+        """Load a stage from `cache`, or build it and save it to `cache`
+
+        The stages it depends on are got when the stage uses them, and saved before it.
+        The time spent by the stage, without them, is logged and kept in `timings`
+        """
+        begin = time.perf_counter()
+        nested = sum(self.timings.values())  # time of the stages got by this one
+        if self._load_stage(stageP):
+            action = f"loaded from {self.cache.path}"
         else:
-            # Filter raw_inputs to fill inputs
-            try:
-                self.inputs = list()
-                self.infos = list()
-                self.dataids = list()
-                self._clean_log()
-            except Exception:
-                raise ValueError(f"Error in Cleaning or Filtering {logpathP}")
-        # Build points
+            self._build_stage(stageP)
+            self.store_object()
+            action = "built"
+        self.timings[stageP] = time.perf_counter() - begin - (sum(self.timings.values()) - nested)
+        logging.info(f"latseq_log._get_stage() : {stageP} {action} in {self.timings[stageP]:.3f}s")
+
+    def _build_stage(self, stageP: str):
+        """Build the attributes of a stage, see `STAGES`
+
+        Raises:
+            FileNotFoundError, IOError : Error at reading `logpath`
+            ValueError : Error at cleaning the log file
+            Exception : Error at getting points
+        """
+        self.building.append(stageP)  # its attributes are not saved by `store_object` until it is built
         try:
-            self.points = dict()  # the couple (key, "next") is basically a graph
-            self.pointsInD = KWS_IN_D
-            self.pointsOutD = KWS_OUT_D
-            self.pointsInU = KWS_IN_U
-            self.pointsOutU = KWS_OUT_U
-            self._build_points()
-        except Exception:
-            raise Exception("Error at getting points")
-        else:
-            # Build paths
-            try:
+            if stageP == 'infos':
+                self._scan_infos()
+            elif stageP == 'inputs':
+                # Read the logpath file and filter its lines to fill inputs in one pass
+                try:
+                    self.nb_raw_inputs = 0
+                    self.syncs = list()
+                    self.inputs = latseq_inputs(self.ts_unit, self.rdtsc)
+                    self.infos = list()
+                    self.dataids = list()
+                    self.edges = dict()
+                    self._clean_log()
+                except FileNotFoundError:
+                    raise FileNotFoundError(f"Error, {self.logpath} not found")
+                except IOError:
+                    raise IOError(f"Error at Reading {self.logpath}")
+                except Exception:
+                    raise ValueError(f"Error in Cleaning or Filtering {self.logpath}")
+                # Build timestamps
+                self.timestamps = list()
+                self._build_timestamp()
+            elif stageP == 'points':
+                try:
+                    self.points = dict()  # the couple (key, "next") is basically a graph
+                    self.pointsInD = KWS_IN_D
+                    self.pointsOutD = KWS_OUT_D
+                    self.pointsInU = KWS_IN_U
+                    self.pointsOutU = KWS_OUT_U
+                    self._build_points()
+                except Exception:
+                    raise Exception("Error at getting points")
+            elif stageP == 'paths':
                 self.paths = [[], []]
                 self._build_paths()
-            except Exception as e:
-                raise e
-        # Build timestamps
-        self.timestamps = list()
-        self._build_timestamp()
-        # Returns
-        self.initialized = True
-        return
+            elif stageP == 'journeys':
+                self._build_journeys()
+            else:  # out_journeys
+                self._build_out_journeys()
+        finally:
+            self.building.remove(stageP)
+
+    def _get_stage_key(self, stageP: str) -> str:
+        """Get the key of a stage in `cache`, from the parameters of the analysis up to this stage"""
+        params = {
+            'infos': (CACHE_VERSION, self.ts_unit),
+            'inputs': (),
+            'points': (KWS_IN_D, KWS_OUT_D, KWS_IN_U, KWS_OUT_U),
+            'paths': (MAX_PATHS,),
+            'journeys': (DURATION_TO_SEARCH_PKT, DURATION_TO_SEARCH_FORKS, sorted((self.__dict__.get('windows') or {}).items())),
+            'out_journeys': ()}
+        key = None
+        for stage in STAGES:
+            key = self.cache.key(stage, (key, params[stage]))
+            if stage == stageP:
+                return key
+
+    def _load_stage(self, stageP: str) -> bool:
+        """Load the attributes of a stage from `cache`
 
-    def _read_file(self):
-        """Read the content of the file pointed by `logpath`
+        Points get the 'duration' of the out_journeys stage, and inputs the local ids kept by the journeys stage,
+        if it is in the cache
 
         Returns:
-            str: the content of the log file
+            bool: False if the stage is not in the cache
+        """
+        key = self._get_stage_key(stageP)
+        if not self.cache.has(stageP, key):
+            return False
+        try:
+            columns, meta = self.cache.load(stageP, key)
+        except (IOError, ValueError, pickle.UnpicklingError) as e:
+            logging.warning(f"latseq_log._load_stage() : {stageP} of {self.cache.path}, {e}")
+            return False
+        if stageP == 'inputs':
+            self.__dict__.update(meta)
+            inputs = latseq_inputs(self.ts_unit)
+            inputs.set_columns(columns)
+            self.inputs = inputs
+            self._build_timestamp()
+            if self.cache.has('journeys', self._get_stage_key('journeys')):  # values kept by the rebuild
+                inputs.local_overrides = self.cache.load('journeys', self._get_stage_key('journeys'))[1]['local_overrides']
+        elif stageP in ('infos', 'paths'):
+            self.__dict__.update(meta)
+        elif stageP == 'points':
+            self.__dict__.update(meta)
+            if self.cache.has('out_journeys', self._get_stage_key('out_journeys')):
+                self._set_durations(self.cache.load('out_journeys', self._get_stage_key('out_journeys'))[0])
+        elif stageP == 'journeys':
+            journeys = latseq_journeys(self.inputs)
+            journeys.set_columns(columns)
+            journeys.candidates = meta['candidates']
+            journeys.file = meta['file']
+            self.inputs.local_overrides = meta['local_overrides']
+            self.journeys = journeys
+        else:  # out_journeys
+            ts = columns['ts'].tolist() if 'ts' in columns else [
+                decimal.Decimal(t) for t in unpack_strings(columns['ts.0'], columns['ts.1'])]
+            dirs = columns['dir'].tolist()
+            segments = unpack_strings(columns['segment.0'], columns['segment.1'])
+            data = unpack_strings(columns['data.0'], columns['data.1'])
+            offsets, keys, values = [columns[f"properties.{i}"].tolist() for i in range(3)]
+            names = self.inputs.ids.names
+            values_names = self.inputs.values.names
+            self.out_journeys = [[
+                ts[o],
+                'D' if dirs[o] == 0 else 'U',
+                segments[o],
+                {names[k]: values_names[v] for k, v in zip(keys[offsets[o]:offsets[o + 1]], values[offsets[o]:offsets[o + 1]])},
+                data[o]] for o in range(len(dirs))]
+        return True
+
+    def _save_stage(self, stageP: str, keyP: str):
+        """Save the attributes of a stage to `cache`, see `_load_stage`
+
+        Columns of a store are saved as they are, the small attributes are pickled.
+        'duration' of points, computed with out_journeys, are saved in the out_journeys stage
+        """
+        columns = dict()
+        if stageP == 'inputs':
+            columns = self.inputs.get_columns()
+            meta = {n: getattr(self, n) for n in STAGES[stageP] if n not in ('inputs', 'timestamps')}
+        elif stageP in ('infos', 'paths'):
+            meta = {n: getattr(self, n) for n in STAGES[stageP]}
+        elif stageP == 'points':
+            meta = {n: getattr(self, n) for n in STAGES[stageP] if n != 'points'}
+            meta['points'] = {p: {k: v for k, v in d.items() if k != 'duration'} for p, d in self.points.items()}
+        elif stageP == 'journeys':
+            columns = self.journeys.get_columns()
+            meta = {'candidates': self.journeys.candidates, 'file': self.journeys.file, 'local_overrides': self.inputs.local_overrides}
+        else:  # out_journeys
+            meta = None
+            if self.ts_unit == 'decimal':
+                columns['ts.0'], columns['ts.1'] = pack_strings([str(o[0]) for o in self.out_journeys])
+            else:
+                columns['ts'] = numpy.array([o[0] for o in self.out_journeys], dtype=numpy.int64)
+            columns['dir'] = numpy.array([0 if o[1] == 'D' else 1 for o in self.out_journeys], dtype=numpy.uint8)
+            columns['segment.0'], columns['segment.1'] = pack_strings([o[2] for o in self.out_journeys])
+            columns['data.0'], columns['data.1'] = pack_strings([o[4] for o in self.out_journeys])
+            codes = self.inputs.ids.codes
+            columns['properties.0'] = numpy.zeros(len(self.out_journeys) + 1, dtype=numpy.int64)
+            numpy.cumsum([len(o[3]) for o in self.out_journeys], out=columns['properties.0'][1:])
+            columns['properties.1'] = numpy.array([codes[k] for o in self.out_journeys for k in o[3]], dtype=numpy.int16)
+            values_codes = self.inputs.values.codes
+            columns['properties.2'] = numpy.array([values_codes[v] for o in self.out_journeys for v in o[3].values()], dtype=numpy.int64)
+            # duration of the points, by uid
+            names = [p for p in self.points if 'duration' in self.points[p]]
+            columns['duration.points.0'], columns['duration.points.1'] = pack_strings(names)
+            columns['duration.counts'] = numpy.array([len(self.points[p]['duration']) for p in names], dtype=numpy.int64)
+            columns['duration.uid'] = numpy.array([int(u) for p in names for u in self.points[p]['duration']], dtype=numpy.int64)
+            values = [v for p in names for v in self.points[p]['duration'].values()]
+            if self.ts_unit == 'decimal':
+                columns['duration.value.0'], columns['duration.value.1'] = pack_strings([str(v) for v in values])
+            else:
+                columns['duration.value'] = numpy.array(values, dtype=numpy.int64)
+        self.cache.save(stageP, keyP, columns, meta)
+
+    def _set_durations(self, columnsP: dict):
+        """Set the 'duration' of points from the columns of the out_journeys stage, see `_save_stage`"""
+        names = unpack_strings(columnsP['duration.points.0'], columnsP['duration.points.1'])
+        uids = columnsP['duration.uid'].tolist()
+        values = columnsP['duration.value'].tolist() if 'duration.value' in columnsP else [
+            decimal.Decimal(v) for v in unpack_strings(columnsP['duration.value.0'], columnsP['duration.value.1'])]
+        begin = 0
+        for p, count in zip(names, columnsP['duration.counts'].tolist()):
+            self.points[p]['duration'] = {str(u): v for u, v in zip(uids[begin:begin + count], values[begin:begin + count])}
+            begin += count
+
+    def _read_file(self, rangeP: tuple = None):
+        """Read the file pointed by `logpath` by blocks of `LOG_CHUNK_SIZE`
+
+        Only one block and the current unterminated line are kept in memory.
+
+        Args:
+            rangeP (tuple): (begin, end) range of bytes to read, aligned on lines. The whole file by default
+
+        Yields:
+            str: a line of the log file, without its newline
 
         Raises:
             IOError: error at opening the log file
         """
+        if rangeP is not None:
+            yield from self._read_file_range(rangeP)
+            return
+        if self.compressed:
+            yield from self._read_compressed_file()
+            return
         try:
-            with open(self.logpath, 'r') as f:
-                logging.info(f"latseq_log._read_file() : Reading {self.logpath} ...")
-                return f.read()
+            f = open(self.logpath, 'r')
         except IOError:
             raise IOError(f"error at opening ({self.logpath})")
+        with f:
+            logging.info(f"latseq_log._read_file() : Reading {self.logpath} ...")
+            remainder = ""
+            chunk = f.read(LOG_CHUNK_SIZE)
+            while chunk:
+                lines = (remainder + chunk).split('\n')
+                remainder = lines.pop()  # the last line could be incomplete
+                yield from lines
+                chunk = f.read(LOG_CHUNK_SIZE)
+            if remainder:
+                yield remainder
+
+    def _read_file_range(self, rangeP: tuple):
+        """Read a range of bytes of the file pointed by `logpath` by blocks of `LOG_CHUNK_SIZE`
 
-    def _read_log(self):
-        """Read log file `logpath` to fill up `raw_inputs` with cleaned string entries
+        The range is mapped in memory, lines are decoded as `_read_file` does for the whole file
+
+        Args:
+            rangeP (tuple): (begin, end) range of bytes to read, aligned on lines
 
-        Filters : comments, empty lines and malformed lines
+        Yields:
+            str: a line of the range, without its newline
+        """
+        begin, end = rangeP
+        with open(self.logpath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            logging.info(f"latseq_log._read_file() : Reading {self.logpath} [{begin}:{end}] ...")
+            yield from self._split_lines(mm[pos:min(pos + LOG_CHUNK_SIZE, end)] for pos in range(begin, end, LOG_CHUNK_SIZE))
+
+    def _read_compressed_file(self):
+        """Read the compressed file pointed by `logpath`, decompressed by blocks of `LOG_CHUNK_SIZE` in a thread
+
+        Decompressors of gzip, lzma and bz2 release the GIL, the decompression of the next blocks
+        overlaps with the parsing of the current one, up to `DECOMPRESS_QUEUE_SIZE` blocks ahead
+
+        Yields:
+            str: a line of the log file, without its newline
+
+        Raises:
+            IOError: error at reading the log file
+        """
+        blocks = queue.Queue(maxsize=DECOMPRESS_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def _decompress():
+            try:
+                with rdtsctots.open_lseq(self.logpath, 'rb') as f:
+                    block = f.read(LOG_CHUNK_SIZE)
+                    while block and not stop.is_set():
+                        blocks.put(block)
+                        block = f.read(LOG_CHUNK_SIZE)
+            except Exception as e:
+                blocks.put(IOError(f"error at reading ({self.logpath}) : {e}"))
+                return
+            blocks.put(None)  # end of file
+
+        def _get_blocks():
+            block = blocks.get()
+            while block is not None:
+                if isinstance(block, Exception):
+                    raise block
+                yield block
+                block = blocks.get()
+
+        logging.info(f"latseq_log._read_file() : Reading {self.logpath} ...")
+        decompressor = threading.Thread(target=_decompress, daemon=True)
+        decompressor.start()
+        try:
+            yield from self._split_lines(_get_blocks())
+        finally:
+            stop.set()
+            while decompressor.is_alive():  # unblock the decompressor if the queue is full
+                try:
+                    blocks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def _split_lines(self, blocksP):
+        """Split blocks of bytes of the log file into lines
+
+        Args:
+            blocksP (iterable): consecutive blocks of bytes
+
+        Yields:
+            str: a line, without its newline, decoded as the text mode of open() does
+        """
+        remainder = b""
+        for block in blocksP:
+            block = remainder + block
+            last = block.rfind(b'\n') + 1  # the last line could be incomplete
+            block, remainder = block[:last].decode(), block[last:]
+            if '\r' in block:  # universal newlines, as the text mode of open()
+                block = block.replace('\r\n', '\n').replace('\r', '\n')
+            yield from block.split('\n')[:-1]
+        if remainder:
+            yield from remainder.decode().replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+    def _split_log(self, nbP: int) -> list:
+        """Cut the file pointed by `logpath` in `nbP` ranges of bytes aligned on lines
+
+        Args:
+            nbP (int): number of ranges wanted
+
+        Returns:
+            :obj:`list` of tuple: (begin, end) ranges covering the file, less than `nbP` for a small file
+        """
+        with open(self.logpath, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return [(0, 0)]
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                bounds = [0]
+                for k in range(1, nbP):
+                    nl = mm.find(b'\n', max(k * size // nbP, bounds[-1]))
+                    if nl < 0 or nl + 1 >= size:
+                        break
+                    if nl + 1 > bounds[-1]:
+                        bounds.append(nl + 1)
+        bounds.append(size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _is_binary_log(self) -> bool:
+        """Check if the file pointed by `logpath` is a binary log file
+
+        Returns:
+            bool: True if the file begins with `BINARY_MAGIC`
         """
-        for l in self._read_file().splitlines():
+        with rdtsctots.open_lseq(self.logpath, 'rb') as f:
+            return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+    def _read_binary_log(self) -> tuple:
+        """Read the records of the binary log file `logpath`
+
+        The file is mapped in memory and viewed as an array of records without copy,
+        only the records of each type are copied out of the mapping.
+        A compressed file is decompressed in memory instead
+
+        Returns:
+            tuple: (entries records, strings by identifier, number of data identifiers of a record)
+
+        Raises:
+            ValueError: unknown version of the binary format
+        """
+        with rdtsctots.open_lseq(self.logpath, 'rb') as f, (
+                contextlib.nullcontext(f.read()) if self.compressed else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) as mm:
+            logging.info(f"latseq_log._read_binary_log() : Reading {self.logpath} ...")
+            hdr = numpy.frombuffer(mm, binary_record_dtype(0), count=1)
+            version, nb_ids, size = int(hdr['format'][0]), int(hdr['len'][0]), int(hdr['point'][0])
+            del hdr  # views on the mapping are released before it is closed
+            if version != BINARY_VERSION:
+                raise ValueError(f"Error, unknown binary log format of version {version}")
+            dtype = binary_record_dtype(nb_ids)
+            if dtype.itemsize != size:
+                raise ValueError(f"Error, binary records of {size} bytes instead of {dtype.itemsize}")
+            if len(mm) % size:
+                logging.warning(f"latseq_log._read_binary_log() : last record of {self.logpath} is truncated")
+            records = numpy.frombuffer(mm, dtype, count=len(mm) // size)
+            types = records['type']
+            entries = records[types == BINARY_ENTRY]
+            strings = records[types == BINARY_STRING]
+            syncs = records[types == BINARY_SYNC]
+            del records, types
+        # strings are written by pieces before the first entry which uses them
+        pieces = dict()
+        for sid, off, length, data in zip(strings['point'].tolist(), strings['format'].tolist(), strings['len'].tolist(), strings['data_id']):
+            pieces.setdefault(sid, []).append((off, data.tobytes()[:length]))
+        for cycles, sec, nsec in zip(syncs['ts'].tolist(), syncs['data_id'][:, 0].tolist(), syncs['data_id'][:, 1].tolist()):
+            self.syncs.append((cycles, f"{sec}.{nsec:09d}"))
+        return entries, {k: b''.join(p for _, p in sorted(v)).decode() for k, v in pieces.items()}, nb_ids
+
+    def _compile_binary_group(self, pointP: str, formatP: str, nb_idsP: int) -> dict:
+        """Prepare the cleaning of the entries of a binary log file with the same point and format
+
+        When every segment of the format is a name followed by a decimal conversion, or a constant,
+        identifiers are taken from the data identifiers without printing them.
+        Otherwise, each entry is printed with the format, as the collector does in text mode, and parsed
+
+        Args:
+            pointP (str): the type of line followed by the segment, e.g. 'D ip.in--pdcp.in'
+            formatP (str): format of data identifiers given to LATSEQ_P
+            nb_idsP (int): number of data identifiers of a record
+
+        Returns:
+            dict: the type of line, the segment and its points, the format for the % operator with its signed
+                conversions, and slots of identifiers for properties, global and local identifiers.
+                slots is None to print each entry, an empty list if entries are not cleaned (less than 3 parts)
+                None if entries are malformed
+
+        Raises:
+            ValueError: fingerprint without src and dst points
+        """
+        tmp = pointP.split(' ')
+        if len(tmp) != 2 or tmp[0] == 'S':
+            logging.warning(f"latseq_log._compile_binary_group() : entries of {pointP} are malformed")
+            return None
+        try:
+            fmt, signed = c_format_to_python(formatP)
+            if len(signed) > nb_idsP:
+                raise ValueError(f"more than {nb_idsP} conversions in {formatP}")
+        except ValueError as e:
+            logging.warning(f"latseq_log._compile_binary_group() : entries of {pointP} are malformed ({e})")
+            return None
+        group = {'type': tmp[0], 'segment': tmp[1], 'format': fmt, 'signed': signed, 'slots': None}
+        if tmp[0] == 'I':
+            return group
+        e_points = tmp[1].split('--')
+        if len(e_points) < 2:
+            raise ValueError(f"Error at parsing fingerprints of {pointP}")
+        group['src'], group['dst'] = e_points[0], e_points[1]
+        if ' ' in formatP:
+            return group
+        parts = formatP.split(':')
+        if len(parts) < 3:
+            group['slots'] = []
+            return group
+        slots = list()
+        i_slot = 0
+        for part in parts[:3]:
+            part_slots = list()
+            for seg in part.split('.'):
+                m = MATCH_C_SLOT.match(seg)
+                if m:  # an identifier printed from a data identifier
+                    part_slots.append((m.group(1), i_slot, m.group(2) in 'di'))
+                    i_slot += 1
+                elif '%' in seg or 'rnti' in seg:
+                    return group
+                else:  # constant identifiers
+                    part_slots.extend((k, None, v) for k, v in MATCH_IDS.findall(seg))
+            slots.append(part_slots)
+        group['slots'] = slots
+        return group
+
+    def _load_binary_log(self):
+        """Clean the entries of the binary log file `logpath` to `inputs`, `infos` and `edges`
+
+        Entries are grouped by point and format, the columns of `inputs` are built for a whole group at once.
+        The result is the same as the one of the parsing of the text log file written by the collector
+
+        Raises:
+            ValueError: Error at parsing an entry
+        """
+        entries, strings, nb_ids = self._read_binary_log()
+        ts = entries['ts'].astype(numpy.int64)
+        data = entries['data_id']
+        keys = (entries['point'].astype(numpy.int64) << 16) | entries['format']
+        _, first, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        by_group = numpy.split(numpy.argsort(inverse, kind='stable'), numpy.cumsum(numpy.bincount(inverse))[:-1])
+        groups = list()
+        for g in numpy.argsort(first, kind='stable').tolist():
+            rows = by_group[g]
+            point, fmt = int(entries['point'][rows[0]]), int(entries['format'][rows[0]])
+            if point not in strings or fmt not in strings:
+                logging.warning(f"latseq_log._load_binary_log() : entries of unknown point {point} or format {fmt}")
+                continue
+            groups.append((rows, self._compile_binary_group(strings[point], strings[fmt], nb_ids)))
+        # index of each fingerprint in the file, as counted by `nb_raw_inputs`
+        is_fp = numpy.zeros(len(entries), dtype=numpy.int64)
+        for rows, group in groups:
+            if group is not None and group['type'] != 'I':
+                is_fp[rows] = 1
+        raw_index = numpy.cumsum(is_fp) - 1
+        infos = list()
+        dataids = list()  # (first row, names of identifiers)
+        columns = list()  # (rows, direction, src, dst, packed properties, global and local identifiers)
+
+        def _printed(rowsP, groupP):
+            u = data[rowsP][:, :len(groupP['signed'])]
+            values = zip(u.astype(numpy.int64).tolist(), u.view('<i4').tolist())
+            return [(groupP['format'] % tuple(s[k] if sign else v[k] for k, sign in enumerate(groupP['signed']))).partition(' ')[0] for v, s in values]
+
+        for rows, group in groups:
+            if group is None:
+                continue
+            if group['type'] == 'I':
+                for r, text in zip(rows.tolist(), _printed(rows, group)):
+                    infos.append((r, (int(ts[r]), group['segment'], text)))
+                continue
+            direction = 0 if group['type'] == 'D' else 1
+            # the first occurrence in timestamp order, as `_add_edge`
+            first_row = rows[int(numpy.argmin(ts[rows]))]
+            edge = (group['src'], group['dst'], direction)
+            occ = [int(ts[first_row]), int(raw_index[first_row]), len(rows)]
+            if edge not in self.edges:
+                self.edges[edge] = occ
+            else:
+                self.edges[edge][2] += occ[2]
+                if occ[:2] < self.edges[edge][:2]:
+                    self.edges[edge][:2] = occ[:2]
+            self.nb_raw_inputs += len(rows)
+            slots = group['slots']
+            if slots is not None and any(
+                    sl[2] and (data[rows, sl[1]].view('<i4') < 0).any()
+                    for part in slots for sl in part if sl[1] is not None):
+                slots = None  # negative values are not printed as identifiers
+            if slots == []:
+                continue
+            if slots is not None:
+                # identifiers of the whole group from the data identifiers
+                keep = numpy.ones(len(rows), dtype=bool)
+                packed = list()
+                for part in slots:
+                    values = list()
+                    for name, slot, sign in part:
+                        if slot is None:  # the constant value, as it is written in the format
+                            values.append(numpy.full(len(rows), self.inputs.values.encode(sign), dtype=numpy.int64))
+                            continue
+                        v = data[rows, slot]
+                        v = v.view('<i4').astype(numpy.int64) if sign else v.astype(numpy.int64)
+                        if name.endswith('rnti'):  # skip fingerprints of the empty rnti
+                            keep &= ~numpy.char.startswith(v.astype(str), '65535')
+                        # values printed by %d or %u, encoded once for each distinct value
+                        distinct, inverse = numpy.unique(v, return_inverse=True)
+                        codes = numpy.array([self.inputs.values.encode(str(d)) for d in distinct.tolist()], dtype=numpy.int64)
+                        values.append(codes[inverse.ravel()])
+                    packed.append((
+                        [self.inputs.ids.encode(name) for name, _, _ in part],
+                        numpy.stack(values, axis=1) if values else numpy.zeros((len(rows), 0), dtype=numpy.int64)))
+                rows = rows[keep]
+                if not len(rows):
+                    continue
+                dataids.append((int(rows[0]), [name for part in slots[1:] for name, _, _ in part]))
+                columns.append((
+                    rows,
+                    direction,
+                    self.inputs.points.encode(group['src']),
+                    self.inputs.points.encode(group['dst']),
+                    [(
+                        numpy.full(len(rows), len(codes), dtype=numpy.int64),
+                        numpy.tile(numpy.array(codes, dtype=numpy.int16), len(rows)),
+                        values[keep].ravel()) for codes, values in packed]))
+                continue
+            # each entry printed and parsed as a line of a text log file
+            kept = list()
+            packed = [([], [], []) for _ in range(3)]
+            for r, text in zip(rows.tolist(), _printed(rows, group)):
+                fp = self._parse_fingerprint((int(ts[r]), direction, group['segment'], text))
+                if fp is None:
+                    continue
+                kept.append(r)
+                dataids.append((r, [did[0] for did in fp[2] + fp[3]]))
+                for (lengths, codes, values), ids in zip(packed, fp[1:]):
+                    lengths.append(len(ids))
+                    codes.extend(self.inputs.ids.encode(k) for k, _ in ids)
+                    values.extend(self.inputs.values.encode(v) for _, v in ids)
+            if kept:
+                columns.append((
+                    numpy.array(kept, dtype=numpy.int64),
+                    direction,
+                    self.inputs.points.encode(group['src']),
+                    self.inputs.points.encode(group['dst']),
+                    [(
+                        numpy.array(lengths, dtype=numpy.int64),
+                        numpy.array(codes, dtype=numpy.int16),
+                        numpy.array(values, dtype=numpy.int64)) for lengths, codes, values in packed]))
+        dataids.sort(key=lambda x: x[0])
+        for _, names in dataids:
+            for did in names:
+                if did not in self.dataids:
+                    self.dataids.append(did)
+        infos.sort(key=lambda x: x[0])
+        for _, i in infos:
+            self._clean_info(i)
+        rows = numpy.concatenate([c[0] for c in columns] + [numpy.zeros(0, dtype=numpy.int64)])
+        packed = list()
+        for p in range(3):
+            lengths = numpy.concatenate([c[4][p][0] for c in columns] + [numpy.zeros(0, dtype=numpy.int64)])
+            offsets = numpy.zeros(len(lengths) + 1, dtype=numpy.int64)
+            numpy.cumsum(lengths, out=offsets[1:])
+            packed.append((
+                offsets,
+                numpy.concatenate([c[4][p][1] for c in columns] + [numpy.zeros(0, dtype=numpy.int16)]),
+                numpy.concatenate([c[4][p][2] for c in columns] + [numpy.zeros(0, dtype=numpy.int64)])))
+        self.inputs.load_columns(
+            ts[rows],
+            numpy.concatenate([numpy.full(len(c[0]), c[1], dtype=numpy.uint8) for c in columns] + [numpy.zeros(0, dtype=numpy.uint8)]),
+            numpy.concatenate([numpy.full(len(c[0]), c[2], dtype=numpy.int16) for c in columns] + [numpy.zeros(0, dtype=numpy.int16)]),
+            numpy.concatenate([numpy.full(len(c[0]), c[3], dtype=numpy.int16) for c in columns] + [numpy.zeros(0, dtype=numpy.int16)]),
+            packed,
+            rows)
+
+    def _is_rdtsc_log(self) -> bool:
+        """Check if the timestamps of the file pointed by `logpath` are raw rdtsc values
+
+        Returns:
+            bool: True if the first fingerprint has no decimal separator in its timestamp
+        """
+        lines = self._read_file()
+        try:
+            for l in lines:
+                if l and l[0] != '#':
+                    return '.' not in l.split(' ', 1)[0]
+        finally:
+            lines.close()
+        return False
+
+    @staticmethod
+    def _parse_log_range(logpathP: str, ts_unitP: str, rdtscP: bool, rangeP: tuple) -> tuple:
+        """Parse a range of a log file, run in a worker process by `_clean_log`
+
+        Args:
+            logpathP (str): path to the log file
+            ts_unitP (str): representation of timestamps, one of `TS_UNITS`
+            rdtscP (bool): the log file has raw rdtsc timestamps
+            rangeP (tuple): (begin, end) range of bytes to parse, aligned on lines
+
+        Returns:
+            tuple: (inputs sorted by timestamp, infos, dataids, edges, nb_raw_inputs, syncs) of the range
+        """
+        lseq = latseq_log.__new__(latseq_log)
+        lseq.logpath = logpathP
+        lseq.ts_unit = ts_unitP
+        lseq.compressed = False
+        lseq.binary = False
+        lseq.rdtsc = rdtscP
+        lseq.syncs = list()
+        lseq.nb_raw_inputs = 0
+        lseq.inputs = latseq_inputs(ts_unitP, rdtscP)
+        lseq.infos = list()
+        lseq.dataids = list()
+        lseq.edges = dict()
+        lseq._parse_log(rangeP)
+        lseq.inputs.freeze()
+        return (lseq.inputs, lseq.infos, lseq.dataids, lseq.edges, lseq.nb_raw_inputs, lseq.syncs)
+
+    def _read_log(self, rangeP: tuple = None, infosP: bool = False):
+        """Read log file `logpath` and yield raw entries as soon as they are read
+
+        Filters : comments, empty lines and malformed lines, and fingerprints if `infosP`
+
+        Timestamps are converted to `ts_unit`.
+        Raw rdtsc timestamps are kept in cycles and synchronisation lines are recorded to `syncs`,
+        `_clean_log` converts them once all the file is read
+
+        Args:
+            rangeP (tuple): (begin, end) range of bytes to read. The whole file by default
+            infosP (bool): only the information and synchronisation lines, the fingerprints are skipped before being split
+
+        Yields:
+            (str, tuple): the type of line ('I' for information, 'D' or 'U' for a fingerprint) and the raw entry
+                information : (timestamp, point, data)
+                fingerprint : (timestamp, direction, segment, data ids)
+        """
+        digits = TS_UNITS[self.ts_unit]
+        truncated = False
+        for l in self._read_file(rangeP):
             if not l:  # line is not empty
                 continue
-            # Match pattern
-            # https://www.tutorialspoint.com/python/python_reg_expressions.htm
-            if re.match(r'#.*$', l, re.M):
+            if l[0] == '#':  # comment
                 continue
+            if infosP:
+                t = l.find(' ') + 1
+                if l[t:t + 2] not in ('I ', 'S '):  # fingerprint
+                    continue
             tmp = l.split(' ')
             if len(tmp) < 4:
                 logging.warning(f"latseq_log._read_log() : {l} is a malformed line")
                 continue
             if tmp[1] == 'S':  # synchronisation-type line
+                if self.rdtsc:
+                    self.syncs.append((int(tmp[0]), tmp[3]))
                 continue
+            if self.rdtsc:  # cycles, converted by _clean_log
+                ts = int(tmp[0])
+            else:
+                if digits and not truncated and len(tmp[0].partition('.')[2]) > digits:
+                    logging.warning(f"latseq_log._read_log() : {tmp[0]} is truncated to the {self.ts_unit} precision")
+                    truncated = True
+                ts = str_to_ts(tmp[0], self.ts_unit)
             if tmp[1] == 'I':  # information-type line
-                self.raw_infos.append(tuple([
-                    decimal.Decimal(tmp[0]),
+                yield 'I', (
+                    ts,
                     tmp[2],
-                    tmp[3]
-                ]))
+                    tmp[3])
                 continue
             # TODO : rendre dynamique cette valeur avec
             # le format donne par le header
-            self.raw_inputs.append(tuple([
-                decimal.Decimal(tmp[0]),
+            yield tmp[1], (
+                ts,
                 0 if tmp[1] == 'D' else 1,
                 tmp[2],
-                tmp[3]]))
+                tmp[3])
 
     def _clean_log(self):
-        """Clean logs from `raw_inputs` to `inputs`
+        """Clean logs from the entries yielded by `_read_log` to `inputs`
 
-        Extract ids and values from pattern id123, 'id': 123
-        Transform the string entry in tuple entry
-        At the end, `input` is made immutable for the rest of the program
+        Each raw entry is cleaned as soon as it is read, then dropped.
+        The segment of every fingerprint is also recorded to `edges` for `_build_points`.
+        At the end, `input` is sorted and made immutable for the rest of the program
 
-        Filters :
-            rnti65535
+        With more than one `jobs`, the file is cut in ranges of lines parsed by a pool of processes.
+        Each range is sorted by its process, then the sorted ranges are merged.
+        The result is the same as the one of the parsing in this process.
+        A binary log file is loaded by `_load_binary_log` in this process, whatever the number of `jobs`,
+        as a compressed log file which can only be read from its beginning
+
+        Raw rdtsc timestamps are converted to `ts_unit` at the end, with the clock model of
+        the synchronisation lines. The log file is left untouched
 
         Attributes:
-            inputs (:obj:`list` of :obj:`tuple`) : list of log elements
+            inputs (:obj:`latseq_inputs`) : columnar store of log elements
                 inputs[i][0] : Timestamp
                 inputs[i][1] : Direction
                 inputs[i][2] : Src point
@@ -315,135 +2077,234 @@ class latseq_log:
                 infos[i][1] : Point
                 infos[i][2] : Properties
                 infos[i][3] : Context identifiers
+            edges (:obj:`dict`): first occurrence and count of each (src point, dst point, direction)
+                edges[e][0] : Timestamp of the first occurrence
+                edges[e][1] : Index of the first occurrence in the file
+                edges[e][2] : Number of occurrences
+            nb_raw_inputs (int): number of fingerprints read before filtering
         Raises:
             ValueError : Error at parsing a line
         """
-        # patterns dataidO to detect
-        match_ids = re.compile("([a-zA-Z]+)([0-9]+)")
-
-        # First process informations
-        self.raw_infos.sort(key=operator.itemgetter(1, 0))  # sort by point followed timestamp
-        for i in self.raw_infos:
-            # process infomation line
-            try:
-                i_points = tuple(i[1].split('.'))
-                tmp_infos_d = dict()
-                meas_ctxt = i[2].split(':')  # Left part represents properties, right parts optional local identifier
-                for d in meas_ctxt[0].split('.'):
-                    try:
-                        did = match_ids.match(d).groups()
-                    except Exception:
+        ranges = self._split_log(self.jobs) if self.jobs > 1 and not self.binary and not self.compressed else []
+        if self.binary:
+            self._load_binary_log()
+        elif len(ranges) > 1:
+            with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                runs = list(pool.map(
+                    latseq_log._parse_log_range,
+                    [self.logpath] * len(ranges),
+                    [self.ts_unit] * len(ranges),
+                    [self.rdtsc] * len(ranges),
+                    ranges))
+            for _, infos, dataids, edges, nb_raw_inputs, syncs in runs:
+                self.infos.extend(infos)
+                self.syncs.extend(syncs)
+                for did in dataids:
+                    if did not in self.dataids:
+                        self.dataids.append(did)
+                for edge, occ in edges.items():
+                    occ[1] += self.nb_raw_inputs  # index in the whole file
+                    if edge not in self.edges:
+                        self.edges[edge] = occ
                         continue
-                    else:
-                        tmp_infos_d[did[0]] = did[1]
-                if len(meas_ctxt) == 2:  # measurement context identifier
-                    tmp_ctxt_d = dict()
-                    for c in meas_ctxt[1].split('.'):
-                        try:
-                            dic = match_ids.match(d).groups()
-                        except Exception:
-                            continue
-                        else:
-                            tmp_ctxt_d[dic[0]] = dic[1]
-                    # TODO : A problem here, tmp_infos_d == tmp_ctxt_d at yielding
-                    self.infos.append((
-                        i[0],
-                        i_points,
-                        deepcopy(tmp_infos_d),
-                        deepcopy(tmp_ctxt_d),
-                    ))
-                else:
-                    self.infos.append((
-                        i[0],
-                        i_points,
-                        deepcopy(tmp_infos_d),
-                    ))
-                # not other processing needed for infos
-            except Exception:
-                logging.error(f"latseq_log._clean_log() : at parsing information line {i}")
+                    self.edges[edge][2] += occ[2]
+                    if occ[0] < self.edges[edge][0]:
+                        self.edges[edge][0] = occ[0]
+                        self.edges[edge][1] = occ[1]
+                self.nb_raw_inputs += nb_raw_inputs
+            # sort by timestamp. important assumption for the next methods
+            self.inputs.merge([r[0] for r in runs])
+        else:
+            self._parse_log()
+            # sort by timestamp. important assumption for the next methods
+            self.inputs.freeze()
+        if self.rdtsc:
+            self._convert_rdtsc()
+        # sort by point followed timestamp
+        self.infos.sort(key=lambda x: ('.'.join(x[1]), x[0]))
+
+    def _convert_rdtsc(self, inputsP: bool = True):
+        """Convert the timestamps of `inputs`, `infos` and `edges` from cycles to `ts_unit`
+
+        The piecewise linear model of `rdtsctots.rdtsc_clock` is monotonic, `inputs` stays sorted
+
+        Args:
+            inputsP (bool): False to convert only `infos`, see `_scan_infos`
+
+        Raises:
+            ValueError : Not enough synchronisation lines
+        """
+        clock = rdtsctots.rdtsc_clock(self.syncs)
+        logging.info(f"latseq_log._convert_rdtsc() : rdtsc converted with {len(clock.cycles)} synchronisation lines, mean cpu frequency of {clock.cpufreq} Hz")
+        infos_ns = clock.to_ns([i[0] for i in self.infos]).tolist()
+        self.infos = [(ns_to_ts(ns, self.ts_unit),) + i[1:] for ns, i in zip(infos_ns, self.infos)]
+        if not inputsP:
+            return
+        self.inputs.convert_rdtsc(clock.to_ns, self.ts_unit == 'decimal')
+        edges_ns = clock.to_ns([occ[0] for occ in self.edges.values()]).tolist()
+        for ns, occ in zip(edges_ns, self.edges.values()):
+            occ[0] = ns_to_ts(ns, self.ts_unit)
+
+    def _scan_infos(self):
+        """Fill `infos` and `syncs` from the information and synchronisation lines of `logpath`, without `inputs`
 
-        # sort by timestamp. important assumption for the next methods
-        self.raw_inputs.sort(key=operator.itemgetter(0))
+        The fingerprints are skipped as soon as their type is read. `infos` is the one of `_clean_log`.
+        The information of a binary log file are in the same records as its fingerprints, they are cleaned with `inputs`
+        """
+        if self.binary:
+            self._get_stage('inputs')
+            return
+        self.syncs = list()
+        self.infos = list()
+        for _, i in self._read_log(infosP=True):
+            self._clean_info(i)
+        if self.rdtsc:
+            self._convert_rdtsc(inputsP=False)
+        # sort by point followed timestamp
+        self.infos.sort(key=lambda x: ('.'.join(x[1]), x[0]))
 
-        # match_emptyrnti = re.compile("rnti65535")
-        for e in self.raw_inputs:
-            # an entry is a timestamp, a direction,
-            # an in point an out point, a size,
-            # a list of glibal context data id and local data id
+    def _parse_log(self, rangeP: tuple = None):
+        """Clean each entry yielded by `_read_log` to `inputs`, `infos` and `edges`
 
-            # skip lines which matches the following re
-            if re.search("rnti65535", e[3]):
+        Args:
+            rangeP (tuple): (begin, end) range of bytes to parse. The whole file by default
+        """
+        for t, e in self._read_log(rangeP):
+            if t == 'I':
+                self._clean_info(e)
                 continue
+            self._add_edge(e)
+            self._clean_input(e)
+            self.nb_raw_inputs += 1
 
-            # process line
-            try:
-                e_points = e[2].split('--')
-                dataids = e[3].split(':')
-                if len(dataids) < 3:
-                    continue
-                ptmp = {}
+    def _clean_info(self, i: tuple):
+        """Clean an information entry and add it to `infos`
+
+        Args:
+            i (tuple): raw information entry (timestamp, point, data)
+        """
+        # process infomation line
+        try:
+            i_points = tuple(i[1].split('.'))
+            meas_ctxt = i[2].split(':')  # Left part represents properties, right parts optional local identifier
+            tmp_infos_d = dict(MATCH_IDS.findall(meas_ctxt[0]))
+            if len(meas_ctxt) == 2:  # measurement context identifier
+                tmp_ctxt_d = dict(MATCH_IDS.findall(meas_ctxt[1]))
+                self.infos.append((
+                    i[0],
+                    i_points,
+                    tmp_infos_d,
+                    tmp_ctxt_d,
+                ))
+            else:
+                self.infos.append((
+                    i[0],
+                    i_points,
+                    tmp_infos_d,
+                ))
+            # not other processing needed for infos
+        except Exception:
+            logging.error(f"latseq_log._clean_info() : at parsing information line {i}")
+
+    def _parse_fingerprint(self, e: tuple) -> tuple:
+        """Extract ids and values of a raw fingerprint entry
+
+        Extract ids and values from pattern id123, 'id': 123
+
+        Filters :
+            rnti65535
+
+        Args:
+            e (tuple): raw fingerprint entry (timestamp, direction, segment, data ids)
+        Returns:
+            tuple: (src and dst points, properties, global ids, local ids), None if the entry is filtered
+        Raises:
+            ValueError : Error at parsing the entry
+        """
+        # an entry is a timestamp, a direction,
+        # an in point an out point, a size,
+        # a list of glibal context data id and local data id
+
+        # skip fingerprints of the empty rnti
+        if "rnti65535" in e[3]:
+            return None
+
+        # process line
+        try:
+            e_points = e[2].split('--')
+            dataids = e[3].split(':')
+            if len(dataids) < 3:
+                return None
+            return (
+                e_points,
                 # properties values
-                if dataids[0] != '':
-                    for p in dataids[0].split('.'):
-                        try:
-                            dip = match_ids.match(p).groups()
-                        except Exception:
-                            continue
-                        else:
-                            ptmp[dip[0]] = dip[1]
+                MATCH_IDS.findall(dataids[0]),
                 # global context ids
-                ctmp = {}
-                if dataids[1] != '':
-                    for c in dataids[1].split('.'):
-                        try:
-                            # dic[0] is the global context identifier
-                            # dic[1] the value associated
-                            dic = match_ids.match(c).groups()
-                        except Exception:
-                            continue
-                        else:
-                            ctmp[dic[0]] = dic[1]
-                            if dic[0] not in self.dataids:
-                                self.dataids.append(dic[0])
-                dtmp = {}
+                MATCH_IDS.findall(dataids[1]),
                 # local context ids
-                if dataids[2] != '':
-                    for d in dataids[2].split('.'):
-                        try:
-                            # did[0] is the local context identifier
-                            # did[1] the value associated
-                            did = match_ids.match(d).groups()
-                        except Exception:
-                            continue
-                        else:
-                            if did[0] not in dtmp:
-                                dtmp[did[0]] = did[1]
-                            else:  # case we have multiple value for the same id
-                                if isinstance(dtmp[did[0]], list):
-                                    dtmp[did[0]].append(did[1])
-                                else:
-                                    tmpl = [dtmp[did[0]], did[1]]
-                                    del dtmp[did[0]]
-                                    dtmp[did[0]] = tmpl
-                            if did[0] not in self.dataids:
-                                self.dataids.append(did[0])
-
-                self.inputs.append((
-                        e[0],
-                        e[1],
-                        e_points[0],
-                        e_points[1],
-                        deepcopy(ptmp),
-                        deepcopy(ctmp),
-                        deepcopy(dtmp)
-                    ))
-            except Exception:
-                raise ValueError(f"Error at parsing line {e}")
-        self.inputs = make_immutable_list(self.inputs)
+                MATCH_IDS.findall(dataids[2]))
+        except Exception:
+            raise ValueError(f"Error at parsing line {e}")
+
+    def _clean_input(self, e: tuple):
+        """Clean a fingerprint entry and add it to `inputs`
+
+        Transform the string entry in tuple entry
+
+        Args:
+            e (tuple): raw fingerprint entry (timestamp, direction, segment, data ids)
+        Raises:
+            ValueError : Error at parsing the entry
+        """
+        fp = self._parse_fingerprint(e)
+        if fp is None:
+            return
+        e_points, ptmp, ctmp, dtmp = fp
+        try:
+            for did in ctmp:
+                if did[0] not in self.dataids:
+                    self.dataids.append(did[0])
+            for did in dtmp:
+                if did[0] not in self.dataids:
+                    self.dataids.append(did[0])
+
+            self.inputs.append(
+                    e[0],
+                    e[1],
+                    e_points[0],
+                    e_points[1],
+                    ptmp,
+                    ctmp,
+                    dtmp
+                )
+        except Exception:
+            raise ValueError(f"Error at parsing line {e}")
+
+    def _add_edge(self, e: tuple):
+        """Record the segment of a raw fingerprint to `edges`
+
+        Only the first occurrence in timestamp order (ties broken by position in the file)
+        and the number of occurrences are kept, which is enough for `_build_points`
+
+        Args:
+            e (tuple): raw fingerprint entry (timestamp, direction, segment, data ids)
+        """
+        e_points = e[2].split('--')  # [0] is src point and [1] is dest point
+        edge = (e_points[0], e_points[1], e[1])
+        if edge not in self.edges:
+            self.edges[edge] = [e[0], self.nb_raw_inputs, 1]
+            return
+        self.edges[edge][2] += 1
+        if e[0] < self.edges[edge][0]:
+            self.edges[edge][0] = e[0]
+            self.edges[edge][1] = self.nb_raw_inputs
 
     def _build_points(self):
         """Build graph of measurement `points` and find in and out points
 
+        The `edges` are replayed in the order of their first occurrence,
+        which gives the same graph as processing every fingerprint sorted by timestamp
+
         Attributes:
             points (:obj:`dict`):
                 points['point']['next'] (:obj:`list` of str): list of next point possible
@@ -451,14 +2312,14 @@ class latseq_log:
                 points['point']['dir'] (list): could be 0, 1 or 0 and 1
         """
         # Build graph
-        for e in self.raw_inputs:
-            e_points = e[2].split('--')  # [0] is src point and [1] is dest point
+        for e, occ in sorted(self.edges.items(), key=lambda x: (x[1][0], x[1][1])):
+            e_points = e[0:2]  # [0] is src point and [1] is dest point
             if e_points[0] not in self.points:
                 # list of pointers and direction 0 for D and 1 for U
                 self.points[e_points[0]] = {}
                 self.points[e_points[0]]['next'] = []
                 self.points[e_points[0]]['count'] = 0
-                self.points[e_points[0]]['dir'] = [e[1]]
+                self.points[e_points[0]]['dir'] = [e[2]]
             if e_points[1] not in self.points[e_points[0]]['next']:
                 # Get combinations of dest point
                 # ex. rlc.seg.um : rlc, rlc.seg, rlc.seg.um
@@ -474,10 +2335,10 @@ class latseq_log:
                 self.points[e_points[1]] = {}
                 self.points[e_points[1]]['next'] = []
                 self.points[e_points[1]]['count'] = 1
-                self.points[e_points[1]]['dir'] = [e[1]]
-            self.points[e_points[0]]['count'] += 1
-            if e[1] not in self.points[e_points[0]]['dir']:
-                self.points[e_points[0]]['dir'].append(e[1])
+                self.points[e_points[1]]['dir'] = [e[2]]
+            self.points[e_points[0]]['count'] += occ[2]
+            if e[2] not in self.points[e_points[0]]['dir']:
+                self.points[e_points[0]]['dir'].append(e[2])
         
         # The IN and OUT are not fixed in the __init__ before calling this method
         if not hasattr(self, 'pointsInD') or not hasattr(self, 'pointsInU') or not hasattr(self, 'pointsOutD') or not hasattr(self, 'pointsOutU'):
@@ -514,28 +2375,133 @@ class latseq_log:
     def _build_paths(self):
         """Build all possible `paths` in the graph `points`
 
-        BFS is used as algorithm to build all paths possible between an IN and OUT point
+        The paths between an IN and an OUT point are listed in the order of a depth first search.
+        Only the points which lead to the OUT point are visited. Without cycle among them,
+        the paths from a point to the OUT point are built once and shared by all the paths through this point.
+        Only the first `MAX_PATHS` paths of a direction are kept
         """
-        def _find_all_paths(graphP: dict, startP: str, endP: str, pathP=[]):
-            tmppath = pathP + [startP]
-            if startP == endP:
-                return [tmppath]
-            if startP not in graphP:
-                return []
+        def _get_next(pointP: str) -> list:
+            return self.points[pointP]['next'] if pointP in self.points else []
+
+        def _leading_to(endP: str) -> set:
+            """Get the points from which `endP` can be reached"""
+            res = {endP}
+            todo = [endP]
+            while todo:
+                for p in previous.get(todo.pop(), ()):
+                    if p not in res:
+                        res.add(p)
+                        todo.append(p)
+            return res
+
+        def _has_cycle(startP: str, endP: str, pointsP: set) -> bool:
+            """True if a cycle is reachable from `startP` among `pointsP`, before `endP`"""
+            state = {startP: 1}  # 1 : being visited, 2 : done
+            stack = [(startP, iter(_get_next(startP)))]
+            while stack:
+                point, nexts = stack[-1]
+                p = next(nexts, None)
+                if p is None:
+                    state[point] = 2
+                    stack.pop()
+                elif p in pointsP and p != endP:
+                    if state.get(p) == 1:
+                        return True
+                    if p not in state:
+                        state[p] = 1
+                        stack.append((p, iter(_get_next(p))))
+            return False
+
+        def _count_paths(startP: str, endP: str, pointsP: set) -> dict:
+            """Get the number of paths to `endP` of the points reachable from `startP`, without cycle among `pointsP`
+
+            Returns:
+                :obj:`dict`: number of paths by point, a point comes after all its next points
+            """
+            counts = {endP: 1}
+            stack = [startP]
+            while stack:
+                point = stack[-1]
+                todo = [p for p in _get_next(point) if p in pointsP and p not in counts]
+                if todo:
+                    stack.extend(todo)
+                    continue
+                stack.pop()
+                counts[point] = sum(counts[p] for p in _get_next(point) if p in pointsP)
+            return counts
+
+        def _find_all_paths(startP: str, endP: str, pointsP: set, nbP: int) -> list:
+            """Get the `nbP` first paths from `startP` to `endP`, without cycle among `pointsP`
+
+            The paths from a point to `endP` (suffixes) are linked lists (point, suffix) shared by the points before.
+            They are built once for the points with at most `nbP` suffixes, expanded on demand for the others
+            """
+            suffixes = {}
+            for point, nb in _count_paths(startP, endP, pointsP).items():
+                if nb > nbP:
+                    continue
+                if point == endP:
+                    suffixes[point] = [(endP, None)]
+                else:
+                    suffixes[point] = [(point, suffix) for p in _get_next(point) if p in pointsP for suffix in suffixes[p]]
+
+            def _iter_suffixes(pointP: str):
+                if pointP in suffixes:
+                    yield from suffixes[pointP]
+                    return
+                for p in _get_next(pointP):
+                    if p in pointsP:
+                        for suffix in _iter_suffixes(p):
+                            yield (pointP, suffix)
+
+            paths = []
+            for suffix in itertools.islice(_iter_suffixes(startP), nbP):
+                path = []
+                while suffix is not None:
+                    path.append(suffix[0])
+                    suffix = suffix[1]
+                paths.append(path)
+            return paths
+
+        def _find_all_simple_paths(startP: str, endP: str, pointsP: set, nbP: int) -> list:
+            """Get the `nbP` first paths from `startP` to `endP` which do not pass twice through a point of `pointsP`"""
             paths = []
-            for p in graphP[startP]['next']:
-                if p not in tmppath:
-                    newpaths = _find_all_paths(graphP, p, endP, tmppath)
-                    for newpath in newpaths:
-                        paths.append(newpath)
+            path = [startP]
+            stack = [iter(_get_next(startP))]
+            while stack and len(paths) < nbP:
+                p = next(stack[-1], None)
+                if p is None:
+                    stack.pop()
+                    path.pop()
+                elif p == endP:
+                    paths.append(path + [p])
+                elif p in pointsP and p not in path:
+                    path.append(p)
+                    stack.append(iter(_get_next(p)))
             return paths
-        # build downlink paths
-        for i in self.pointsInD:
-            for o in self.pointsOutD:
-                self.paths[0].extend(_find_all_paths(self.points, i, o))
-        for i in self.pointsInU:
-            for o in self.pointsOutU:
-                self.paths[1].extend(_find_all_paths(self.points, i, o))
+
+        previous = {}  # reverse graph of points
+        for p in self.points:
+            for n in self.points[p]['next']:
+                previous.setdefault(n, []).append(p)
+        for d, (points_in, points_out) in enumerate(((self.pointsInD, self.pointsOutD), (self.pointsInU, self.pointsOutU))):
+            leading_to = {o: _leading_to(o) for o in points_out}
+            for i, o in itertools.product(points_in, points_out):
+                # one path more to know if some are ignored
+                nb_paths = MAX_PATHS - len(self.paths[d]) + 1
+                if i == o:
+                    tmp_paths = [[i]]
+                elif i not in leading_to[o]:
+                    continue
+                elif _has_cycle(i, o, leading_to[o]):
+                    tmp_paths = _find_all_simple_paths(i, o, leading_to[o], nb_paths)
+                else:
+                    tmp_paths = _find_all_paths(i, o, leading_to[o], nb_paths)
+                self.paths[d].extend(tmp_paths)
+                if len(self.paths[d]) > MAX_PATHS:
+                    del self.paths[d][MAX_PATHS:]
+                    logging.warning(f"latseq_log._build_paths() : more than {MAX_PATHS} paths in {'Downlink' if d == 0 else 'Uplink'}, the next ones are ignored")
+                    break
         if len(self.paths[0]) == 0 and len(self.paths[1]) == 0:
             raise Exception("Error no paths found in Downlink nor in Uplink")
         elif len(self.paths[0]) == 0:
@@ -548,52 +2514,175 @@ class latseq_log:
                     self.paths[dp][p] = make_immutable_list(self.paths[dp][p])
 
     def _build_timestamp(self):
-        """Build `timestamps` a :obj:`list` of Decimal of timestamp
+        """Build `timestamps` a :obj:`list` of Decimal of timestamp of `inputs`
+        """
+        self.timestamps = self.inputs.get_timestamps()
+
+    def learn_windows(self, nbP: int = WINDOW_SAMPLE) -> dict:
+        """Learn `windows`, the search window of each point from the latency observed on the segments to it
+
+        The window of a point is the `WINDOW_QUANTILE` of the latencies plus `DURATION_WINDOW_MARGIN`,
+        at most `DURATION_TO_SEARCH_PKT`. The latencies are the 'duration' of `points` after a former rebuild,
+        otherwise the ones of the journeys of the first `nbP` fingerprints, rebuilt with the fixed windows.
+        A point with less than `WINDOW_MIN_SAMPLES` latencies keeps the fixed window
+
+        Args:
+            nbP (int): number of fingerprints of the first pass
+
+        Returns:
+            :obj:`dict`: the window in seconds by point
         """
-        self.timestamps = list(map(lambda x: x[0], self.raw_inputs))
+        durations = {
+            p: list(self.points[p]['duration'].values())
+            for p in self.points if self.points[p].get('duration') and p not in self.pointsInD and p not in self.pointsInU}
+        unit = self.ts_unit  # unit of the latencies
+        if durations:
+            logging.info("latseq_log.learn_windows() : from the latencies of the points")
+        else:  # first pass
+            logging.info(f"latseq_log.learn_windows() : from the journeys of the first {nbP} fingerprints")
+            part = self._get_partition(numpy.arange(min(nbP, len(self.inputs)), dtype=numpy.int64))
+            part.windows = None
+            journeys = part._rebuild_journeys()
+            offsets, rows = journeys.sets
+            lengths = numpy.diff(offsets)
+            keep = journeys.completed & (journeys.path >= 0)
+            hops = numpy.repeat(keep, lengths)  # measures but the first one of the completed journeys
+            hops[offsets[:-1][lengths > 0]] = False
+            hops = numpy.flatnonzero(hops)
+            srcs = part.inputs.src[rows[hops]]
+            latencies = part.inputs.ts[rows[hops]] - part.inputs.ts[rows[hops - 1]]
+            unit = part.inputs.ts_unit
+            for code in numpy.unique(srcs).tolist():
+                durations[self.inputs.points.decode(code)] = latencies[srcs == code].tolist()
+        self.windows = dict()
+        for p, d in durations.items():
+            if len(d) < WINDOW_MIN_SAMPLES:
+                continue
+            quantile = ts_to_decimal(decimal.Decimal(numpy.quantile(numpy.array(d, dtype=float), WINDOW_QUANTILE)), unit)
+            window = (quantile + DURATION_WINDOW_MARGIN).quantize(decimal.Decimal('0.000001'), rounding=decimal.ROUND_CEILING)
+            self.windows[p] = min(window, DURATION_TO_SEARCH_PKT)
+        logging.info(f"latseq_log.learn_windows() : {len(self.windows)} adaptive search windows")
+        return self.windows
 
     def rebuild_packets_journey_recursively(self):
-        """Rebuild the packets journey from a list of measure recursively
+        """Rebuild the packets journey from a list of measure
         Algorithm:
-            for each input packet, try to rebuild the journey with the next measurements (depth limited)
+            for each input packet, try to rebuild the journey with the next measurements (depth limited),
+            then the journeys forked by segmentations, depth first with a stack instead of recursive calls
+
+        With more than one `jobs`, `inputs` is cut by global context by `_partition_inputs`,
+        or in time by `_shard_inputs` if `split` is 'time', and the parts are rebuilt by a pool of processes.
+        The result is the same as the one of the rebuild in this process
 
         Args:
             inputs: ordered and cleaned inputs
 
         Attributs:
-            journeys (:obj:`dict`): the dictionnary of journey
+            journeys (:obj:`latseq_journeys`): the journeys
             out_journeys (:obj:`list`): the list of journeys prepare for output
         """
-        self.journeys = dict()
         # Case: the instance has not been initialized correctly
         if not self.initialized:
             try:
                 self(self.logpath)
             except Exception:
                 raise Exception("Impossible to rebuild packet because this instance of latseq_log has not been initialized correctly")
-        
+        self._build_stage('journeys')
+        # Store latseq_logs object
+        self.store_object()
+        # build out_journeys
+        self._build_stage('out_journeys')
+        self.store_object()
+
+    def _build_journeys(self):
+        """Build `journeys` in this process or by a pool of processes, see `rebuild_packets_journey_recursively`"""
+        if getattr(self, 'jobs', 1) > 1 and getattr(self, 'split', 'context') == 'time':
+            self._rebuild_shards(self.jobs)
+        elif getattr(self, 'jobs', 1) > 1:
+            self._rebuild_partitions(self.jobs)
+        else:
+            self._rebuild_journeys()
+
+        # The file is stored once for all journeys
+        self.journeys.file = self.logpath
+        # A journey whose path is not found is not completed
+        self.journeys.completed[self.journeys.path < 0] = False
+
+    def _rebuild_journeys(self, rootsP: list = None, bindP: bool = False) -> 'latseq_journeys':
+        """Rebuild `journeys` from the input measures of `inputs`, see `rebuild_packets_journey_recursively`
+
+        Args:
+            rootsP (:obj:`list` of int): indices of the input measures to begin journeys, all of them by default
+            bindP (bool): stop a journey as soon as it has global ids, without its forks, see `_partition_inputs`
+
+        Returns:
+            :obj:`latseq_journeys`: the frozen table of the journeys, without their 'file'
+        """
+        self.journeys = dict()  # journeys of the current input measure, by codes
+        journeys = latseq_journeys(self.inputs)
         nb_meas = len(self.inputs)  # number of measure in self.inputs
+        # columns of self.inputs for the search of candidates
+        inputs_ts = self.inputs.ts
+        inputs_dir = self.inputs.dir
+        inputs_src = self.inputs.src
+        src_codes = inputs_src.tolist()
+        dst_codes = self.inputs.dst.tolist()
+        # the rebuild works on the codes of points and identifiers, names are decoded for the output
+        points_symbols = self.inputs.points
+        next_points = {
+            points_symbols.encode(p): frozenset(points_symbols.encode(n) for n in self.points[p]['next'])
+            for p in self.points}
+        paths_automaton = latseq_paths(getattr(self, 'paths', [[], []]), points_symbols)
+        paths_found = paths_automaton.found
+        paths_next = paths_automaton.next
+        out_points = [
+            frozenset(points_symbols.encode(p) for p in self.pointsOutD),
+            frozenset(points_symbols.encode(p) for p in self.pointsOutU)]
+        # is_in[dir][point] : True if the point is an input point for the direction dir
+        is_in = [
+            numpy.array([p in self.pointsInD for p in points_symbols.names], dtype=bool),
+            numpy.array([p in self.pointsInU for p in points_symbols.names], dtype=bool)]
+        duration_to_search_pkt = duration_to_ts(DURATION_TO_SEARCH_PKT, self.inputs.ts_unit)
+        duration_to_search_forks = duration_to_ts(DURATION_TO_SEARCH_FORKS, self.inputs.ts_unit)
+        # adaptive search windows by point code, the fixed ones for the points without `windows`
+        windows = {
+            points_symbols.encode(p): duration_to_ts(w, self.inputs.ts_unit)
+            for p, w in (getattr(self, 'windows', None) or {}).items() if p in points_symbols}
+        next_windows = {}  # search window of the next hop by set of next points
+        ts_list = inputs_ts.tolist() if windows else None  # timestamps to bisect the adaptive windows
+        comparisons = {'compared': 0, 'saved': 0}  # candidates compared, and left out of the adaptive windows
         info_meas = {}
-        list_meas = list(range(nb_meas))  # list of measures not in a journey
+        free_meas = numpy.ones(nb_meas, dtype=bool)  # bitmap of measures not in a journey
+        # fingerprints by (direction, src point), indexed by their local ids on demand
+        point_rows = numpy.argsort(inputs_dir.astype(numpy.int64) * len(points_symbols) + inputs_src, kind='stable')
+        point_keys = (inputs_dir.astype(numpy.int64) * len(points_symbols) + inputs_src)[point_rows]
+        point_bounds = numpy.flatnonzero(numpy.diff(point_keys)) + 1
+        rows_by_point = {
+            divmod(int(point_keys[b]), len(points_symbols)): rows.tolist()
+            for b, rows in zip([0] + point_bounds.tolist(), numpy.split(point_rows, point_bounds)) if len(rows)}
+        point_index = {}
         if VERBOSITY:
             pbar = tqdm(range(nb_meas), file=sys.__stderr__)
         point_added = {}  # point added
         pointer = 0  # base pointer on the measure in self.inputs for the current journey's input
         local_pointer = 0  # pointer on the current tested measure candidate for the current journey
 
-        def _measure_ids_in_journey(p_gids: list, p_lids: list, j_gids: list, j_last_element: dict):
+        def _measure_ids_in_journey(p_gids: dict, p_lids: dict, j_gids: dict, j_last_lids: dict, j_last_id: int):
             """Returns the dict of common identifiers if the measure is in the journey
             Otherwise returns an empty dictionnary
 
             Algorithm:
                 All global identifiers should match.
                 All common identifiers' values should match
-            
+
+            Identifiers are given by codes in `self.inputs.ids`
+
             Arguments:
                 p_gids : Trace global ids
                 p_lids : Trace local ids
                 j_gids : Journey global ids
-                j_last_element : Last traces added to journey
+                j_last_lids : Local ids of the last trace added to journey
+                j_last_id : Index in inputs of the last trace added to journey
 
             Returns:
                 (list, :obj:`dict`): returns
@@ -611,22 +2700,23 @@ class latseq_log:
             res_matched = {}
             # for all local ids in measurement point
             for k_lid in p_lids:
-                if k_lid in j_last_element[6]:  # if the local ids are present in the 2 points
+                if k_lid in j_last_lids:  # if the local ids are present in the 2 points
                     # Case : multiple value for the same identifier
-                    if isinstance(j_last_element[6][k_lid], list):
+                    if isinstance(j_last_lids[k_lid], list):
                         match_local_in_list = False
-                        for v in j_last_element[6][k_lid]:
+                        for v in j_last_lids[k_lid]:
                             if p_lids[k_lid] == v:  # We want only one matches the id
                                 match_local_in_list = True
                                 res_matched[k_lid] = v
                                 # remove the multiple value for input to keep only the one used
-                                j_last_element[6][k_lid] = v
+                                j_last_lids[k_lid] = v
+                                self.inputs.set_local_id(j_last_id, k_lid, v)
                                 break  # for v in j_last_lids[k_lid]
                         if not match_local_in_list:
                             return ()
                     # Case : normal case, one value per identifier
                     else:
-                        if p_lids[k_lid] != j_last_element[6][k_lid]:  # the local id k_lid do not match
+                        if p_lids[k_lid] != j_last_lids[k_lid]:  # the local id k_lid do not match
                             return ()
                         else:
                             res_matched[k_lid] = p_lids[k_lid]
@@ -635,74 +2725,180 @@ class latseq_log:
             else:
                 return ([],res_matched)
 
-        def _get_next(listP: list, endP: int, pointerP: int) -> int:
+        def _get_point_index(dirP: int, pointP: int) -> tuple:
+            """Returns the index of the fingerprints of a src point in a direction, built at the first call
+                [0] (list): sorted indices of the fingerprints with multiple values for a local id
+                [1] (list): (index, local ids) of the other fingerprints
+                [2] (dict): by the set of local ids of the previous hop, the fingerprints by common local ids
+                    and their values, see `_get_candidate_runs`
+            """
+            if (dirP, pointP) not in point_index:
+                multi, single = [], []
+                for r in rows_by_point.get((dirP, pointP), []):
+                    lids = self.inputs.get_local_ids(r)
+                    if any(isinstance(v, list) for v in lids.values()):
+                        multi.append(r)  # its local ids could be changed by set_local_id()
+                    else:
+                        single.append((r, lids))
+                point_index[(dirP, pointP)] = (multi, single, {})
+            return point_index[(dirP, pointP)]
+
+        def _get_candidate_runs(dirP: int, pointP: int, lidsP: dict, beginP: int, endP: int) -> list:
+            """Returns the sorted lists of the fingerprints of pointP in [beginP, endP) whose local ids can match
+            the local ids lidsP of the previous hop, see `_iter_candidates`
+
+            Common local ids and their values are looked up in a table, instead of testing all the fingerprints.
+            Fingerprints with multiple values for a local id are always kept
+            """
+            multi, single, tables = _get_point_index(dirP, pointP)
+            keys = frozenset(lidsP)
+            if keys not in tables:
+                table = {}
+                for r, lids in single:
+                    common = tuple(sorted(k for k in lids if k in keys))
+                    table.setdefault(common, {}).setdefault(tuple(lids[k] for k in common), []).append(r)
+                tables[keys] = table
+            runs = []
+            for common, rows_by_values in tables[keys].items():
+                rows = rows_by_values.get(tuple(lidsP[k] for k in common))
+                if rows:
+                    runs.append(rows[bisect.bisect_left(rows, beginP):bisect.bisect_left(rows, endP)])
+            if multi:
+                runs.append(multi[bisect.bisect_left(multi, beginP):bisect.bisect_left(multi, endP)])
+            return runs
+
+        def _iter_candidates(dirP: int, pointP: int, lidsP: dict, beginP: int, endP: int):
+            """Yields, in order, the fingerprints of pointP in [beginP, endP) whose local ids can match
+            the local ids lidsP of the previous hop. lidsP has only one value by identifier
+            """
+            runs = _get_candidate_runs(dirP, pointP, lidsP, beginP, endP)
+            return heapq.merge(*runs) if len(runs) > 1 else iter(runs[0] if runs else ())
+
+        def _count_candidates(dirP: int, pointsP, lidsP: dict, beginP: int, endP: int) -> int:
+            """Returns the number of fingerprints in [beginP, endP) of the points pointsP, not input points,
+            which would be compared to a journey whose previous hop has the local ids lidsP
+            """
+            if beginP >= endP:
+                return 0
+            if any(isinstance(v, list) for v in lidsP.values()):
+                return int(numpy.count_nonzero(
+                    (inputs_dir[beginP:endP] == dirP) &
+                    ~is_in[dirP][inputs_src[beginP:endP]] &
+                    numpy.isin(inputs_src[beginP:endP], list(pointsP))))
+            return sum(
+                len(r) for point in pointsP if not is_in[dirP][point]
+                for r in _get_candidate_runs(dirP, point, lidsP, beginP, endP))
+
+        def _window_end(lastP: int, pointsP, beginP: int, endP: int) -> int:
+            """Returns the end of the adaptive search window from the measure lastP for the next points pointsP,
+            at most endP, the end of the fixed window. The search begins at beginP
+            """
+            if not windows:
+                return endP
+            if pointsP not in next_windows:
+                next_windows[pointsP] = max(windows.get(p, duration_to_search_pkt) for p in pointsP)
+            return bisect.bisect_left(ts_list, ts_list[lastP] + next_windows[pointsP], beginP, max(beginP, endP))
+
+        def _next_candidate(dirP: int, pointsP: frozenset, lidsP: dict, beginP: int, endP: int):
+            """Returns the first fingerprint in [beginP, endP) of one of the next points pointsP, not an input point,
+            whose local ids can match the local ids lidsP of the previous hop. None if there is no candidate
+            """
+            if any(isinstance(v, list) for v in lidsP.values()):
+                # matching a multiple value changes the previous hop, all fingerprints are tested in order
+                candidates = numpy.flatnonzero(
+                    (inputs_dir[beginP:endP] == dirP) &
+                    ~is_in[dirP][inputs_src[beginP:endP]] &
+                    numpy.isin(inputs_src[beginP:endP], list(pointsP)))
+                return int(candidates[0]) + beginP if len(candidates) else None
+            best = None
+            for point in pointsP:
+                if is_in[dirP][point]:
+                    continue
+                r = next(_iter_candidates(dirP, point, lidsP, beginP, endP if best is None else best), None)
+                if r is not None:
+                    best = r
+            return best
+
+        def _get_next(pointerP: int) -> int:
+            """Returns the index of the next measure not in a journey after pointerP"""
             pointerP += 1
-            while pointerP not in listP and pointerP < endP - 1:
+            while pointerP < nb_meas - 1 and not free_meas[pointerP]:
                 pointerP += 1
             return pointerP
 
-        def _rec_rebuild(pointerP: int, local_pointerP: int, parent_journey_id: int):
-            """rebuild journey from a parent measure
+        def _set_to_list(setP: tuple) -> list:
+            """Returns the list of measures of a journey's set, their indices in inputs
+
+            While journeys are rebuilt, a set is a linked list from its last measure (measure, previous node),
+            the forks of a journey share the nodes of their common prefix
+            """
+            res = []
+            while setP is not None:
+                res.append(setP[0])
+                setP = setP[1]
+            res.reverse()
+            return res
+
+        def _rebuild_journey(pointerP: int, local_pointerP: int, parent_journey_id: int) -> dict:
+            """rebuild journey from a parent measure, without its forks
             Args:
                 pointerP (int): the index in inputs of the parent measure
                 local_pointerP (int): the index in inputs of the current measure candidate for the journey
                 parent_journey_id (int): the id of the current journey
             Returns:
-                bool: if the journey is completed
+                dict: the segmentations found for the measures of the journey, empty if the journey is not completed
+                    dict[measure][brother] : matched local ids of the brother of the measure
             """
             seg_list = {}
             # max local pointer to consider. DEPTH_TO_SEARCH impact the algorithm's speed
             # max_duration_to_search the NEXT fingerprint, not the latency of all journey
             # max_local_pointer = min(local_pointerP + DEPTH_TO_SEARCH_PKT, nb_meas)
-            max_duration_to_search = self.inputs[pointerP][0] + DURATION_TO_SEARCH_PKT
-            # LOOP: the journey is not completed and we still have local_pointer to consider
-            while not self.journeys[parent_journey_id]['completed'] and local_pointerP < nb_meas and self.inputs[local_pointerP][0] < max_duration_to_search:
-                # if local_pointerP not in list_meas:
-                #     print(f"error at removing : {local_pointerP}")
-                #     continue
-                tmp_p = self.inputs[local_pointerP]
-                # Case: Time treshold to complete journey reached
-                # if tmp_p[0] > max_duration_to_search:
-                #     break
-
+            j_dir = self.journeys[parent_journey_id]['dir']
+            max_local_pointer = self.inputs.window(local_pointerP, inputs_ts[pointerP] + duration_to_search_pkt)
+            j_last_id = self.journeys[parent_journey_id]['set'][0]
+            j_last_lids = self.inputs.get_local_ids(j_last_id)
+            next_pointer = local_pointerP
+            # end of the search window of the next hop, from the last measure of the journey
+            hop_pointer = _window_end(j_last_id, self.journeys[parent_journey_id]['next_points'], next_pointer, max_local_pointer)
+            # LOOP: the journey is not completed and we still have candidates to consider
+            while not self.journeys[parent_journey_id]['completed']:
+                if bindP and self.journeys[parent_journey_id]['glob']:
+                    break
                 # Case: wrong direction
-                if tmp_p[1] != self.journeys[parent_journey_id]['dir']:
-                    local_pointerP = _get_next(list_meas, nb_meas, local_pointerP)
-                    continue
-
                 # Case: the measurement point is an input
-                if tmp_p[1] == 0:  # Downlink
-                    if tmp_p[2] in self.pointsInD:
-                        local_pointerP = _get_next(list_meas, nb_meas, local_pointerP)
-                        continue
-                else:  # Uplink
-                    if tmp_p[2] in self.pointsInU:
-                        local_pointerP = _get_next(list_meas, nb_meas, local_pointerP)
-                        continue
-
                 # Case: the measurement point is too far away
-                # and tmp_p[2] not in self.journeys[parent_journey_id]['last_points']
-                if tmp_p[2] not in self.journeys[parent_journey_id]['next_points']:
-                    local_pointerP = _get_next(list_meas, nb_meas, local_pointerP)
-                    continue
+                # Case: the local ids do not match the last point of the journey
+                local_pointerP = _next_candidate(
+                    j_dir,
+                    self.journeys[parent_journey_id]['next_points'],
+                    j_last_lids,
+                    next_pointer,
+                    hop_pointer)
+                if local_pointerP is None:
+                    if hop_pointer < max_local_pointer:
+                        comparisons['saved'] += _count_candidates(
+                            j_dir, self.journeys[parent_journey_id]['next_points'], j_last_lids, hop_pointer, max_local_pointer)
+                    break
+                next_pointer = local_pointerP + 1
 
                 # Case: Concatenation
-                # Do not list_meas.remove(local_pointerP) because of segmentations
+                # Do not free_meas[local_pointerP] = False because of segmentations
 
                 # Case: Normal
                 # Here get the first occurence who is matching
+                comparisons['compared'] += 1
                 matched_ids = _measure_ids_in_journey(
-                    tmp_p[5],
-                    tmp_p[6],
+                    self.inputs.get_glob_ids(local_pointerP),
+                    self.inputs.get_local_ids(local_pointerP),
                     self.journeys[parent_journey_id]['glob'],
-                    self.inputs[self.journeys[parent_journey_id]['set'][-1][0]]
+                    j_last_lids,
+                    j_last_id
                 )
                 if not matched_ids:
-                    local_pointerP = _get_next(list_meas, nb_meas, local_pointerP)
                     continue
 
                 # Case: find a match
-                # list_meas.remove(local_pointerP)
+                # free_meas[local_pointerP] = False
                 # sys.stderr.write(f"Add {local_pointerP} to {parent_journey_id}\n")
                 logging.debug(f"Add {local_pointerP} to {parent_journey_id}")
                 if local_pointerP not in point_added:
@@ -711,129 +2907,161 @@ class latseq_log:
                     point_added[local_pointerP].append(parent_journey_id)
                 if matched_ids[0]:
                     self.journeys[parent_journey_id]['glob'].update(matched_ids[0])
-                seg_local_pointer = _get_next(list_meas, nb_meas, local_pointerP)
                 # Case : search for segmentation
                 # Find all forks possible
                 # seg local pointer to consider for segmentations.
-                #   DEPTH_TO_SEARCH_FORKS impact the algorithm's complexity
-                # max_seg_pointer = min(local_pointerP + DEPTH_TO_SEARCH_FORKS, nb_meas - 1)
-                max_seg_duration = tmp_p[0] + DURATION_TO_SEARCH_FORKS
+                #   DURATION_TO_SEARCH_FORKS impact the algorithm's complexity
+                seg_local_pointer = local_pointerP + 1
+                max_seg_pointer = self.inputs.window(seg_local_pointer, inputs_ts[local_pointerP] + duration_to_search_forks)
+                # Case: wrong direction
+                # Case: the src point are different, not a candidate for segmentation
+                if any(isinstance(v, list) for v in j_last_lids.values()):
+                    seg_runs = [(numpy.flatnonzero(
+                        (inputs_dir[seg_local_pointer:max_seg_pointer] == j_dir) &
+                        (inputs_src[seg_local_pointer:max_seg_pointer] == inputs_src[local_pointerP])) + seg_local_pointer).tolist()]
+                else:  # Case: the local ids do not match the last point of the journey
+                    seg_runs = _get_candidate_runs(j_dir, src_codes[local_pointerP], j_last_lids, seg_local_pointer, max_seg_pointer)
+                # Case: a brother is not further than the latency to the point, out of its adaptive window
+                if src_codes[local_pointerP] in windows:
+                    seg_pointer = bisect.bisect_left(
+                        ts_list, ts_list[local_pointerP] + windows[src_codes[local_pointerP]], seg_local_pointer, max_seg_pointer)
+                    seg_cuts = [bisect.bisect_left(r, seg_pointer) for r in seg_runs]
+                    comparisons['saved'] += sum(len(r) - c for r, c in zip(seg_runs, seg_cuts))
+                    seg_runs = [r[:c] for r, c in zip(seg_runs, seg_cuts)]
+                seg_candidates = heapq.merge(*seg_runs) if len(seg_runs) > 1 else iter(seg_runs[0] if seg_runs else ())
                 # LOOP: we still have a seg local pointer to consider
-                while seg_local_pointer < nb_meas and self.inputs[seg_local_pointer][0] < max_seg_duration:
-                    seg_tmp_p = self.inputs[seg_local_pointer]
-                    # Case: time treshold reached
-                    # if seg_tmp_p[0] > max_seg_duration:
-                    #    break
-
-                    # Case: wrong direction
-                    if seg_tmp_p[1] != self.journeys[parent_journey_id]['dir']:
-                        seg_local_pointer = _get_next(list_meas, nb_meas, seg_local_pointer)
-                        continue
-                    # Case: the src point are different, not a candidate for segmentation
-                    if seg_tmp_p[2] != tmp_p[2]:
-                        seg_local_pointer = _get_next(list_meas, nb_meas, seg_local_pointer)
-                        continue
-
+                for seg_local_pointer in seg_candidates:
+                    comparisons['compared'] += 1
                     seg_matched_ids = _measure_ids_in_journey(
-                        seg_tmp_p[5],
-                        seg_tmp_p[6],
+                        self.inputs.get_glob_ids(seg_local_pointer),
+                        self.inputs.get_local_ids(seg_local_pointer),
                         self.journeys[parent_journey_id]['glob'],
-                        self.inputs[self.journeys[parent_journey_id]['set'][-1][0]])
+                        j_last_lids,
+                        j_last_id)
                     # Case: find a match, then a segmentation
                     if seg_matched_ids:
                         if local_pointerP not in seg_list:
                             seg_list[local_pointerP] = {}
                         seg_list[local_pointerP][seg_local_pointer] = seg_matched_ids[1]
                         logging.debug(f"Seg {seg_local_pointer} of {local_pointerP} to {parent_journey_id}")
-                        seg_local_pointer = _get_next(list_meas, nb_meas, seg_local_pointer)
-                        continue
-                    seg_local_pointer = _get_next(list_meas, nb_meas, seg_local_pointer)
                 # end while seg_local_pointer < nb_meas
 
                 # At this point, we have completed all the possible fork
-                self.journeys[parent_journey_id]['set'].append((
-                    self.inputs.index(tmp_p),
-                    tmp_p[0],
-                    f"{tmp_p[2]}--{tmp_p[3]}"))
+                self.journeys[parent_journey_id]['set'] = (local_pointerP, self.journeys[parent_journey_id]['set'])
                 self.journeys[parent_journey_id]['set_ids'].update(matched_ids[1])
+                j_last_id = local_pointerP
+                j_last_lids = self.inputs.get_local_ids(j_last_id)
 
                 # Try to find a path id
-                if isinstance(self.journeys[parent_journey_id]['path'], dict):
-                    paths_to_remove = []
-                    for path in self.journeys[parent_journey_id]['path']:
-                        if self.paths[self.journeys[parent_journey_id]['dir']][path][self.journeys[parent_journey_id]['path'][path]] != tmp_p[2]:
-                            paths_to_remove.append(path)
-                        else:
-                            if len(self.paths[self.journeys[parent_journey_id]['dir']][path]) > 1:
-                                self.journeys[newid]['path'][path] += 1
-                    for ptorm in paths_to_remove:
-                        self.journeys[parent_journey_id]['path'].pop(ptorm)
-                    if len(self.journeys[parent_journey_id]['path']) == 1:  # We find the path id
-                        tmp_path = list(self.journeys[newid]['path'].keys())[0]
+                if paths_found[self.journeys[parent_journey_id]['path']] is None:
+                    tmp_path = paths_next[self.journeys[parent_journey_id]['path']].get(src_codes[local_pointerP], 0)
+                    if paths_found[tmp_path] is not None:  # We find the path id
                         del self.journeys[parent_journey_id]['path']
-                        self.journeys[parent_journey_id]['path'] = tmp_path
+                    self.journeys[parent_journey_id]['path'] = tmp_path
 
-                if tmp_p[3] in tmpOut:  # this is the last input before the great farewell
+                if dst_codes[local_pointerP] in out_points[j_dir]:  # this is the last input before the great farewell
                     self.journeys[parent_journey_id]['next_points'] = None
-                    self.journeys[parent_journey_id]['ts_out'] = tmp_p[0]
                     self.journeys[parent_journey_id]['completed'] = True
                     # properties of journey inherit from propertiesof last segment
-                    self.journeys[parent_journey_id]['properties'] = tmp_p[4].copy()
+                    self.journeys[parent_journey_id]['properties'] = local_pointerP
                 else:  # continue to rebuild journey
-                    self.journeys[parent_journey_id]['next_points'] = self.points[tmp_p[2]]['next']
-                    local_pointerP = _get_next(list_meas, nb_meas, local_pointerP)
-            # end while local_pointerP < nb_meas
-
-            # Case: We finished to rebuild the first journey,
-            #   We find segmentation for one or more points
-            #   Retrieves all point of the first journey
-            #   If brother(s) for a point for this first journey
-            #   rebuild new journey from this brother to the end
-            #   Looks like a tree
-            if seg_list and self.journeys[parent_journey_id]['completed']:
-                for p in self.journeys[parent_journey_id]['set']:
-                    if p[0] in seg_list:  # There is a brother
-                        # For all brothers
-                        for s in seg_list[p[0]]:  # seg_local_pointer : seg_matched_ids
-                            # Create a new path
-                            # TODO: what to do when the value is exactly the same ?
-                            seg_p = self.inputs[s]
-                            segid = len(self.journeys)
-                            self.journeys[segid] = deepcopy(self.journeys[parent_journey_id])
-                            self.journeys[segid]['set_ids']['uid'] = str(segid)
-                            # Remove all elements after p
-                            del self.journeys[segid]['set'][self.journeys[segid]['set'].index(p):]
-                            self.journeys[segid]['set'].append((
-                                s,
-                                seg_p[0],
-                                f"{seg_p[2]}--{seg_p[3]}"))
-                            self.journeys[segid]['completed'] = False
-                            self.journeys[segid]['set_ids'].update(seg_list[p[0]][s])
-                            # sys.stderr.write(f"Add {s} to {segid}\n")
-                            if s not in point_added:
-                                point_added[s] = [segid]
-                            else:
-                                point_added[s].append(segid)
-                            # list_meas.remove(seg_local_pointer)
-                            if seg_p[3] in tmpOut:  # this is the last input before the great farewell
-                                self.journeys[segid]['next_points'] = None
-                                self.journeys[segid]['ts_out'] = seg_p[0]
-                                self.journeys[segid]['completed'] = True
-                                continue
-                            self.journeys[segid]['next_points'] = self.points[seg_p[2]]['next']
-                            seg_local_pointer_next = _get_next(list_meas, nb_meas, s)
-                            _rec_rebuild(pointerP, seg_local_pointer_next, segid)
-                            #pointerP = _get_next(list_meas, nb_meas, pointerP)
-
-            return self.journeys[parent_journey_id]['completed']
-
-        # LOOP: for all inputs, try to build the journeys
-        while pointer < nb_meas:
-            # current_i += 1
-            # if current_i % 100 == 0:
-            #     print(f"{current_i} / {total_i}")
-            # if pointer > 2000:
-            #     break
+                    self.journeys[parent_journey_id]['next_points'] = next_points[src_codes[local_pointerP]]
+                    hop_pointer = _window_end(j_last_id, self.journeys[parent_journey_id]['next_points'], next_pointer, max_local_pointer)
+            # end for local_pointerP in candidates
+            if not self.journeys[parent_journey_id]['completed']:
+                return {}
+            return seg_list
+
+        def _get_brothers(parent_journey_id: int, seg_list: dict):
+            """Yields the forks of a completed journey, in the order of its set
+
+            Yields:
+                (tuple, int, int, dict): the set of the parent before the measure, the measure,
+                    its brother and the matched local ids of the brother
+            """
+            if not seg_list:
+                return
+            nodes = []
+            node = self.journeys[parent_journey_id]['set']
+            while node is not None:
+                nodes.append(node)
+                node = node[1]
+            nodes.reverse()
+            prefixes = {}  # the set before the first occurrence of each measure
+            for n in nodes:
+                prefixes.setdefault(n[0], n[1])
+            for n in nodes:
+                p = n[0]
+                if p in seg_list:  # There is a brother
+                    # For all brothers
+                    for s in seg_list[p]:  # seg_local_pointer : seg_matched_ids
+                        yield prefixes[p], p, s, seg_list[p][s]
+
+        def _rebuild(pointerP: int, local_pointerP: int, journey_id: int):
+            """rebuild journey from an input measure, then all the journeys forked from it
+
+            Forks make a tree walked depth first with a stack of the brothers to consider, without recursion.
+            A fork shares the set of its parent before the measure it replaces
+
+            Args:
+                pointerP (int): the index in inputs of the input measure
+                local_pointerP (int): the index in inputs of the first measure candidate for the journey
+                journey_id (int): the id of the journey
+            """
+            seg_list = _rebuild_journey(pointerP, local_pointerP, journey_id)
+            if bindP:
+                return
+            stack = [(journey_id, _get_brothers(journey_id, seg_list))]
+            while stack:
+                parent_journey_id, brothers = stack[-1]
+                brother = next(brothers, None)
+                if brother is None:
+                    stack.pop()
+                    continue
+                # Case: We finished to rebuild the parent journey,
+                #   We find segmentation for one or more points
+                #   If brother(s) for a point for this journey
+                #   rebuild new journey from this brother to the end
+                #   Looks like a tree
+                prefix, p, s, seg_matched_ids = brother
+                # Create a new path
+                # TODO: what to do when the value is exactly the same ?
+                segid = len(journeys) + len(self.journeys)
+                self.journeys[segid] = {
+                    k: v.copy() if isinstance(v, dict) else v
+                    for k, v in self.journeys[parent_journey_id].items()}
+                # Keep all elements before p
+                self.journeys[segid]['set'] = (s, prefix)
+                self.journeys[segid]['completed'] = False
+                self.journeys[segid]['set_ids'].update(seg_matched_ids)
+                # sys.stderr.write(f"Add {s} to {segid}\n")
+                if s not in point_added:
+                    point_added[s] = [segid]
+                else:
+                    point_added[s].append(segid)
+                # free_meas[s] = False
+                if dst_codes[s] in out_points[self.journeys[segid]['dir']]:  # this is the last input before the great farewell
+                    self.journeys[segid]['next_points'] = None
+                    self.journeys[segid]['completed'] = True
+                    continue
+                self.journeys[segid]['next_points'] = next_points[src_codes[s]]
+                seg_local_pointer_next = _get_next(s)
+                stack.append((segid, _get_brothers(segid, _rebuild_journey(pointerP, seg_local_pointer_next, segid))))
+                #pointerP = _get_next(pointerP)
+
+        def _store_journeys():
+            """Move the journeys rebuilt from an input measure to `journeys`, the ones of the next input measure can not change them"""
+            for k, j in self.journeys.items():
+                if 'path' in j:
+                    j['path'] = paths_automaton.get_path(j['path'])
+                journeys.append(j, _set_to_list(j['set']))
+            self.journeys.clear()
+
+        # Case: the current measure is not an input measure
+        in_pointers = numpy.flatnonzero(numpy.where(inputs_dir == 0, is_in[0][inputs_src], is_in[1][inputs_src]))
+        # LOOP: for all input measures, try to build the journeys
+        for pointer in (in_pointers.tolist() if rootsP is None else rootsP):
+            _store_journeys()
             if VERBOSITY:
                 pbar.n = pointer
                 pbar.refresh()
@@ -846,92 +3074,367 @@ class latseq_log:
             # p[5] dict : global ids
             # p[6] dict : local ids
 
-            # Get the correct set of IN/OUT for the current direction
-            if p[1] == 0:  # Downlink
-                tmpIn = self.pointsInD
-                tmpOut = self.pointsOutD
-            else:  # Uplink
-                tmpIn = self.pointsInU
-                tmpOut = self.pointsOutU
-
-            # Case: the current measure is not an input measure, continue
-            if p[2] not in tmpIn:
-                pointer = _get_next(list_meas, nb_meas, pointer)
-                continue
-
             # this is a packet in arrival, create a new journey
-            newid = len(self.journeys)
+            newid = len(journeys) + len(self.journeys)
             self.journeys[newid] = dict()
             self.journeys[newid]['dir'] = p[1]  # direction for this journey
-            self.journeys[newid]['glob'] = p[5]  # global ids as a first filter
-            self.journeys[newid]['ts_in'] = p[0]  # timestamp of arrival
-            self.journeys[newid]['set'] = list()  # set of measurements ids and properties (tuple())
+            self.journeys[newid]['glob'] = self.inputs.get_glob_ids(pointer)  # global ids as a first filter
+            # set of measurements ids, linked from the last one, see `_set_to_list`
             # self.journeys[newid]['set'][0] : id dans inputs
-            # self.journeys[newid]['set'][1] : ts for this input
-            # self.journeys[newid]['set'][2] : corresponding segment
-            self.journeys[newid]['set'].append((
-                self.inputs.index(p),
-                p[0],
-                f"{p[2]}--{p[3]}"))
-            self.journeys[newid]['set_ids'] = dict()  # dict of local ids
-            self.journeys[newid]['set_ids'] = {'uid': str(newid)}
-            self.journeys[newid]['set_ids'].update(p[6])
-            self.journeys[newid]['next_points'] = self.points[p[2]]['next']  # list of possible next points
-            if self.journeys[newid]['set'][-1][0] not in point_added:
-                point_added[self.journeys[newid]['set'][-1][0]] = [newid]
+            self.journeys[newid]['set'] = (pointer, None)
+            self.journeys[newid]['set_ids'] = dict()  # dict of local ids, the uid is the id of the journey
+            self.journeys[newid]['set_ids'].update(self.inputs.get_local_ids(pointer))
+            self.journeys[newid]['next_points'] = next_points[src_codes[pointer]]  # set of possible next points
+            if pointer not in point_added:
+                point_added[pointer] = [newid]
             # path number of this journey according to self.paths
             if not hasattr(self, 'paths'):  # Paths not construct, it should because it is done at init
                 self.journeys[newid]['completed'] = False
                 continue
-            self.journeys[newid]['path'] = dict()  # list of index on path lists
-            for path in range(len(self.paths[self.journeys[newid]['dir']])):
-                self.journeys[newid]['path'][path] = 0
-            paths_to_remove = []
-            for path in self.journeys[newid]['path']:
-                if self.paths[self.journeys[newid]['dir']][path][self.journeys[newid]['path'][path]] != p[2]:
-                    paths_to_remove.append(path)
-                else:
-                    if len(self.paths[self.journeys[newid]['dir']][path]) > 1:
-                        self.journeys[newid]['path'][path] += 1
-            for ptorm in paths_to_remove:
-                self.journeys[newid]['path'].pop(ptorm)
-            if len(self.journeys[newid]['path']) == 1:  # We find the path id
-                tmp_path = list(self.journeys[newid]['path'].keys())[0]
-                del self.journeys[newid]['path']
-                self.journeys[newid]['path'] = tmp_path
+            # state in `paths_automaton` while rebuilding, the path id once found
+            self.journeys[newid]['path'] = paths_next[paths_automaton.start[p[1]]].get(src_codes[pointer], 0)
             # self.journeys[newid]['last_points'] = [p[2]]
             self.journeys[newid]['completed'] = False  # True if the journey is complete
-            # list_meas.remove(pointer)  # Remove from the list
-            local_pointer = _get_next(list_meas, nb_meas, pointer)
+            # free_meas[pointer] = False  # Remove from the bitmap
+            local_pointer = _get_next(pointer)
             # Try to rebuild the journey from this packet
             # Assumption: the measures are ordered by timestamp,
             #   means that the next point is necessary after the current
             #   input point in the list of inputs
 
             # TODO : Give a list of measurement to consider instead of local pointer only ?
-            _rec_rebuild(pointer, local_pointer, newid)
-            pointer = _get_next(list_meas, nb_meas, pointer)
-
-        # Remove all useless journeys dict keys for the next
-        tmp_file = self.logpath
-        for k in self.journeys:
-            self.journeys[k]['uid'] = self.journeys[k]['set_ids']['uid']
-            del self.journeys[k]['next_points']
-            self.journeys[k]['file'] = tmp_file
-            if isinstance(self.journeys[k]['path'], dict):
-                self.journeys[k]['completed'] = False
+            _rebuild(pointer, local_pointer, newid)
+
+        _store_journeys()
         if VERBOSITY:
             pbar.close()
-        # Store latseq_logs object
-        self.store_object()
-        # build out_journeys
-        self._build_out_journeys()
+        if windows:
+            logging.info(f"latseq_log._rebuild_journeys() : {comparisons['compared']} candidates compared, {comparisons['saved']} saved by the adaptive search windows")
+        else:
+            logging.info(f"latseq_log._rebuild_journeys() : {comparisons['compared']} candidates compared")
+        self.journeys = journeys.freeze()
+        return self.journeys
+
+    def _get_partition(self, rowsP=None):
+        """Get a latseq_log with some fingerprints of `inputs`, to rebuild their journeys in a worker process
+
+        Args:
+            rowsP (:obj:`numpy.ndarray` of int64): sorted indices of the fingerprints, all of them by default
+
+        Returns:
+            :obj:`latseq_log`: the latseq_log of the partition, with only what `_rebuild_journeys` needs
+        """
+        part = latseq_log.__new__(latseq_log)
+        part.logpath = self.logpath
+        part.inputs = self.inputs if rowsP is None else self.inputs.take(rowsP)
+        part.points = self.points
+        part.pointsInD = self.pointsInD
+        part.pointsOutD = self.pointsOutD
+        part.pointsInU = self.pointsInU
+        part.pointsOutU = self.pointsOutU
+        part.paths = self.paths
+        part.windows = getattr(self, 'windows', None)
+        return part
+
+    def _get_in_pointers(self):
+        """Get the indices in `inputs` of the input measures, where journeys begin
+
+        Returns:
+            :obj:`numpy.ndarray` of int64: sorted indices of the fingerprints from an input point of their direction
+        """
+        names = self.inputs.points.names
+        is_in = numpy.array([[p in self.pointsInD for p in names], [p in self.pointsInU for p in names]], dtype=bool)
+        return numpy.flatnonzero(is_in[self.inputs.dir, self.inputs.src])
+
+    def _get_multi_values(self):
+        """Get the fingerprints with multiple values for a local id, which a journey can narrow to one value
+
+        Returns:
+            :obj:`numpy.ndarray` of bool: True for the fingerprints with multiple values for a local id
+        """
+        nb_ids = len(self.inputs.ids)
+        offsets, keys, _ = self.inputs.local_ids
+        pairs = numpy.repeat(numpy.arange(len(self.inputs), dtype=numpy.int64), numpy.diff(offsets)) * nb_ids + keys
+        pairs, counts = numpy.unique(pairs, return_counts=True)
+        multi = numpy.zeros(len(self.inputs), dtype=bool)
+        multi[pairs[counts > 1] // nb_ids] = True
+        return multi
+
+    def _partition_inputs(self, nbP: int, poolP: ProcessPoolExecutor) -> tuple:
+        """Cut `inputs` by global context, for a rebuild of the partitions by a pool of processes
+
+        A measure joins a journey only if its global ids are in the ones of the journey,
+        see `_measure_ids_in_journey`. Contexts whose global ids are included one in the other are kept together,
+        then the contexts are dealt to nbP partitions by number of fingerprints.
+
+        Fingerprints without global ids, like the ones of phy.in.ant with an empty context, can join a journey
+        of any context: they are in all the partitions. A journey which begins by such a fingerprint takes
+        the global ids of the first measure with global ids it matches. It is rebuilt on all `inputs` until then
+        by the pool, to know its partition. A journey which never gets global ids is done at this point.
+
+        `inputs` is not cut when the journeys of different partitions could depend on each other:
+            a fingerprint without global ids has multiple values for a local id, narrowed by the journeys of any context
+            a src point has fingerprints with and without global ids, a journey could fork to another context
+            a fingerprint with multiple values for a local id follows a point without global ids,
+                it could be narrowed before a journey gets its global ids
+            a journey without global ids is completed, its forks could get any context
+
+        Args:
+            nbP (int): maximum number of partitions
+            poolP (:obj:`ProcessPoolExecutor`): pool of processes
+
+        Returns:
+            tuple: None if `inputs` is not cut
+                [0] (:obj:`list` of tuple): the partitions
+                    [0] (:obj:`numpy.ndarray` of int64): sorted indices in `inputs` of the fingerprints of the partition
+                    [1] (:obj:`list` of int): sorted indices in `inputs` of the input measures of its journeys
+                [1] (:obj:`list` of tuple): (store, ids) of the journeys which never get global ids
+        """
+        nb_meas = len(self.inputs)
+        nb_points = len(self.inputs.points)
+        # context of each fingerprint, -1 without global ids
+        contexts = []  # frozenset of (id code, value) by context
+        row_contexts = numpy.full(nb_meas, -1, dtype=numpy.int64)
+        offsets, keys, values = self.inputs.glob_ids
+        lengths = numpy.diff(offsets)
+        for length in numpy.unique(lengths[lengths > 0]).tolist():
+            rows = numpy.flatnonzero(lengths == length)
+            gather = offsets[rows][:, None] + numpy.arange(length)
+            pairs = numpy.stack([keys[gather].astype(numpy.int64), values[gather]], axis=2).reshape(len(rows), 2 * length)
+            uniques, inverse = numpy.unique(pairs, axis=0, return_inverse=True)
+            row_contexts[rows] = inverse.reshape(-1) + len(contexts)
+            contexts.extend(frozenset(zip(u[0::2], u[1::2])) for u in uniques.tolist())
+        unbound = row_contexts < 0
+        multi = self._get_multi_values()
+        point_keys = self.inputs.dir.astype(numpy.int64) * nb_points + self.inputs.src
+        unbound_points = numpy.unique(point_keys[unbound]).tolist()
+        follow_points = [
+            d * nb_points + self.inputs.points.encode(n)
+            for d, p in (divmod(k, nb_points) for k in unbound_points)
+            for n in self.points.get(self.inputs.points.decode(p), {}).get('next', [])]
+        if (multi & unbound).any():
+            logging.info("latseq_log._partition_inputs() : a fingerprint without global ids has multiple values for a local id")
+            return None
+        if numpy.isin(point_keys[~unbound], unbound_points).any():
+            logging.info("latseq_log._partition_inputs() : a point has fingerprints with and without global ids")
+            return None
+        if numpy.isin(point_keys[multi], follow_points).any():
+            logging.info("latseq_log._partition_inputs() : a fingerprint with multiple values for a local id follows a point without global ids")
+            return None
+        # input measures and the contexts of their journeys
+        roots = self._get_in_pointers()
+        root_contexts = row_contexts[roots]
+        journeys = []
+        chunks = [c.tolist() for c in numpy.array_split(roots[root_contexts < 0], nbP) if len(c)]
+        if chunks:
+            context_codes = {c: i for i, c in enumerate(contexts)}
+            runs = poolP.map(
+                latseq_log._rebuild_partition,
+                [self._get_partition()] * len(chunks),
+                chunks,
+                [True] * len(chunks))
+            for run_journeys, _ in runs:
+                run_journeys.inputs = self.inputs
+                unbound_journeys = []
+                for k in run_journeys:
+                    glob = run_journeys.get_glob_ids(k)
+                    if glob:
+                        root_contexts[numpy.searchsorted(roots, run_journeys.sets[1][run_journeys.sets[0][k]])] = context_codes[frozenset(glob.items())]
+                    elif run_journeys.completed[k]:
+                        logging.info("latseq_log._partition_inputs() : a journey without global ids is completed")
+                        return None
+                    else:  # it has no forks
+                        unbound_journeys.append(k)
+                journeys.append((run_journeys, unbound_journeys))
+        # contexts included one in the other are in the same component. A context which includes another one
+        # has all its (id code, value) pairs, then a context is only compared to the contexts of its least shared pair
+        by_pair = dict()  # contexts by (id code, value)
+        for c, context in enumerate(contexts):
+            for pair in context:
+                by_pair.setdefault(pair, []).append(c)
+        components = list(range(len(contexts)))
+
+        def _find(c: int) -> int:
+            while components[c] != c:
+                components[c] = components[components[c]]
+                c = components[c]
+            return c
+        for a, context in enumerate(contexts):
+            others = min((by_pair[pair] for pair in context), key=len)
+            if len(others) == 1:  # no other context has this pair, none includes this context
+                continue
+            for b in others:
+                if b != a and context <= contexts[b]:
+                    components[_find(a)] = _find(b)
+        components = numpy.array([_find(c) for c in range(len(contexts))], dtype=numpy.int64)
+        # deal the components, the largest first, to the partition with the fewest fingerprints
+        sizes = numpy.bincount(components[row_contexts[~unbound]], minlength=len(contexts))
+        loads = [0] * nbP
+        partition_of = numpy.zeros(len(contexts) + 1, dtype=numpy.int64)
+        for c in sorted(numpy.unique(components).tolist(), key=lambda c: (-sizes[c], c)):
+            partition_of[c] = loads.index(min(loads))
+            loads[partition_of[c]] += sizes[c]
+        partition_of[:-1] = partition_of[components]  # by context
+        partition_of[-1] = -1  # without global ids
+        row_partitions = partition_of[row_contexts]
+        root_partitions = partition_of[root_contexts]
+        partitions = [
+            (numpy.flatnonzero(unbound | (row_partitions == p)), roots[root_partitions == p].tolist())
+            for p in range(nbP)]
+        return ([p for p in partitions if p[1]], journeys)
+
+    def _rebuild_partitions(self, nbP: int):
+        """Rebuild `journeys` from the partitions of `_partition_inputs` with a pool of nbP processes,
+        in this process if `inputs` is not cut
+
+        Args:
+            nbP (int): number of processes
+        """
+        with ProcessPoolExecutor(max_workers=nbP) as pool:
+            partitions = self._partition_inputs(nbP, pool)
+            if partitions is None:
+                self._rebuild_journeys()
+                return
+            partitions, journeys = partitions
+            runs = list(pool.map(
+                latseq_log._rebuild_partition,
+                [self._get_partition(p[0]) for p in partitions],
+                [numpy.searchsorted(p[0], p[1]).tolist() for p in partitions]))
+        self._merge_partitions(partitions, runs, journeys)
+
+    def _shard_inputs(self, nbP: int) -> list:
+        """Cut `inputs` in time, for a rebuild of the shards by a pool of processes
+
+        A shard rebuilds the journeys whose input measure is in its range of `inputs`,
+        then it has the fingerprints up to an overlap after its last input measure:
+        a journey only has measures in the `DURATION_TO_SEARCH_PKT` after its input measure,
+        and their segmentations in the `DURATION_TO_SEARCH_FORKS` after them.
+        A journey whose input measure is in the overlap is rebuilt only by the next shard.
+
+        Shards have about the same number of input measures. A cut is moved to a close place,
+        if any, without fingerprint with multiple values for a local id in the overlap before it,
+        then the journeys of a shard can not narrow the fingerprints of the next one
+
+        Args:
+            nbP (int): maximum number of shards
+
+        Returns:
+            :obj:`list` of tuple: the shards
+                [0] (:obj:`numpy.ndarray` of int64): indices in `inputs` of the fingerprints of the shard, consecutive
+                [1] (:obj:`list` of int): sorted indices in `inputs` of the input measures of its journeys
+        """
+        nb_meas = len(self.inputs)
+        ts = self.inputs.ts
+        overlap = duration_to_ts(DURATION_TO_SEARCH_PKT + DURATION_TO_SEARCH_FORKS, self.inputs.ts_unit)
+        roots = self._get_in_pointers()
+        if len(roots) < 2:
+            return []
+        # quiet[c - 1] : True if no fingerprint with multiple values is in the overlap after the fingerprint c - 1
+        multi = numpy.flatnonzero(self._get_multi_values())
+        next_multi = numpy.searchsorted(multi, numpy.arange(1, nb_meas))
+        quiet = next_multi == len(multi)
+        quiet[~quiet] = ts[multi[next_multi[~quiet]]] >= ts[:-1][~quiet] + overlap
+        quiet_cuts = numpy.flatnonzero(quiet) + 1
+        cuts = [0]
+        for k in range(1, nbP):
+            cut = int(roots[len(roots) * k // nbP])
+            if len(quiet_cuts):  # the closest quiet cut in a quarter of a shard
+                q = numpy.searchsorted(quiet_cuts, cut)
+                close = [int(quiet_cuts[i]) for i in (q - 1, q) if 0 <= i < len(quiet_cuts)]
+                close = min(close, key=lambda c: abs(c - cut))
+                if abs(close - cut) <= nb_meas // nbP // 4:
+                    cut = close
+            if cut > cuts[-1]:
+                cuts.append(cut)
+        cuts.append(nb_meas)
+        shards = []
+        for begin, end in zip(cuts[:-1], cuts[1:]):
+            shard_roots = roots[(roots >= begin) & (roots < end)]
+            if not len(shard_roots):
+                continue
+            end = max(end, int(numpy.searchsorted(ts, ts[shard_roots[-1]] + overlap, side='left')))
+            shards.append((numpy.arange(begin, end, dtype=numpy.int64), shard_roots.tolist()))
+        return shards
+
+    def _rebuild_shards(self, nbP: int):
+        """Rebuild `journeys` from the shards of `_shard_inputs` with a pool of nbP processes
+
+        Shards are stitched in order: a shard whose fingerprints have been narrowed by the journeys
+        of the previous shards is rebuilt again in this process from these values,
+        then the result is the same as the one of the rebuild in this process
+
+        Args:
+            nbP (int): number of processes
+        """
+        shards = self._shard_inputs(nbP)
+        if len(shards) < 2:
+            self._rebuild_journeys()
+            return
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            runs = list(pool.map(
+                latseq_log._rebuild_partition,
+                [self._get_partition(s[0]) for s in shards],
+                [(numpy.array(s[1]) - s[0][0]).tolist() for s in shards]))
+        narrowed = {}  # values kept for local identifiers by the journeys of the stitched shards
+        for k, (rows, roots) in enumerate(shards):
+            begin, end = int(rows[0]), int(rows[-1]) + 1
+            incoming = {
+                r: ids for r, ids in narrowed.items()
+                if begin <= r < end and ids != self.inputs.local_overrides.get(r, {})}
+            if incoming:
+                logging.info(f"latseq_log._rebuild_shards() : shard {k} rebuilt again with {len(incoming)} narrowed fingerprints")
+                part = self._get_partition(rows)
+                for r, ids in incoming.items():
+                    for key, v in ids.items():
+                        part.inputs.set_local_id(r - begin, key, v)
+                runs[k] = latseq_log._rebuild_partition(part, [r - begin for r in roots])
+            for i, ids in runs[k][1].items():
+                narrowed.setdefault(begin + i, {}).update(ids)
+        self._merge_partitions(shards, runs)
+
+    def _merge_partitions(self, partitionsP: list, runsP: list, journeysP: list = None):
+        """Merge the journeys rebuilt by partitions of `inputs` into `journeys`
+
+        Journeys are numbered as in the rebuild in this process, by input measure then in the order of their forks,
+        then their uid does not depend on the number of `jobs`.
+        The values kept for local identifiers with multiple values are reported to `inputs`
+
+        Args:
+            partitionsP (:obj:`list` of tuple): (fingerprints, input measures) of each partition
+            runsP (:obj:`list` of tuple): (journeys, values kept for local identifiers) of each partition,
+                see `_rebuild_partition`
+            journeysP (:obj:`list` of tuple): (store, ids) of journeys already in indices of `inputs`
+        """
+        runs = [(store, ks, None) for store, ks in (journeysP if journeysP is not None else [])]
+        for (rows, _), (run_journeys, local_overrides) in zip(partitionsP, runsP):
+            runs.append((run_journeys, None, rows))
+            rows = rows.tolist()
+            for i, ids in local_overrides.items():
+                for k, v in ids.items():
+                    self.inputs.set_local_id(rows[i], k, v)
+        self.journeys = latseq_journeys(self.inputs).merge(runs)
+
+    @staticmethod
+    def _rebuild_partition(lseqP, rootsP: list, bindP: bool = False) -> tuple:
+        """Rebuild the journeys of a partition, run in a worker process by `_rebuild_partitions`
+
+        Args:
+            lseqP (:obj:`latseq_log`): latseq_log of the partition, see `_get_partition`
+            rootsP (:obj:`list` of int): indices of the input measures of the partition
+            bindP (bool): stop a journey as soon as it has global ids, see `_rebuild_journeys`
+
+        Returns:
+            tuple: (journeys, values kept for local identifiers with multiple values) of the partition
+        """
+        journeys = lseqP._rebuild_journeys(rootsP, bindP)
+        journeys.inputs = None  # the fingerprints are in the process of the pool
+        return (journeys, lseqP.inputs.local_overrides)
 
     def _build_out_journeys(self):
         """Build out_journeys. Compute 'duration' for each points present in each journeys.
 
         Attributes:
-            out_journeys (:obj:`list`): the list of measurements like `raw_inputs` but ordered, filtered and with unique identifier (uid) by journey
+            out_journeys (:obj:`list`): the list of measurements like `inputs` but ordered, filtered and with unique identifier (uid) by journey
                 out_journeys[o] : a log line of out_journeys = a log line from input (if input is present in a journey)
                     out_journeys[o][0] (Decimal): timestamp
                     out_journeys[o][1] (char): direction, U/D
@@ -941,49 +3444,38 @@ class latseq_log:
         
         Returns:
             int: size of out_journeys list
-
-        Raises:
-            AttributeError: journeys not present in `latseq_logs` object
         """
-        if not hasattr(self, 'journeys'):
-            logging.error("latseq_log._build_out_journeys() First rebuild journeys")
-            raise AttributeError('journeys not present in object, first try rebuild journeys')
         self.out_journeys = list()
+        for p in self.points.values():  # durations of former journeys
+            p.pop('duration', None)
         nb_meas = len(self.inputs)
         added_out_j = {}
         points_added = {}
+        paths_automaton = latseq_paths(self.paths, self.inputs.points)
+        src_codes = self.inputs.src.tolist()
+        dst_codes = self.inputs.dst.tolist()
+        points_names = self.inputs.points.names
+        in_points = {self.inputs.points.encode(p) for p in self.pointsInD + self.pointsInU}
 
         # retrieves all journey to build out_journeys
-        for j in self.journeys:
-            # Case : The journey is incomplete
-            if not self.journeys[j]['completed']:
-                continue
-            for e in self.journeys[j]['set']: # for all elements in set of ids
+        for j in numpy.flatnonzero(self.journeys.completed).tolist():  # Case : The journey is incomplete
+            j_set = self.journeys.get_set(j)
+            j_dir = int(self.journeys.dir[j])
+            j_path = int(self.journeys.path[j])
+            for current_index, e in enumerate(j_set): # for all elements in set of ids
                 # List all points used for the out journeys
-                if e[0] not in points_added:
-                    points_added[e[0]] = [j]
+                if e not in points_added:
+                    points_added[e] = [j]
                 else:
-                    points_added[e[0]].append(j)
-                e_tmp = self.inputs[e[0]]  # Get the point in the inputs list
-                if e[0] not in added_out_j:  # create a new entry for this point in out journeys
-                    added_out_j[e[0]] = len(self.out_journeys)
-                    tmp_uid = self.journeys[j]['set_ids']['uid']
-                    tmp_str = f"uid{tmp_uid}:{dict_ids_to_str(self.journeys[j]['glob'])}.{dict_ids_to_str(e_tmp[6])}"
+                    points_added[e].append(j)
+                if e not in added_out_j:  # create a new entry for this point in out journeys
+                    e_tmp = self.inputs[e]  # Get the point in the inputs list
+                    added_out_j[e] = len(self.out_journeys)
+                    tmp_uid = str(j)
+                    tmp_str = f"uid{tmp_uid}:{dict_ids_to_str(self.inputs.decode_ids(self.journeys.get_glob_ids(j)))}.{dict_ids_to_str(e_tmp[6])}"
                     # have segment corresponding to journey's path
-                    src_point_s = e_tmp[2]
-                    while src_point_s not in self.paths[self.journeys[j]['dir']][self.journeys[j]['path']]:
-                        src_point_s = '.'.join(src_point_s.split('.')[:-1])
-                        if not src_point_s:  # TODO: error to categorize correctly the path
-                            src_point_s = e_tmp[2]
-                            break
-                    
-                    dst_point_s = e_tmp[3]
-                    while dst_point_s not in self.paths[self.journeys[j]['dir']][self.journeys[j]['path']]:
-                        dst_point_s = '.'.join(dst_point_s.split('.')[:-1])
-                        if not dst_point_s:  # not in this path. TODO: error to categorize correctly the path
-                            dst_point_s = e_tmp[3]
-                            break
-                    
+                    src_point_s = paths_automaton.point_in_path(j_dir, j_path, src_codes[e])
+                    dst_point_s = paths_automaton.point_in_path(j_dir, j_path, dst_codes[e])
                     tmp_seg = f"{src_point_s}--{dst_point_s}"
                     # build out_journeys for lseqj
                     self.out_journeys.append([
@@ -993,32 +3485,30 @@ class latseq_log:
                         e_tmp[4],  # [3] : properties
                         tmp_str])  # [4] : data id
                 else:  # update the current entry
-                    self.out_journeys[added_out_j[e[0]]][4] = f"uid{self.journeys[j]['set_ids']['uid']}." + self.out_journeys[added_out_j[e[0]]][4]
+                    self.out_journeys[added_out_j[e]][4] = f"uid{j}." + self.out_journeys[added_out_j[e]][4]
 
                 # points latency
-                tmp_point = self.points[e_tmp[2]]
+                tmp_point = self.points[points_names[src_codes[e]]]
                 if 'duration' not in tmp_point:
                     tmp_point['duration'] = {}
-                if e_tmp[2] in self.pointsInD or e_tmp[2] in self.pointsInU:  # Is an in points
+                if src_codes[e] in in_points:  # Is an in points
                     tmp_point['duration'][tmp_uid] = 0
-                else:  # Is a mid point because out could not be in e_tmp[2]
-                    current_index = self.journeys[j]['set'].index(e)
-                    prev_ts = self.inputs[self.journeys[j]['set'][current_index - 1][0]][0]
-                    tmp_point['duration'][tmp_uid] = e_tmp[0] - prev_ts
+                else:  # Is a mid point because out could not be in src
+                    prev_ts = self.inputs.get_ts(j_set[current_index - 1])
+                    tmp_point['duration'][tmp_uid] = self.inputs.get_ts(e) - prev_ts
         self.out_journeys.sort(key=operator.itemgetter(0))
-        orphans = 0
         # Check which points (clean inputs) are not in the completed journeys
-        for e in range(nb_meas):
-            if e not in points_added:
-                if VERBOSITY:
-                    tmp_str = f"{float(self.inputs[e][0])} "
-                    tmp_str += "D " if self.inputs[e][1] == 0 else "U "
-                    tmp_str += f"{self.inputs[e][2]}--{self.inputs[e][3]}"
-                    logging.info(f"latseq_log._build_out_journeys() : inputs({e}) [{tmp_str}] is missing in completed journeys")
-                orphans += 1
+        orphans_mask = numpy.ones(nb_meas, dtype=bool)
+        orphans_mask[list(points_added)] = False
+        orphans = int(orphans_mask.sum())
+        if VERBOSITY:
+            for e in numpy.flatnonzero(orphans_mask).tolist():
+                tmp_str = f"{float(ts_to_decimal(self.inputs[e][0], self.ts_unit))} "
+                tmp_str += "D " if self.inputs[e][1] == 0 else "U "
+                tmp_str += f"{self.inputs[e][2]}--{self.inputs[e][3]}"
+                logging.info(f"latseq_log._build_out_journeys() : inputs({e}) [{tmp_str}] is missing in completed journeys")
         # TODO : export all orphans as clean output to be compared with original cleaned output in a file
         logging.info(f"latseq_log._build_out_journeys() : {orphans} orphans / {nb_meas} measurements")
-        self.store_object()
         return len(self.out_journeys)
 
 
@@ -1053,7 +3543,7 @@ class latseq_log:
         """
         return {
             "name": self.logpath,
-            "nb_raw_meas": len(self.raw_inputs),
+            "nb_raw_meas": self.nb_raw_inputs,
             "nb_meas": len(self.inputs),
             "points": self.get_list_of_points()
             }
@@ -1070,46 +3560,160 @@ class latseq_log:
     # YIELDERS
     def yield_clean_inputs(self):
         """Yielder of cleaned inputs
+
+        Lines are formatted by blocks of `OUTPUT_BLOCK_SIZE` fingerprints, from the columns of `inputs`.
+        The tuple `inputs[i]` is only built for a fingerprint with an identifier given twice, or without len
         Yields:
             measurement line of log (str)
         Raises:
             ValueError: line malformed
         """
-        try:
-            for i in self.inputs:
-                tmp_str = f"{i[0]} "
-                tmp_str += "U " if i[1] else "D "
-                tmp_str += f"(len{i[4]['len']}) "
-                tmp_str += f"{i[2]}--{i[3]} "
-                for g in i[5]:
-                    tmp_str += f"{g}{i[5][g]}."
-                tmp_str = tmp_str[:-1] + ':'
-                for l in i[6]:
-                    tmp_str += f"{l}{i[6][l]}."
-                yield tmp_str[:-1]
-        except Exception:
-            raise ValueError(f"{i} is malformed")
+        inputs = self.inputs
+        points = inputs.points.names
+        ids = inputs.ids.names
+        values = inputs.values.names
+        len_code = inputs.ids.codes.get('len')
+        overrides = sorted(inputs.local_overrides)
+
+        def _format_input(i: int) -> str:
+            """Line of the i-th fingerprint, from its tuple"""
+            e = inputs[i]
+            try:
+                tmp_str = f"{ts_to_decimal(e[0], self.ts_unit)} {'U' if e[1] else 'D'} (len{e[4]['len']}) {e[2]}--{e[3]} "
+            except KeyError:
+                raise ValueError(f"{e} is malformed")
+            glob_s = '.'.join([f"{k}{v}" for k, v in e[5].items()])
+            local_s = '.'.join([f"{k}{v}" for k, v in e[6].items()])
+            # the space before the global identifiers and the ':' before the local ones are only separators
+            tmp_str = f"{tmp_str}{glob_s}:" if glob_s else f"{tmp_str[:-1]}:"
+            return f"{tmp_str}{local_s}" if local_s else tmp_str[:-1]
+
+        def _join(columnP: tuple, rowsP) -> tuple:
+            """'.'-joined identifiers of each fingerprint, and the fingerprints with an identifier given twice"""
+            o, _, k, v, twice = inputs._gather_pairs(columnP, rowsP)
+            strs = [f"{ids[a]}{values[b]}" for a, b in zip(k.tolist(), v.tolist())]
+            return ['.'.join(strs[o[n]:o[n + 1]]) for n in range(len(rowsP))], twice
+
+        def _format_block(beginP: int, endP: int, resP: list):
+            """Append the lines of the fingerprints [beginP, endP) to `resP`"""
+            rows = numpy.arange(beginP, endP, dtype=numpy.int64)
+            ts = ts_to_decimal_strs(
+                inputs.ts_decimal[beginP:endP] if inputs.ts_decimal is not None else inputs.ts[beginP:endP].tolist(), self.ts_unit)
+            dirs = inputs.dir[beginP:endP].tolist()
+            segs = [f"{points[a]}--{points[b]}" for a, b in zip(inputs.src[beginP:endP].tolist(), inputs.dst[beginP:endP].tolist())]
+            _, items, k, v, props_twice = inputs._gather_pairs(inputs.properties, rows)
+            lens = [None] * len(rows)
+            for n, l in zip(items[k == len_code].tolist(), v[k == len_code].tolist()):
+                lens[n] = values[l]
+            globs, globs_twice = _join(inputs.glob_ids, rows)
+            locals_, locals_twice = _join(inputs.local_ids, rows)
+            overridden = overrides[bisect.bisect_left(overrides, beginP):bisect.bisect_left(overrides, endP)]
+            slow = props_twice | globs_twice | locals_twice | {i - beginP for i in overridden}
+            for n in range(len(rows)):
+                if n in slow or lens[n] is None:
+                    resP.append(_format_input(beginP + n))
+                    continue
+                tmp_str = f"{ts[n]} {'U' if dirs[n] else 'D'} (len{lens[n]}) {segs[n]}"
+                tmp_str = f"{tmp_str} {globs[n]}:" if globs[n] else f"{tmp_str}:"
+                resP.append(f"{tmp_str}{locals_[n]}" if locals_[n] else tmp_str[:-1])
+
+        for begin in range(0, len(inputs), OUTPUT_BLOCK_SIZE):
+            lines = []
+            try:
+                _format_block(begin, min(begin + OUTPUT_BLOCK_SIZE, len(inputs)), lines)
+            except ValueError:
+                yield from lines  # the lines before the malformed one
+                raise
+            yield from lines
 
     def yield_journeys(self):
         """Yielder of journeys
         Yields:
-            journey element (:obj:`dict`)
+            journey element (:obj:`dict`) with timestamps in seconds
         Raises:
             ValueError: Impossible to yield a journey from self.journeys
             Exception: Impossible to rebuild journeys
         """
         try:
-            if not hasattr(self, 'journeys'):
-                try:
-                    self.rebuild_packets_journey_recursively()
-                except Exception:
-                    raise Exception("[ERROR] to rebuild journeys")
-            for j in self.journeys:
-                if self.journeys[j]["completed"]:
-                    yield self.journeys[j]
+            # journeys are rebuilt at the first access
+            for j in numpy.flatnonzero(self.journeys.completed).tolist():
+                yield journey_ts_to_decimal(self.journeys[j], self.ts_unit)
         except Exception:
             raise ValueError(f"[ERROR] to yield journeys for {self.logpath}")
     
+    def yield_journeys_json(self):
+        """Yielder of the json lines of `yield_journeys`
+
+        Lines are formatted by blocks of `OUTPUT_BLOCK_SIZE` journeys, from the columns of `journeys`.
+        The dict of a journey is only built and dumped for a journey with an identifier given twice,
+        a uid among its local identifiers, or without path
+        Yields:
+            str: json of a journey, as `json.dumps` of `yield_journeys`
+        Raises:
+            ValueError: Impossible to yield a journey from self.journeys
+        """
+        journeys = self.journeys  # journeys are rebuilt at the first access
+        inputs = journeys.inputs
+        ids_json = [json.dumps(n) for n in inputs.ids.names]
+        values = inputs.values.names
+        points = inputs.points.names
+        segs_json = dict()  # json of a segment, by pair of codes
+        uid_code = inputs.ids.codes.get('uid', -1)
+        file_json = f", \"file\": {json.dumps(journeys.file)}" if journeys.file is not None else ""
+        offsets, rows = journeys.sets
+
+        def _dicts(columnP: tuple, itemsP) -> tuple:
+            """json of the identifiers of each item, the items with an identifier given twice, and the items of each identifier"""
+            o, items, k, v, twice = inputs._gather_pairs(columnP, itemsP)
+            strs = [f"{ids_json[a]}: \"{values[b]}\"" for a, b in zip(k.tolist(), v.tolist())]
+            return [', '.join(strs[o[n]:o[n + 1]]) for n in range(len(itemsP))], twice, (items, k)
+
+        def _format_block(ksP, resP: list):
+            """Append the lines of the journeys ksP to `resP`"""
+            # the measures of the journeys
+            begins = offsets[ksP]
+            lengths = offsets[ksP + 1] - begins
+            o = numpy.zeros(len(ksP) + 1, dtype=numpy.int64)
+            numpy.cumsum(lengths, out=o[1:])
+            set_rows = rows[numpy.repeat(begins - o[:-1], lengths) + numpy.arange(o[-1])]
+            o = o.tolist()
+            set_list = set_rows.tolist()
+            ts = ts_to_decimal_strs(
+                [inputs.ts_decimal[i] for i in set_list] if inputs.ts_decimal is not None else inputs.ts[set_rows].tolist(),
+                self.ts_unit)
+            hops = []
+            for i, t, a, b in zip(set_list, ts, inputs.src[set_rows].tolist(), inputs.dst[set_rows].tolist()):
+                seg = segs_json.get((a, b))
+                if seg is None:
+                    seg = segs_json[(a, b)] = json.dumps(f"{points[a]}--{points[b]}")
+                hops.append(f"[{i}, {t}, {seg}]")
+            globs, globs_twice, _ = _dicts(journeys.glob, ksP)
+            set_ids, set_ids_twice, (items, k) = _dicts(journeys.set_ids, ksP)
+            set_ids_twice |= set(items[k == uid_code].tolist())  # a local uid would replace the one of the journey
+            props, props_twice, _ = _dicts(inputs.properties, journeys.properties[ksP])
+            slow = globs_twice | set_ids_twice | props_twice
+            dirs = journeys.dir[ksP].tolist()
+            paths = journeys.path[ksP].tolist()
+            for n, k in enumerate(ksP.tolist()):
+                if n in slow or paths[n] < 0 or o[n] == o[n + 1]:
+                    resP.append(json.dumps(journey_ts_to_decimal(journeys[k], self.ts_unit)))
+                    continue
+                resP.append(
+                    f"{{\"dir\": {dirs[n]}, \"glob\": {{{globs[n]}}}, \"ts_in\": {ts[o[n]]}, "
+                    f"\"set\": [{', '.join(hops[o[n]:o[n + 1]])}], "
+                    f"\"set_ids\": {{\"uid\": \"{k}\"{', ' if set_ids[n] else ''}{set_ids[n]}}}, "
+                    f"\"path\": {paths[n]}, \"completed\": true, \"ts_out\": {ts[o[n + 1] - 1]}, "
+                    f"\"properties\": {{{props[n]}}}, \"uid\": \"{k}\"{file_json}}}")
+
+        try:
+            completed = numpy.flatnonzero(journeys.completed)
+            for begin in range(0, len(completed), OUTPUT_BLOCK_SIZE):
+                lines = []
+                _format_block(completed[begin:begin + OUTPUT_BLOCK_SIZE], lines)
+                yield from lines
+        except Exception:
+            raise ValueError(f"[ERROR] to yield journeys for {self.logpath}")
+
     def yield_out_journeys(self):
         """Yielder for cleaned inputs
         Yields:
@@ -1117,27 +3721,20 @@ class latseq_log:
         Raises:
             ValueError : if the entry in out_journeys is malformed
         """
-        # if not hasattr(self, 'out_journeys'):
-        if not self._build_out_journeys():
+        if not self.out_journeys:
             logging.error("latseq_log.yield_out_journeys() : to build out_journeys")
             exit(-1)
         def _build_header():
-            res_str = "#funcId "
-            paths = [path for dir in self.get_paths() for path in self.get_paths()[dir]]  # flatten the dict
-            added_points = []
-            for p in paths:
-                for j in p:
-                    if j not in added_points:
-                        res_str += f"{j} "
-                        added_points.append(j)
-            return res_str
+            paths = self.get_paths()
+            added_points = dict()  # points in the order of the paths
+            for p in [path for dir in paths for path in paths[dir]]:  # flatten the dict
+                added_points.update(dict.fromkeys(p))
+            return "#funcId " + "".join([f"{j} " for j in added_points])
         try:
             yield _build_header()
             for e in self.out_journeys:
-                try:
-                    yield f"{epoch_to_datetime(e[0])} {e[1]} ({e[3]['len']})\t{e[2]}\t{e[4]}"
-                except KeyError:
-                    yield f"{epoch_to_datetime(e[0])} {e[1]} \t{e[2]}\t{e[4]}"
+                len_s = f" ({e[3]['len']})" if 'len' in e[3] else " "
+                yield f"{epoch_to_datetime(ts_to_decimal(e[0], self.ts_unit))} {e[1]}{len_s}\t{e[2]}\t{e[4]}"
         except Exception:
             raise ValueError(f"{e} is malformed")
 
@@ -1154,21 +3751,27 @@ class latseq_log:
                         tmp_ctxt_l.append(f"{c}{i[3][c]}")
                     tmp_ctxt_s = ".".join(tmp_ctxt_l)
                 for im in i[2]:  # for all individual information in i (one line in trace can generate multiple line in output)
-                        yield f"{i[0]}\t{'.'.join(i[1])}{tmp_ctxt_s}.{im}\t{i[2][im]}"
+                        yield f"{ts_to_decimal(i[0], self.ts_unit)}\t{'.'.join(i[1])}{tmp_ctxt_s}.{im}\t{i[2][im]}"
         except Exception:
             raise ValueError(f"{i} is malformed")
 
     def yield_points(self):
         """Yielder for points
         Yields:
-            :obj:`dict`: point's name with corresponding self.points dict element
+            :obj:`dict`: point's name with corresponding self.points dict element, durations in seconds
         """
         # Warning for stats if journeys has not been rebuilt
         if "duration" not in self.points[next(iter(self.points.keys()))]:
             logging.warning("latseq_log.yield_points() : points without duration, first rebuild journeys for stat")
         for p in self.points:
             self.points[p]['point'] = p
-            yield self.points[p]
+            # The duration of an in point is always 0
+            if self.ts_unit == 'decimal' or 'duration' not in self.points[p] or p in self.pointsInD or p in self.pointsInU:
+                yield self.points[p]
+                continue
+            tmp_p = dict(self.points[p])
+            tmp_p['duration'] = {k: ts_to_decimal(v, self.ts_unit) for k, v in tmp_p['duration'].items()}
+            yield tmp_p
 
     def yield_global_csv(self):
         """Yielder for a csv file from journeys
@@ -1180,15 +3783,14 @@ class latseq_log:
         NB_PREAMBLE = 3
         yield "journeys uid, dir, path_id, " + ", ".join(points) + "\n"
         # Yields one line per journey
-        for j in self.journeys:
-            if not self.journeys[j]['completed']:
-                continue
+        for j in numpy.flatnonzero(self.journeys.completed).tolist():
+            tmp_j = self.journeys[j]
             tmp_tab = (len(points) + NB_PREAMBLE)*['']
-            tmp_tab[0] = str(self.journeys[j]['uid'])
-            tmp_tab[1] = str(self.journeys[j]['dir'])
-            tmp_tab[2] = str(self.journeys[j]['path'])
-            for i in self.journeys[j]['set']:
-                tmp_tab[points.index(self.inputs[i[0]][3])+NB_PREAMBLE] = str(self.inputs[i[0]][0])
+            tmp_tab[0] = str(tmp_j['uid'])
+            tmp_tab[1] = str(tmp_j['dir'])
+            tmp_tab[2] = str(tmp_j['path'])
+            for i in tmp_j['set']:
+                tmp_tab[points.index(self.inputs[i[0]][3])+NB_PREAMBLE] = str(ts_to_decimal(self.inputs[i[0]][0], self.ts_unit))
             yield ", ".join(tmp_tab) + "\n"
 
     def yield_matrix(self):
@@ -1198,29 +3800,28 @@ class latseq_log:
         """
         tmp_d = {}  # key=path direction + path type
         points = self.get_list_of_points()
-        for j in self.journeys:
-            if not self.journeys[j]['completed']:
-                continue
-            tmp_path_id = f"{self.journeys[j]['dir']}.{self.journeys[j]['path']}"
+        for j in numpy.flatnonzero(self.journeys.completed).tolist():
+            tmp_j = self.journeys[j]
+            tmp_path_id = f"{tmp_j['dir']}.{tmp_j['path']}"
             # New matrix for this journey
             if tmp_path_id not in tmp_d:
                 tmp_header = "uid;"
-                tmp_l = f"{self.journeys[j]['uid']};"
-                tmp_tm1 = self.journeys[j]['ts_in']
-                for i in self.journeys[j]['set']:
+                tmp_l = f"{tmp_j['uid']};"
+                tmp_tm1 = tmp_j['ts_in']
+                for i in tmp_j['set']:
                     tmp_i = self.inputs[i[0]]
                     tmp_header += f"{tmp_i[2]}--{tmp_i[3]};"
-                    tmp_l += "{:.6f};".format(tmp_i[0] - tmp_tm1)
+                    tmp_l += "{:.6f};".format(ts_to_decimal(tmp_i[0] - tmp_tm1, self.ts_unit))
                     tmp_tm1 = tmp_i[0]
                 tmp_d[tmp_path_id] = [tmp_header]
                 tmp_d[tmp_path_id].append(tmp_l)
             # Add a line to an existing matrix
             else:
-                tmp_l = f"{self.journeys[j]['uid']};"
-                tmp_tm1 = self.journeys[j]['ts_in']
-                for i in self.journeys[j]['set']:
+                tmp_l = f"{tmp_j['uid']};"
+                tmp_tm1 = tmp_j['ts_in']
+                for i in tmp_j['set']:
                     tmp_i = self.inputs[i[0]]
-                    tmp_l += "{:.6f};".format(tmp_i[0] - tmp_tm1)
+                    tmp_l += "{:.6f};".format(ts_to_decimal(tmp_i[0] - tmp_tm1, self.ts_unit))
                     tmp_tm1 = tmp_i[0]
                 tmp_d[tmp_path_id].append(tmp_l)
         # end for self.journeys
@@ -1242,7 +3843,7 @@ class latseq_log:
             IOError: Error at writing lseqj files
         """
         # Save out_journeys to file type lseqj
-        out_journeyspath = self.logpath.replace('lseq', 'lseqj')
+        out_journeyspath = rdtsctots.strip_compression(self.logpath).replace('lseq', 'lseqj')
         def _build_header() -> str:
             res_str = "#funcId "
             paths = [path for dir in self.get_paths() for path in self.get_paths()[dir]]  # flatten the dict
@@ -1262,20 +3863,125 @@ class latseq_log:
             logging.error(f"latseq_log.out_journeys_to_file() : on writing({self.logpath})")
             raise e
 
-    def store_object(self):
-        """Store latseq_log object into a pickle file
+    def journeys_to_npz(self, pathP: str = None) -> str:
+        """Save the journeys and their measures as columns to a npz file, loaded without parsing by numpy.load
+
+        The arrays are stored uncompressed, each one can be mapped in memory, see `latseq_stats.load_npz`.
+        Timestamps are integers in the unit 'ts_unit', 'ns' for Decimal timestamps.
+            journey.uid (int64), journey.dir (uint8), journey.path (int64, -1 if it is not found),
+            journey.ts_in (int64), journey.ts_out (int64, timestamp of its last measure),
+            journey.completed (bool), journey.len (int64, 'len' property if completed, -1 otherwise):
+                a row by journey, the uid is the one of `yield_journeys`
+            hop.journey (int64), hop.index (int64), hop.input (int64, index in `inputs`),
+            hop.ts (int64), hop.segment (int64, index in 'segment'):
+                a row by measure of a journey, grouped by journey
+            segment (str): names of the segments, 'src--dst'
+            ts_unit (str), logpath (str): the log file
+
+        Args:
+            pathP (str): path of the npz file, the log file with .npz instead of .lseq by default
+
+        Returns:
+            str: the path of the npz file
+
         Raises:
-            IOError: Error at saving file to pkl
-        TODO:
-            handle pickle error
+            IOError: Error at writing the npz file
         """
-        pickle_file = self.logpath.replace("lseq", "pkl")
+        if not pathP:
+            pathP = re.sub(r"\.lseq$", "", rdtsctots.strip_compression(self.logpath)) + ".npz"
+        inputs = self.inputs
+        offsets, rows = self.journeys.sets
+        lengths = numpy.diff(offsets)
+        hop_journey = numpy.repeat(numpy.arange(len(self.journeys), dtype=numpy.int64), lengths)
+        # segments by pair of points
+        pairs, segments = numpy.unique(
+            inputs.src[rows].astype(numpy.int64) * len(inputs.points) + inputs.dst[rows], return_inverse=True)
+        names = numpy.array(
+            [f"{inputs.points.decode(p // len(inputs.points))}--{inputs.points.decode(p % len(inputs.points))}" for p in pairs.tolist()],
+            dtype=str)
+        # 'len' property of the measure giving its properties to a journey
+        lens = numpy.full(len(inputs) + 1, -1, dtype=numpy.int64)  # -1 for a journey without measure
+        if 'len' in inputs.ids:
+            prop_offsets, prop_keys, prop_values = inputs.properties
+            is_len = prop_keys == inputs.ids.codes['len']
+            # the number of each value code, -1 for a value which does not fit in int64
+            numbers = numpy.array([int(n) if len(n) < 19 else -1 for n in inputs.values.names], dtype=numpy.int64)
+            lens[numpy.repeat(numpy.arange(len(inputs), dtype=numpy.int64), numpy.diff(prop_offsets))[is_len]] = numbers[prop_values[is_len]]
+        lens = numpy.where(self.journeys.completed, lens[self.journeys.properties], -1)
+        ts = inputs.ts[rows]
+        with_hops = lengths > 0
+        ts_in = numpy.zeros(len(self.journeys), dtype=numpy.int64)
+        ts_out = numpy.zeros(len(self.journeys), dtype=numpy.int64)
+        ts_in[with_hops] = ts[offsets[:-1][with_hops]]
+        ts_out[with_hops] = ts[offsets[1:][with_hops] - 1]
         try:
-            with open(pickle_file, 'wb') as fout:
-                pickle.dump(self, fout, pickle.HIGHEST_PROTOCOL)
-        except IOError:
-            logging.error(f"[ERROR] latseq_log.store_object() : at saving {pickle_file}")
-        logging.info(f"[INFO] latseq_log.store_object() : Saving lseq instance to {pickle_file}")
+            with open(pathP, 'wb') as f:
+                numpy.savez(f, **{
+                    'journey.uid': numpy.arange(len(self.journeys), dtype=numpy.int64),
+                    'journey.dir': numpy.asarray(self.journeys.dir, dtype=numpy.uint8),
+                    'journey.path': numpy.asarray(self.journeys.path, dtype=numpy.int64),
+                    'journey.ts_in': ts_in,
+                    'journey.ts_out': ts_out,
+                    'journey.completed': numpy.asarray(self.journeys.completed, dtype=bool),
+                    'journey.len': lens,
+                    'hop.journey': hop_journey,
+                    'hop.index': numpy.arange(len(rows), dtype=numpy.int64) - numpy.repeat(offsets[:-1], lengths),
+                    'hop.input': numpy.asarray(rows, dtype=numpy.int64),
+                    'hop.ts': ts,
+                    'hop.segment': segments.astype(numpy.int64),
+                    'segment': names,
+                    'ts_unit': numpy.array(inputs.ts_unit),
+                    'logpath': numpy.array(self.logpath)})
+        except IOError as e:
+            logging.error(f"latseq_log.journeys_to_npz() : on writing({pathP})")
+            raise e
+        logging.info(f"latseq_log.journeys_to_npz() : {len(self.journeys)} journeys and {len(rows)} measures written to {pathP}")
+        return pathP
+
+    def journeys_to_sqlite(self, pathP: str = None) -> str:
+        """Save the journeys, their measures, the fingerprints and the information lines to an indexed SQLite database
+
+        See `latseq_db` for the tables, queried by `latseq_db.query` without the log file.
+
+        Args:
+            pathP (str): path of the database, the log file with .db instead of .lseq by default
+
+        Returns:
+            str: the path of the database
+
+        Raises:
+            sqlite3.Error: Error at writing the database
+        """
+        if not pathP:
+            pathP = re.sub(r"\.lseq$", "", rdtsctots.strip_compression(self.logpath)) + ".db"
+        start = time.perf_counter()
+        try:
+            latseq_db(pathP).store(self)
+        except (sqlite3.Error, IOError) as e:
+            logging.error(f"latseq_log.journeys_to_sqlite() : on writing({pathP})")
+            raise e
+        logging.info(f"latseq_log.journeys_to_sqlite() : {int(numpy.count_nonzero(self.journeys.completed))} journeys written to {pathP} in {time.perf_counter() - start:.3f}s")
+        return pathP
+
+    def store_object(self):
+        """Store the stages of latseq_log object which are built but not in `cache` yet, see `latseq_cache`
+        """
+        if self.__dict__.get('cache') is None:  # a part of a latseq_log
+            return
+        for stage, names in STAGES.items():
+            if any(n not in self.__dict__ for n in names):  # not built, or not loaded from the cache
+                continue
+            if stage in self.__dict__.get('building', ()):  # the attributes of a stage being built are not complete
+                continue
+            key = self._get_stage_key(stage)
+            if self.cache.has(stage, key):
+                continue
+            try:
+                self._save_stage(stage, key)
+            except (IOError, OSError) as e:
+                logging.error(f"[ERROR] latseq_log.store_object() : at saving {stage} to {self.cache.path}, {e}")
+                continue
+            logging.info(f"latseq_log.store_object() : Saving {stage} to {self.cache.path}")
 
     def paths_to_str(self) -> str:
         """Stringify paths
@@ -1302,6 +4008,186 @@ class latseq_log:
 # MAIN
 #
 
+class latseq_stream:
+    """Online rebuild of the journeys of a log file, read as a stream
+
+    Fingerprints are read in timestamp order by blocks of `STREAM_BLOCK_SIZE`.
+    A journey only has measures in the `DURATION_TO_SEARCH_PKT` after its input measure,
+    and their segmentations in the `DURATION_TO_SEARCH_FORKS` after them:
+    the journeys of an input measure are rebuilt by `latseq_log._rebuild_journeys` as soon as the stream
+    is this duration, plus `DURATION_TO_REORDER`, after it. Then the fingerprints before the next input measure
+    are evicted, the ones which are not in a completed journey are orphans.
+    Only the fingerprints of this window are kept in memory, whatever the length of the log file
+
+    The journeys are the ones of `latseq_log.rebuild_packets_journey_recursively`, numbered the same way, unless
+        a fingerprint is written more than `DURATION_TO_REORDER` late, it is dropped
+        a segment is read for the first time after the journeys which could use it:
+            the graph of `points` and the `paths` are the ones of the segments read so far
+
+    Args:
+
+        logpathP (str): path to the log file, compressed or not
+        ts_unitP (str): representation of timestamps, one of `TS_UNITS`
+
+    Attributes:
+
+        lseq (:obj:`latseq_log`): reader of the log file, with the `edges`, `points` and `paths` read so far
+        window (:obj:`latseq_inputs`): fingerprints of the window, sorted by timestamp
+        base (int): index in the stream of the first fingerprint of `window`
+        horizon (int): timestamp before which the stream is complete, a fingerprint before is late
+        narrowed (:obj:`dict`): by index in the stream, values kept for local identifiers with multiple values
+        in_completed (set): indices in the stream of the fingerprints of `window` in a completed journey
+        nb_journeys (int): number of journeys rebuilt, completed or not
+        nb_orphans (int): number of evicted fingerprints which are not in a completed journey
+        nb_late (int): number of fingerprints dropped because they are late
+
+    Raises:
+        ValueError: the log file has raw rdtsc timestamps, converted with all the synchronisation lines
+    """
+    def __init__(self, logpathP: str, ts_unitP: str = TS_UNIT):
+        self.lseq = latseq_log.__new__(latseq_log)
+        self.lseq.logpath = logpathP
+        self.lseq.ts_unit = ts_unitP
+        self.lseq.compressed = rdtsctots.get_compression(logpathP) is not None
+        self.lseq.binary = False
+        self.lseq.rdtsc = False
+        if self.lseq._is_binary_log() or self.lseq._is_rdtsc_log():
+            raise ValueError(f"Error, {logpathP} has raw rdtsc timestamps, convert it with rdtsctots.py first")
+        self.lseq.syncs = list()
+        self.lseq.nb_raw_inputs = 0
+        self.lseq.inputs = latseq_inputs(ts_unitP)
+        self.lseq.infos = list()
+        self.lseq.dataids = list()
+        self.lseq.edges = dict()
+        self.lseq.points = dict()
+        self.lseq.pointsInD = KWS_IN_D
+        self.lseq.pointsOutD = KWS_OUT_D
+        self.lseq.pointsInU = KWS_IN_U
+        self.lseq.pointsOutU = KWS_OUT_U
+        self.lseq.paths = [[], []]
+        self.window = None
+        self.base = 0
+        self.horizon = None
+        self.narrowed = dict()
+        self.in_completed = set()
+        self.nb_journeys = 0
+        self.nb_orphans = 0
+        self.nb_late = 0
+
+    def rebuild(self, orphansP: bool = True):
+        """Rebuild the journeys of the log file as it is read
+
+        Args:
+            orphansP (bool): yield the orphans, only counted in `nb_orphans` otherwise
+
+        Yields:
+            (str, tuple): the type ('J' for a journey, 'O' for an orphan) and
+                journey : (index of the journey, journey as in `latseq_log.journeys`, completed or not)
+                orphan : (index in the stream, fingerprint as `latseq_inputs[i]`)
+        """
+        nb_edges = 0
+        for t, e in self.lseq._read_log():
+            if t == 'I':  # information lines are not used by journeys
+                continue
+            self.lseq._add_edge(e)
+            self.lseq._clean_input(e)
+            self.lseq.nb_raw_inputs += 1
+            if len(self.lseq.inputs) < STREAM_BLOCK_SIZE:
+                continue
+            if len(self.lseq.edges) != nb_edges:
+                nb_edges = len(self.lseq.edges)
+                self._build_graph()
+            yield from self._rebuild_window(orphansP)
+        self._build_graph()
+        yield from self._rebuild_window(orphansP, True)
+        if self.nb_late:
+            logging.warning(f"latseq_stream.rebuild() : {self.nb_late} fingerprints written more than {DURATION_TO_REORDER}s late are dropped")
+        logging.info(f"latseq_stream.rebuild() : {self.nb_orphans} orphans / {self.base} measurements")
+
+    def _build_graph(self):
+        """Build `points` and `paths` of `lseq` from the segments read so far"""
+        self.lseq.points = dict()
+        self.lseq.paths = [[], []]
+        self.lseq._build_points()
+        try:
+            self.lseq._build_paths()
+        except Exception:  # no path found yet
+            logging.debug("latseq_stream._build_graph() : no path found in the segments read so far")
+
+    def _rebuild_window(self, orphansP: bool, lastP: bool = False):
+        """Add the fingerprints read to `window`, then rebuild the journeys of the input measures
+        which can not get more measures, and evict the fingerprints before the next input measure
+
+        Args:
+            orphansP (bool): yield the orphans
+            lastP (bool): the whole log file has been read, all the journeys are rebuilt
+
+        Yields:
+            (str, tuple): journeys and orphans, see `rebuild`
+        """
+        block = self.lseq.inputs
+        self.lseq.inputs = latseq_inputs(self.lseq.ts_unit)
+        block.freeze()
+        if self.horizon is not None and len(block) and block.ts[0] < self.horizon:
+            in_time = numpy.flatnonzero(block.ts >= self.horizon)
+            self.nb_late += len(block) - len(in_time)
+            block = block.take(in_time)
+        if self.window is None:
+            window = block
+        else:
+            window = latseq_inputs(self.lseq.ts_unit)
+            window.merge([self.window, block])
+        if not len(window):
+            return
+        window.local_overrides = {g - self.base: dict(ids) for g, ids in self.narrowed.items()}
+        part = latseq_log.__new__(latseq_log)
+        part.logpath = self.lseq.logpath
+        part.inputs = window
+        part.points = self.lseq.points
+        part.pointsInD = self.lseq.pointsInD
+        part.pointsOutD = self.lseq.pointsOutD
+        part.pointsInU = self.lseq.pointsInU
+        part.pointsOutU = self.lseq.pointsOutU
+        part.paths = self.lseq.paths
+        # input measures whose journeys can not get more measures
+        end = len(window)
+        if not lastP:
+            reorder = duration_to_ts(DURATION_TO_REORDER, window.ts_unit)
+            overlap = duration_to_ts(DURATION_TO_SEARCH_PKT + DURATION_TO_SEARCH_FORKS, window.ts_unit)
+            self.horizon = int(window.ts[-1]) - reorder
+            end = int(numpy.searchsorted(window.ts, self.horizon - overlap, side='left'))
+        roots = part._get_in_pointers()
+        journeys = part._rebuild_journeys(roots[roots < end].tolist())
+        journeys.file = self.lseq.logpath
+        journeys.completed[journeys.path < 0] = False
+        for j in journeys.values():
+            j['set'] = [(self.base + e[0],) + e[1:] for e in j['set']]
+            j['uid'] = j['set_ids']['uid'] = str(self.nb_journeys)
+            if j['completed']:
+                self.in_completed.update(e[0] for e in j['set'])
+            yield 'J', (self.nb_journeys, j)
+            self.nb_journeys += 1
+        # evict the fingerprints before the next input measure
+        for i in range(end):
+            if self.base + i not in self.in_completed:
+                self.nb_orphans += 1
+                if orphansP:
+                    yield 'O', (self.base + i, window[i])
+        self.base += end
+        self.narrowed = {self.base + i - end: ids for i, ids in window.local_overrides.items() if i >= end}
+        self.in_completed = {g for g in self.in_completed if g >= self.base}
+        self.window = window.take(numpy.arange(end, len(window), dtype=numpy.int64))
+
+    def yield_journeys(self):
+        """Yielder of completed journeys, as soon as they are rebuilt
+        Yields:
+            journey element (:obj:`dict`) with timestamps in seconds, as `latseq_log.yield_journeys`
+        """
+        for t, j in self.rebuild(False):
+            if t == 'J' and j[1]['completed']:
+                yield journey_ts_to_decimal(j[1], self.lseq.ts_unit)
+
+
 if __name__ == "__main__":
     # Arguments
     parser = argparse.ArgumentParser("./latseq_logs.py",
@@ -1348,6 +4234,68 @@ if __name__ == "__main__":
         action='store_true',
         help="Request journeys from log file to stdout"
     )
+    parser.add_argument(
+        "-z",
+        "--npz",
+        type=str,
+        dest="req_npz",
+        nargs='?',
+        const="",
+        metavar="FILE",
+        help="Request journeys and their measures as columns to the npz file FILE, the log file with .npz instead of .lseq by default"
+    )
+    parser.add_argument(
+        "-s",
+        "--sqlite",
+        type=str,
+        dest="req_sqlite",
+        nargs='?',
+        const="",
+        metavar="FILE",
+        help="Request journeys, measures, fingerprints and metadata to the SQLite database FILE, the log file with .db instead of .lseq by default. The database queried with -q"
+    )
+    parser.add_argument(
+        "-q",
+        "--query",
+        dest="query",
+        action='store_true',
+        help="Query the journeys stored by -s, without reading the log file, with --id, --from, --to and --point"
+    )
+    parser.add_argument(
+        "--id",
+        type=str,
+        dest="query_ids",
+        action='append',
+        metavar="NAME=VALUE",
+        help="Journeys with a global identifier, e.g. rnti=58106, for -q. repeated for all of them"
+    )
+    parser.add_argument(
+        "--from",
+        type=str,
+        dest="query_from",
+        metavar="TS",
+        help="Journeys beginning from the timestamp TS in seconds, for -q"
+    )
+    parser.add_argument(
+        "--to",
+        type=str,
+        dest="query_to",
+        metavar="TS",
+        help="Journeys beginning until the timestamp TS in seconds, for -q"
+    )
+    parser.add_argument(
+        "--point",
+        type=str,
+        dest="query_point",
+        metavar="POINT",
+        help="Journeys through the point POINT, or the segment src--dst, for -q"
+    )
+    parser.add_argument(
+        "--stream",
+        dest="stream",
+        action='store_true',
+        help="Rebuild journeys while the log file is read and write them as soon as they are completed, with -j"
+    )
     parser.add_argument(
         "-p",
         "--points",
@@ -1367,7 +4315,7 @@ if __name__ == "__main__":
         "--notrdtsc",
         dest="notrdtsc",
         action='store_true',
-        help="lseq already converted to rdtsc"
+        help="[DEPRECATED] raw rdtsc timestamps are converted while the log file is parsed"
     )
     parser.add_argument(
         "-m",
@@ -1397,6 +4345,39 @@ if __name__ == "__main__":
         action='store_true',
         help="[DEPRECATED] Request csv with journeys and points"
     )
+    parser.add_argument(
+        "--ts",
+        type=str,
+        dest="ts_unit",
+        default=TS_UNIT,
+        choices=list(TS_UNITS.keys()),
+        help=f"Representation of timestamps : decimal, or integer us or ns. by default, {TS_UNIT}"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        dest="jobs",
+        default=1,
+        help="Number of processes to parse the log file and to rebuild the journeys. by default, 1"
+    )
+    parser.add_argument(
+        "--split",
+        type=str,
+        dest="split",
+        default=SPLITS[0],
+        choices=SPLITS,
+        help=f"How journeys are rebuilt with more than one job : by global context (rnti) or by time shards, for a capture with one main UE. by default, {SPLITS[0]}"
+    )
+    parser.add_argument(
+        "-w",
+        "--windows",
+        type=str,
+        dest="windows",
+        nargs='?',
+        const="",
+        metavar="PROFILE",
+        help="Adaptive search windows by point, learnt from the latency observed on the segments. Read from the json file PROFILE if it exists, written to it otherwise"
+    )
     parser.add_argument(
         "-l",
         "--log",
@@ -1412,8 +4393,8 @@ if __name__ == "__main__":
     if not args.logname:  # No logfile
         logging.error("[ERROR] __main__ : No log file provided")
         exit(-1)
-    if args.logname.split('.')[-1] != "lseq":
-        logging.error("[ERROR] __main__ : No LatSeq log file provided (.lseq)")
+    if rdtsctots.strip_compression(args.logname).split('.')[-1] != "lseq":
+        logging.error("[ERROR] __main__ : No LatSeq log file provided (.lseq, .lseq.gz, .lseq.xz or .lseq.bz2)")
         exit(-1)
 
     # Logger handler
@@ -1422,29 +4403,60 @@ if __name__ == "__main__":
     if args.verbosity:
         VERBOSITY = True
         root_logger.setLevel(logging.DEBUG)
-    
-    candidate_pickle_file = args.logname.replace('lseq', 'pkl')
-    if args.clean:  # clean pickles and others stuff
-        if os.path.exists(candidate_pickle_file):
-            os.remove(candidate_pickle_file)
-    try:  # Try load a previous session
-        with open(candidate_pickle_file, 'rb') as fin:
-            try:
-                lseq = pickle.load(fin)
-                logging.info(f"__main__ : load lseq instance from {candidate_pickle_file}")
-            except EOFError:
-                raise FileNotFoundError
-    except FileNotFoundError:
+
+    # Phase 1 bis : case stream, journeys are written while the log file is read, without cache
+    if args.stream:
+        if not args.req_journeys:
+            logging.error("[ERROR] __main__ : --stream is only for -j")
+            exit(-1)
         try:
-            logging.info(f"__main__ : create a new lseq instance")
-            if not args.notrdtsc:
-                ro = rdtsctots.rdtsctots(args.logname)
-                ro.write_rdtsctots(args.logname)
-            lseq = latseq_log(args.logname)  # Build latseq_log object
+            write_lines_to_stdout(map(json.dumps, latseq_stream(args.logname, args.ts_unit).yield_journeys()))
         except Exception as e:
             logging.error(f"__main__ : {args.logname}, {e}")
             exit(-1)
-    lseq.store_object()
+        exit()
+
+    # Phase 1 ter : case query, journeys are read from the database of -s, without the log file
+    if args.query:
+        db_path = args.req_sqlite or re.sub(r"\.lseq$", "", rdtsctots.strip_compression(args.logname)) + ".db"
+        try:
+            ids = dict(i.split('=', 1) for i in args.query_ids or [])
+        except ValueError:
+            logging.error(f"[ERROR] __main__ : --id is NAME=VALUE, not {args.query_ids}")
+            exit(-1)
+        try:
+            start = time.perf_counter()
+            counter = itertools.count()  # advanced by zip after each journey
+            journeys = latseq_db(db_path).query(ids, args.query_from, args.query_to, args.query_point)
+            write_lines_to_stdout(j for j, _ in zip(journeys, counter))
+            logging.info(f"__main__ : {next(counter)} journeys from {db_path} in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            logging.error(f"__main__ : {db_path}, {e}")
+            exit(-1)
+        exit()
+
+    if args.clean:  # clean the cache of the log file
+        latseq_cache(args.logname).clear()
+    try:  # the stages needed by the request are built, or loaded from the cache of a previous session, on first use
+        lseq = latseq_log(args.logname, args.ts_unit, args.jobs, args.split)  # Build latseq_log object
+    except Exception as e:
+        logging.error(f"__main__ : {args.logname}, {e}")
+        exit(-1)
+    # Search windows, journeys are cached by search windows
+    if args.windows is not None:
+        try:
+            if args.windows and os.path.exists(args.windows):
+                with open(args.windows, 'r') as fin:
+                    lseq.windows = json.load(fin, use_decimal=True)
+                logging.info(f"__main__ : load search windows from {args.windows}")
+            else:
+                lseq.learn_windows()
+                if args.windows:
+                    with open(args.windows, 'w') as fout:
+                        fout.write(json.dumps(lseq.windows, indent=4))
+        except Exception as e:
+            logging.error(f"__main__ : search windows, {e}")
+            exit(-1)
     
     # Phase 2A : case Flask
     if args.flask:
@@ -1453,35 +4465,37 @@ if __name__ == "__main__":
         exit(1)
     # Phase 2B : case run as command line script
     else:
-        # -i, --inputs
-        if args.req_inputs:
-            for i in lseq.yield_clean_inputs():
-                write_string_to_stdout(i)
-        # -o, --out_journeys
-        elif args.req_outj:
-            for o in lseq.yield_out_journeys():
-                write_string_to_stdout(o)
-        # -j, --journeys
-        elif args.req_journeys:
-            for j in lseq.yield_journeys():
-                write_string_to_stdout(json.dumps(j))
-        # -p, --points
-        elif args.req_points:
-            for p in lseq.yield_points():
-                write_string_to_stdout(json.dumps(p))
-        # -r, --routes
-        elif args.req_paths:
-            write_string_to_stdout(json.dumps(lseq.get_paths()))
-        # -m, --metadata
-        elif args.req_metadata:
-            for m in lseq.yield_out_metadata():
-                write_string_to_stdout(m)
-        # -M, --mat
-        elif args.req_matrix:
-            for r in lseq.yield_matrix():
-                write_string_to_stdout(r)
-        # -x, --csv
-        elif args.req_csv:
-            for l in lseq.yield_global_csv():
-                write_string_to_stdout(l)
-
+        try:
+            # -i, --inputs
+            if args.req_inputs:
+                write_lines_to_stdout(lseq.yield_clean_inputs())
+            # -o, --out_journeys
+            elif args.req_outj:
+                write_lines_to_stdout(lseq.yield_out_journeys())
+            # -j, --journeys
+            elif args.req_journeys:
+                write_lines_to_stdout(lseq.yield_journeys_json())
+            # -z, --npz
+            elif args.req_npz is not None:
+                lseq.journeys_to_npz(args.req_npz)
+            # -s, --sqlite
+            elif args.req_sqlite is not None:
+                lseq.journeys_to_sqlite(args.req_sqlite)
+            # -p, --points
+            elif args.req_points:
+                write_lines_to_stdout(map(json.dumps, lseq.yield_points()))
+            # -r, --routes
+            elif args.req_paths:
+                write_string_to_stdout(json.dumps(lseq.get_paths()))
+            # -m, --metadata
+            elif args.req_metadata:
+                write_lines_to_stdout(lseq.yield_out_metadata())
+            # -M, --mat
+            elif args.req_matrix:
+                write_lines_to_stdout(lseq.yield_matrix())
+            # -x, --csv
+            elif args.req_csv:
+                write_lines_to_stdout(lseq.yield_global_csv())
+        except Exception as e:
+            logging.error(f"__main__ : {args.logname}, {e}")
+            exit(-1)
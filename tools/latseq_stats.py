@@ -18,6 +18,7 @@
 
 Example:
     ./latseq_logs.py -l /home/flavien/latseq.simple.lseq -j | ./latseq_stats.py -j
+    ./latseq_logs.py -l /home/flavien/latseq.simple.lseq -z && ./latseq_stats.py -sj -l /home/flavien/latseq.simple.npz
 
 TODO
     * Issue with float representation in python https://docs.python.org/3.6/tutorial/floatingpoint.html
@@ -33,6 +34,7 @@ import statistics
 import numpy
 import operator  # itemgetter
 import decimal
+import zipfile
 # import math
 
 #
@@ -44,11 +46,127 @@ BASIC_STATS = ["size", "min", "max", "mean", "stdev", ["quantiles", "0.05", "0.2
 QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
 PRECISION = 6
 OUT_FORMATS = ["json", "csv"]
+# Timestamp representations : float of seconds or integer number of 1e-N seconds
+TS_UNITS = {'float': 0, 'us': 6, 'ns': 9}
+TS_UNIT = 'float'
 
 #
 # FUNCTIONS
 #
 
+def str_to_ts(tsP: str):
+    """Convert a timestamp or a duration string in seconds to `TS_UNIT`"""
+    if TS_UNIT == 'float':
+        return float(tsP)
+    digits = TS_UNITS[TS_UNIT]
+    sec, _, frac = tsP.partition('.')
+    return int(sec + frac[:digits].ljust(digits, '0'))
+
+def ts_to_s(tsP) -> float:
+    """Convert a timestamp or a duration in `TS_UNIT` to seconds"""
+    if TS_UNIT == 'float':
+        return tsP
+    return tsP / 10**TS_UNITS[TS_UNIT]
+
+def json_loads(strP: str):
+    """json.loads() with numbers with a fractional part read as `TS_UNIT` timestamps"""
+    return json.loads(strP, parse_float=str_to_ts)
+
+def journeys_from_json(linesP: list) -> dict:
+    """Get the journeys of the json lines of `latseq_logs.py -j`, by uid"""
+    journeys = {}
+    for l in linesP:
+        tmp_j = json_loads(l)
+        journeys[tmp_j['uid']] = tmp_j
+    return journeys
+
+def load_npz(pathP: str) -> dict:
+    """Load the arrays of a npz file of `latseq_logs.py --npz` as read-only memory maps
+
+    The arrays of an uncompressed npz file are contiguous in the file: they are mapped without reading them.
+    An array of a compressed npz file, or an empty one, is read by numpy.load
+
+    Args:
+        pathP (str): path of the npz file
+
+    Returns:
+        :obj:`dict` of :obj:`numpy.ndarray`: the arrays by name
+    """
+    res = {}
+    with zipfile.ZipFile(pathP) as npz, open(pathP, 'rb') as f, numpy.load(pathP) as arrays:
+        for info in npz.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                res[name] = arrays[name]
+                continue
+            f.seek(info.header_offset + 26)  # lengths of the name and of the extra field of the local header
+            local = numpy.frombuffer(f.read(4), dtype='<u2')
+            f.seek(info.header_offset + 30 + int(local[0]) + int(local[1]))
+            version = numpy.lib.format.read_magic(f)
+            if version not in ((1, 0), (2, 0)):
+                res[name] = arrays[name]
+                continue
+            if version == (1, 0):
+                shape, fortran, dtype = numpy.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = numpy.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject or not shape or 0 in shape:
+                res[name] = arrays[name]
+                continue
+            res[name] = numpy.memmap(f, dtype=dtype, mode='r', offset=f.tell(), shape=shape, order='F' if fortran else 'C')
+    return res
+
+def journeys_from_npz(arraysP: dict) -> dict:
+    """Get the completed journeys of the arrays of `load_npz`, as the ones read from `latseq_logs.py -j`
+
+    Only what the statistics use is rebuilt : uid, dir, path, completed, ts_in, ts_out, set and 'len' of properties
+
+    Args:
+        arraysP (:obj:`dict` of :obj:`numpy.ndarray`): the arrays of a npz file of `latseq_logs.py --npz`
+
+    Returns:
+        :obj:`dict`: journeys by uid, with timestamps in `TS_UNIT`
+    """
+    digits = TS_UNITS[str(arraysP['ts_unit'])]
+    def _to_ts(tsP) -> list:
+        """Convert timestamps of the npz file to `TS_UNIT`, as `str_to_ts` of their string in seconds"""
+        if TS_UNIT == 'float':
+            scale = 10**digits
+            return [t / scale for t in tsP.tolist()]  # true division of int, correctly rounded as float()
+        if TS_UNITS[TS_UNIT] >= digits:
+            return (tsP * 10**(TS_UNITS[TS_UNIT] - digits)).tolist()
+        return (tsP // 10**(digits - TS_UNITS[TS_UNIT])).tolist()
+    completed = numpy.flatnonzero(arraysP['journey.completed'])
+    # measures of the completed journeys, grouped by journey
+    hops = numpy.flatnonzero(arraysP['journey.completed'][arraysP['hop.journey']])
+    lengths = numpy.bincount(arraysP['hop.journey'][hops], minlength=len(arraysP['journey.completed']))[completed]
+    offsets = numpy.concatenate(([0], numpy.cumsum(lengths))).tolist()
+    segments = arraysP['segment'].tolist()
+    sets = [
+        [i, ts, segments[s]] for i, ts, s in zip(
+            arraysP['hop.input'][hops].tolist(),
+            _to_ts(arraysP['hop.ts'][hops]),
+            arraysP['hop.segment'][hops].tolist())]
+    res = {}
+    for n, (k, dir, path, ts_in, ts_out, length) in enumerate(zip(
+            completed.tolist(),
+            arraysP['journey.dir'][completed].tolist(),
+            arraysP['journey.path'][completed].tolist(),
+            _to_ts(arraysP['journey.ts_in'][completed]),
+            _to_ts(arraysP['journey.ts_out'][completed]),
+            arraysP['journey.len'][completed].tolist())):
+        res[str(k)] = {
+            'dir': dir,
+            'ts_in': ts_in,
+            'set': sets[offsets[n]:offsets[n + 1]],
+            'path': path,
+            'completed': True,
+            'ts_out': ts_out,
+            'properties': {'len': str(length)} if length >= 0 else {},
+            'uid': str(k)}
+    return res
+
+
 def output_function(outP: dict, flagP=False, fmtP="json", data_nameP=""):
     """output wrapper
 
@@ -191,7 +309,7 @@ class latseq_stats:
                     # journeysP[j]['set'][2] : corresponding segment
                     #tmp_i = journeysP[j]['set'][i]
                     tmp_header += str(i[2])
-                    tmp_l += f"{(i[1] - tmp_tm1):.6f};"
+                    tmp_l += f"{ts_to_s(i[1] - tmp_tm1):.6f};"
                     tmp_tm1 = i[1]
                 tmp_d[tmp_path_id] = [tmp_header]
                 tmp_d[tmp_path_id].append(tmp_l)
@@ -201,7 +319,7 @@ class latseq_stats:
                 tmp_tm1 = journeysP[j]['ts_in']
                 for i in journeysP[j]['set']:
                     #tmp_i = journeysP[j]['set'][i]
-                    tmp_l += f"{(i[1] - tmp_tm1):.6f};"
+                    tmp_l += f"{ts_to_s(i[1] - tmp_tm1):.6f};"
                     tmp_tm1 = i[1]
                 tmp_d[tmp_path_id].append(tmp_l)
         # end for self.journeys
@@ -233,8 +351,8 @@ class latseq_stats:
             times[journeysP[j]['dir']].append((
                 journeysP[j]['dir'],
                 j,
-                journeysP[j]['ts_in'],
-                round((journeysP[j]['ts_out'] - journeysP[j]['ts_in'])*S_TO_MS, 6)
+                ts_to_s(journeysP[j]['ts_in']),
+                round(ts_to_s(journeysP[j]['ts_out'] - journeysP[j]['ts_in'])*S_TO_MS, 6)
                 ))
         tmp_t = list()
         if not times[0]:
@@ -279,13 +397,13 @@ class latseq_stats:
                 continue
             # Compute share of time for each points
             else:
-                duration = round(journeysP[j]['ts_out'] - journeysP[j]['ts_in'], 6)
+                duration = round(ts_to_s(journeysP[j]['ts_out'] - journeysP[j]['ts_in']), 6)
                 tmp_j = {'total': duration, 'durations': []}
                 try:
                     for p in range(len(journeysP[j]['set'])-1):
                         # replace seg par point according to paths
                         tmp_seg = (journeysP[j]['set'][p][0], journeysP[j]['set'][p+1][0])
-                        tmp_duration =  round((journeysP[j]['set'][p+1][1] - journeysP[j]['set'][p][1]), 6)
+                        tmp_duration =  round(ts_to_s(journeysP[j]['set'][p+1][1] - journeysP[j]['set'][p][1]), 6)
                         tmp_j['durations'].append(
                             (
                                 tmp_seg,
@@ -341,7 +459,7 @@ class latseq_stats:
         for p in pointsP:
             if 'duration' not in pointsP[p]:
                 continue
-            tmp_p = [v * S_TO_MS for v in list(pointsP[p]['duration'].values())]
+            tmp_p = [ts_to_s(v) * S_TO_MS for v in list(pointsP[p]['duration'].values())]
             if 0 in pointsP[p]['dir']:
                 times[0][p] = tmp_p
             if 1 in pointsP[p]['dir']:
@@ -386,16 +504,16 @@ class latseq_stats:
                 dire = str(journeysP[j]['dir'])
                 path = journeysP[j]['path']
                 if path not in res[dire]:
-                    res[dire][path] = [(journeysP[j]['set'][-1][1], _handle_len_prop(journeysP[j]), journeysP[j]['uid'], 0)]  # [i] = (ts, len, uid, instant throughput)
+                    res[dire][path] = [(ts_to_s(journeysP[j]['set'][-1][1]), _handle_len_prop(journeysP[j]), journeysP[j]['uid'], 0)]  # [i] = (ts, len, uid, instant throughput)
                     continue
                 tmp_len = _handle_len_prop(journeysP[j])
                 try:
-                    tmp_tp = _compute_instant_throughtput(res[dire][path][-1][0], journeysP[j]['set'][-1][1], tmp_len)
+                    tmp_tp = _compute_instant_throughtput(res[dire][path][-1][0], ts_to_s(journeysP[j]['set'][-1][1]), tmp_len)
                 except ZeroDivisionError:
                     continue
                 else:
                     res[dire][path].append((
-                        journeysP[j]['set'][-1][1],
+                        ts_to_s(journeysP[j]['set'][-1][1]),
                         tmp_len,
                         journeysP[j]['uid'],
                         tmp_tp
@@ -414,15 +532,15 @@ class latseq_stats:
                 dire = str(journeysP[j]['dir'])
                 path = journeysP[j]['path']
                 if path not in res[dire]:
-                    res[dire][path] = [(journeysP[j]['set'][0][1], journeysP[j]['uid'], 0)]  # [i] = (ts, len, uid, instant throughput)
+                    res[dire][path] = [(ts_to_s(journeysP[j]['set'][0][1]), journeysP[j]['uid'], 0)]  # [i] = (ts, len, uid, instant throughput)
                     continue
                 # set.0 = first segment in path
-                tmp_ia = abs(journeysP[j]['set'][0][1] - res[dire][path][-1][0])
+                tmp_ia = abs(ts_to_s(journeysP[j]['set'][0][1]) - res[dire][path][-1][0])
                 if tmp_ia == 0:  # FIX temporary
                     tmp_ia = 0.000001
                 tmp_ia = f"{tmp_ia:.6f}"
                 res[dire][path].append((
-                    journeysP[j]['set'][-1][1],  # timestamp
+                    ts_to_s(journeysP[j]['set'][-1][1]),  # timestamp
                     journeysP[j]['uid'],
                     tmp_ia
                 ))
@@ -461,6 +579,14 @@ if __name__ == "__main__":
         choices=OUT_FORMATS,
         help="Output's format. csv and json supported. by default, json"
     )
+    parser.add_argument(
+        "--ts",
+        dest="ts_unit",
+        type=str,
+        default=TS_UNIT,
+        choices=list(TS_UNITS.keys()),
+        help="Representation of timestamps for computations : float, or integer us or ns. by default, float"
+    )
     parser.add_argument(
         "-sj",
         "--sjourneys",
@@ -511,15 +637,25 @@ if __name__ == "__main__":
         help="Request matrix of segment/journey"
     )
     args = parser.parse_args()
+    TS_UNIT = args.ts_unit
     # Check arguments
     if not args.stat_journeys and not args.stat_points and not args.stat_journeys_points and not args.journeys_durations and not args.stat_throughput and not args.stat_interarrival and not args.matrix:
         sys.stderr.write("[WARNING] No action requested\n")
         exit()
 
     list_meas_json = []
+    journeys_npz = None  # journeys of a npz file, instead of json lines
     if args.logname:
         if args.logname.split('.')[-1] == 'lseqj':  # We do statistics from a log journey files
             pass
+        if args.logname.split('.')[-1] == 'npz':  # We do statistics from the columns of latseq_logs.py --npz
+            if args.stat_points:
+                sys.stderr.write("[ERROR] no points in a npz file, use latseq_logs.py -p\n")
+                exit()
+            try:
+                journeys_npz = journeys_from_npz(load_npz(args.logname))
+            except (IOError, ValueError, KeyError) as e:
+                raise IOError(f"[Error] at opening ({args.logname}), {e}")
         if args.logname.split('.')[-1] == 'json':  # We do statistics from a json file
             try:
                 with open(args.logname, 'r') as j:
@@ -541,21 +677,12 @@ if __name__ == "__main__":
 
     # -j, --journeys
     if args.stat_journeys:
-        journeys = {}
-        # handle errors
-        for j in list_meas_json:
-            tmp_j = json.loads(j)
-            journeys[tmp_j['uid']] = tmp_j
+        journeys = journeys_npz if journeys_npz is not None else journeys_from_json(list_meas_json)
         output = output_function(latseq_stats.journeys_latency_statistics(journeys, False), args.print_stats, args.format, "Journeys latency stats")
 
     # -jpp, --jperpoints
     elif args.stat_journeys_points:
-        journeys = {}
-        # to a dict
-        tmp_j = {}
-        for jpp in list_meas_json:
-            tmp_j = json.loads(jpp)
-            journeys[tmp_j['uid']] = tmp_j
+        journeys = journeys_npz if journeys_npz is not None else journeys_from_json(list_meas_json)
         # call latseq_logs to get path
         # TODO : gerer les erreurs
         # CA NE MARCHE PAS, avec run() et Popen me fait un Broken pipe...
@@ -589,10 +716,7 @@ if __name__ == "__main__":
 
     # -jd, jduration
     elif args.journeys_durations:
-        journeys = {}
-        for jd in list_meas_json:
-            tmp_j = json.loads(jd)
-            journeys[tmp_j['uid']] = tmp_j
+        journeys = journeys_npz if journeys_npz is not None else journeys_from_json(list_meas_json)
         tmp_out = latseq_stats.journeys_latency_statistics(journeys, True)  # tmp_out[dir][times][0..len]=(dir, jid, ts, durations)
         out_list = []
 
@@ -620,7 +744,7 @@ if __name__ == "__main__":
     elif args.stat_points:
         points = {}
         for p in list_meas_json:
-            tmp_p = json.loads(p)
+            tmp_p = json_loads(p)
             #point_name = list(tmp_p.keys())[0]
             try:
                 point_name = tmp_p['point']
@@ -645,12 +769,7 @@ if __name__ == "__main__":
 
     # -st, --stp
     elif args.stat_throughput:
-        journeys = {}
-        # to a dict
-        tmp_j = {}
-        for jpp in list_meas_json:
-            tmp_j = json.loads(jpp)
-            journeys[tmp_j['uid']] = tmp_j
+        journeys = journeys_npz if journeys_npz is not None else journeys_from_json(list_meas_json)
         if args.format == "json":
             output = json.dumps(latseq_stats.instant_out_throughput(journeys)) + "\n"
         if args.format == "csv":
@@ -665,12 +784,7 @@ if __name__ == "__main__":
 
     # -ia, --interarrival
     elif args.stat_interarrival:
-        journeys = {}
-        # to a dict
-        tmp_j = {}
-        for jpp in list_meas_json:
-            tmp_j = json.loads(jpp)
-            journeys[tmp_j['uid']] = tmp_j
+        journeys = journeys_npz if journeys_npz is not None else journeys_from_json(list_meas_json)
         if args.format == "json":
             output = json.dumps(latseq_stats.in_interarrivals_rate(journeys)) + "\n"
         if args.format == "csv":
@@ -685,12 +799,7 @@ if __name__ == "__main__":
 
     # -m, --matrix
     elif args.matrix:
-        journeys = {}
-        # to a dict
-        tmp_j = {}
-        for jpp in list_meas_json:
-            tmp_j = json.loads(jpp)
-            journeys[tmp_j['uid']] = tmp_j
+        journeys = journeys_npz if journeys_npz is not None else journeys_from_json(list_meas_json)
         
         for l in latseq_stats.yield_matrix(journeys):
             # TODO: to uniformize with the rest of the script
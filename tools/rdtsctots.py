@@ -15,18 +15,81 @@
 #################################################################################
 
 import sys
+import gzip
+import lzma
+import bz2
+import numpy
 
 # 78374 lines = 182ms; 1 line = 2.32us 
 
+CONVERT_BLOCK_SIZE = 1 << 16  # lines formatted at a time
+COMPRESSIONS = {'.gz': gzip, '.xz': lzma, '.bz2': bz2}  # modules of compressed lseq files, by extension
+
 def usage():
-    sys.stdout.write("[rdtsctots] ./rdtsctots.py raw_file.lseq > file.lseq")
+    sys.stdout.write("[rdtsctots] ./rdtsctots.py raw_file.lseq[.gz|.xz|.bz2] > file.lseq")
     exit()
 
+def get_compression(filenameP: str):
+    """Module to decompress `filenameP`, None if it is not compressed"""
+    return COMPRESSIONS.get(filenameP[filenameP.rfind('.'):])
+
+def strip_compression(filenameP: str) -> str:
+    """`filenameP` without the extension of its compression, e.g. trace.lseq for trace.lseq.xz"""
+    return filenameP[:filenameP.rfind('.')] if get_compression(filenameP) else filenameP
+
+def open_lseq(filenameP: str, modeP: str = 'r'):
+    """Open a lseq file, decompressed on the fly if it is compressed"""
+    compression = get_compression(filenameP)
+    if compression is None:
+        return open(filenameP, modeP)
+    return compression.open(filenameP, modeP if 'b' in modeP else modeP + 't')
+
+def gettimeofday_to_ns(timeP: str) -> int:
+    """Convert the time of day of a synchronisation line, seconds with up to 9 decimals, in ns"""
+    sec, _, frac = timeP.partition('.')
+    return int(sec + frac[:9].ljust(9, '0'))
+
+class rdtsc_clock():
+    """Model of the time of day from the cycles of the CPU
+
+    The model is piecewise linear between the synchronisation lines,
+    `S rdtsc--gettimeofday` lines written every second by the LatSeq module,
+    so it follows the drift of the cycles' frequency.
+    The first and the last pieces are extended before and after the synchronisation lines
+
+    Args:
+        syncsP (list): (cycles, time of day) of synchronisation lines, as int and str
+    """
+    def __init__(self, syncsP):
+        cycles = numpy.array([s[0] for s in syncsP], dtype=numpy.int64)
+        times = numpy.array([gettimeofday_to_ns(s[1]) for s in syncsP], dtype=numpy.int64)
+        self.cycles, first = numpy.unique(cycles, return_index=True)
+        if len(self.cycles) < 2:
+            raise ValueError("at least 2 synchronisation lines are needed to convert rdtsc")
+        # the time of day could be set back, keep the model monotonic
+        self.times = numpy.maximum.accumulate(times[first])
+        if self.times[-1] == self.times[0]:
+            raise ValueError("synchronisation lines have the same time of day")
+        # mean frequency, for information
+        self.cpufreq = (int(self.cycles[-1]) - int(self.cycles[0])) * 10**9 // (int(self.times[-1]) - int(self.times[0]))
+
+    def to_ns(self, cyclesP):
+        """Convert cycles in time of day in ns, `cyclesP` is an int or a numpy array of int64"""
+        cycles = numpy.asarray(cyclesP, dtype=numpy.int64)
+        piece = numpy.clip(numpy.searchsorted(self.cycles, cycles, side='right') - 1, 0, len(self.cycles) - 2)
+        elapsed = cycles - self.cycles[piece]
+        piece_cycles = self.cycles[piece + 1] - self.cycles[piece]
+        piece_ns = self.times[piece + 1] - self.times[piece]
+        # whole pieces and remainder are computed apart to stay in int64
+        ns = (self.times[piece] + (elapsed // piece_cycles) * piece_ns +
+            numpy.floor((elapsed % piece_cycles) * (piece_ns / piece_cycles)).astype(numpy.int64))
+        return ns if ns.ndim else int(ns)
+
 class rdtsctots():
     def __init__(self, filenameP):
         self.filename = filenameP
         self.lines = None
-        with open(self.filename, 'r') as f:
+        with open_lseq(self.filename, 'r') as f:
             self.lines = f.readlines()
         f.close()
         if not self.lines:
@@ -48,25 +111,30 @@ class rdtsctots():
         # TODO : more flexible
         end_header_idx = 3
         self.header = self.lines[0:end_header_idx-1]
-        # sort
-        self.lines = sorted(self.lines[end_header_idx:-1])
-
-    def _get_offset_cpufreq(self):
-        first_S = next(l for l in self.lines if ' S ' in l).split()
-        last_S = next(l for l in self.lines[::-1] if ' S ' in l).split()
-        cycle_offset = int(first_S[0])
-        time_offset = float(first_S[3])
-        cpufreq = int((int(last_S[0]) - int(first_S[0]))/(float(last_S[3]) - float(first_S[3])))
-        return (cycle_offset, time_offset, cpufreq)
-    
+        self.lines = self.lines[end_header_idx:-1]
+        if self.self_converted_rdtsc():
+            self.lines.sort()
+            return
+        # sort by the value of rdtsc, counts of different widths are not sorted as strings
+        cycles = numpy.fromstring(' '.join([l.partition(' ')[0] for l in self.lines]), dtype=numpy.int64, sep=' ')
+        order = numpy.argsort(cycles, kind='stable')
+        self.cycles = cycles[order]
+        self.lines = [self.lines[o] for o in order.tolist()]
+
+    def _get_clock(self):
+        syncs = [(int(c), l.split()[3]) for c, l in zip(self.cycles.tolist(), self.lines) if ' S ' in l]
+        return rdtsc_clock(syncs)
+
     def yield_rdtsctots(self):
         if self.self_converted_rdtsc():
             return
-        offset, time0, cpufreq = self._get_offset_cpufreq()
-        for l in self.lines:  # Compute and replace rdtsc value by gettimeofday
-            tmp = l.split(" ", 1)
-            yield f"%.6f {tmp[1]}" % ((int(tmp[0]) - offset)/cpufreq + time0)
-    
+        # Compute all the timestamps at once, in us as the "%.6f" format of converted logs
+        us = (self._get_clock().to_ns(self.cycles) + 500) // 1000
+        for b in range(0, len(self.lines), CONVERT_BLOCK_SIZE):  # Replace rdtsc value by gettimeofday
+            yield from [
+                f"{u[:-6]}.{u[-6:]}{l[l.index(' '):]}"
+                for u, l in zip(map(str, us[b:b + CONVERT_BLOCK_SIZE].tolist()), self.lines[b:b + CONVERT_BLOCK_SIZE])]
+
     def write_rdtsctots(self, outfilename):
         if self.self_converted_rdtsc():
             return